@@ -5,11 +5,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import APIRouter, Depends, status, Response
 
-from app.core.db import get_async_session
+from app.core.db import get_read_async_session
 
 router = APIRouter(
     prefix='/health',
-    dependencies=[Depends(get_async_session)],
+    dependencies=[Depends(get_read_async_session)],
     tags=['Health']
 )
 
@@ -24,7 +24,7 @@ router = APIRouter(
         }
 )
 async def health(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_async_session),
 ) -> Response:
     try:
         #  SELECT 1 is a simple SQL query used to test database connectivity
@@ -0,0 +1,74 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from app.core.config import get_config
+from app.core.db import engine, replica_engines
+from app.core.db_pool import get_pool_status
+from app.dal import response_cache
+from app.users.token_cache import verified_token_cache
+from app.users.access_tokens import access_token_cache, access_token_revocation_listener
+
+config = get_config()
+
+
+async def verify_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    # the operational endpoints are for the requests with the INTERNAL_API_TOKEN, and are not
+    # found at all while it is not set
+    internal_api_token = config.INTERNAL_API_TOKEN
+    if internal_api_token is None:
+        raise HTTPException(status_code=404, detail='Not Found')
+    if x_internal_token is None or not secrets.compare_digest(
+        x_internal_token.encode(), internal_api_token.get_secret_value().encode()
+    ):
+        raise HTTPException(status_code=403, detail='Invalid internal token')
+
+
+# operational endpoints - not part of the public API and should not be exposed through the proxy
+router = APIRouter(
+    prefix='/internal',
+    tags=['Internal'],
+    include_in_schema=False,
+    dependencies=[Depends(verify_internal_token)]
+)
+
+
+@router.get('/db-pool')
+async def db_pool_status() -> dict:
+    # the pools are per worker process, so is their status
+    return {
+        'pid': os.getpid(),
+        'primary': get_pool_status(engine),
+        'replicas': [get_pool_status(replica_engine) for replica_engine in replica_engines],
+    }
+
+
+@router.get('/response-cache')
+async def response_cache_status() -> dict:
+    # hit / miss counters of the response cache of this worker process, for sizing it
+    return {
+        'pid': os.getpid(),
+        **response_cache.stats(),
+    }
+
+
+@router.get('/token-cache')
+async def token_cache_status() -> dict:
+    # hit / miss counters of the verified tokens cache of this worker process
+    return {
+        'pid': os.getpid(),
+        **verified_token_cache.stats(),
+    }
+
+
+@router.get('/access-token-cache')
+async def access_token_cache_status() -> dict:
+    # hit / miss counters of the database access tokens cache of this worker process, and
+    # whether it hears of the tokens revoked by the other workers
+    return {
+        'pid': os.getpid(),
+        'listening_to_revocations': access_token_revocation_listener.is_listening,
+        **access_token_cache.stats(),
+    }
@@ -5,6 +5,7 @@ from .users import router as users_router
 from .priorities import router as priorities_router
 from .categories import router as categories_router
 from .todos import router as todos_router
+from .sync import router as sync_router
 from .debug import router as debug_router
 from .webhooks import router as webhooks_router
 from .websockets import router as websockets_router
@@ -22,6 +23,7 @@ router.include_router(users_router)
 router.include_router(priorities_router)
 router.include_router(categories_router)
 router.include_router(todos_router)
+router.include_router(sync_router)
 
 router.include_router(webhooks_router)
 router.include_router(websockets_router)
@@ -1,10 +1,11 @@
 from asyncio.log import logger
 from fastapi import APIRouter
-from fastapi import Depends
+from fastapi import Depends, Request
 from app.users.users import fast_api_users
 from app.users.auth import auth_backend
 from app.schemas import UserRead, UserCreate
-from app.users.auth import oauth2_scheme, verify_token, bearer_transport, bearer_db_transport
+from app.users.auth import oauth2_scheme, get_current_principal, bearer_transport, bearer_db_transport
+from app.users.access_tokens import CachedAccessTokenDatabase, get_cached_access_token_db
 
 
 router = APIRouter(
@@ -20,12 +21,20 @@ router.include_router(fast_api_users.get_verify_router(UserRead))
 
 @router.post("/custom-logout")
 async def custom_logout(
+    request: Request,
     token: str = Depends(oauth2_scheme),
+    access_token_db: CachedAccessTokenDatabase = Depends(get_cached_access_token_db),
 ):  
-    user = await verify_token(token)
     logger.info("Custom logout endpoint")
-    logger.info(user)
-    logger.info(token)
+    # a database access token (see auth_db_backend) is revoked - in every worker. a JWT can
+    # not be revoked, it is only checked to be valid
+    access_token = await access_token_db.get_by_token(token)
+    if access_token is not None:
+        await access_token_db.delete(access_token)
+        logger.info(f"Revoked the access token of user {access_token.user_id}")
+    else:
+        principal = await get_current_principal(request, token)
+        logger.info(principal)
     await bearer_transport.get_logout_response()
     # return {"message": "Logged out"}
 
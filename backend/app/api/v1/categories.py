@@ -1,48 +1,86 @@
 from asyncio.log import logger
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, status, Depends, HTTPException
+from fastapi import APIRouter, status, Depends, Header, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import conint
+from pydantic import TypeAdapter, conint
 
-from app.core.db import get_async_session
+from app.core.db import get_async_session, get_read_async_session
 # from app.users.users import current_logged_user
-from app.dal import db_service, GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT, MAX_POSTGRES_INTEGER
+from app.dal import db_service, get_next_cursor, GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT, MAX_POSTGRES_INTEGER
 from app.schemas import CategoryCreate, CategoryRead, CategoryInDB
 from app.models.tables import Category
 from app.utils import exception_handler, get_open_api_response, get_open_api_unauthorized_access_response
-from app.users.auth import oauth2_scheme, verify_token
+from app.utils import get_not_modified_response, get_cached_response, cache_response
+from app.users.auth import Principal, get_current_principal
 
 router = APIRouter(
     prefix='/categories',
     dependencies=[
-        Depends(oauth2_scheme),
+        Depends(get_current_principal),
         Depends(get_async_session)
     ],
     tags=['Categories']
 )
 
+# serializes the pages of GET /categories that are cached, as its response_model would
+CATEGORIES_ADAPTER = TypeAdapter(list[CategoryRead])
+
 
 @router.get(
     '',
     response_model=list[CategoryRead],
-    responses={status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response()}
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_400_BAD_REQUEST: get_open_api_response(
+            {'Trying to continue from a malformed cursor': 'cursor is not valid'}
+        ),
+        status.HTTP_304_NOT_MODIFIED: {'description': 'The categories did not change since the If-None-Match ETag'}
+    }
 )
 async def get_categories(
+    request: Request,
+    response: Response,
     skip: conint(ge=0, le=MAX_POSTGRES_INTEGER) = GET_MULTI_DEFAULT_SKIP,  # type: ignore[valid-type]
     limit: conint(ge=0, le=MAX_POSTGRES_INTEGER) = GET_MULTI_DEFAULT_LIMIT,  # type: ignore[valid-type]
-    session: AsyncSession = Depends(get_async_session),
-    token: str = Depends(oauth2_scheme)
+    after: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_read_async_session),
+    principal: Principal = Depends(get_current_principal)
 ) -> list[Category]:
-    user = await verify_token(token)
+    # when 'after' is given, paging is done by cursor and 'skip' is ignored.
+    # the cursor of the next page (if any) is returned in the X-Next-Cursor header.
+    # the ETag is the version of the user's data - with a matching If-None-Match, 304 is returned.
+    # otherwise the page is served from the response cache, when it was cached at that version
+    version = await db_service.get_data_version(session, user_id=principal.user_id)
+    not_modified = get_not_modified_response(response, if_none_match=if_none_match, version=version)
+    if not_modified:
+        return not_modified
+    cached = get_cached_response(request, response, user_id=principal.user_id, version=version)
+    if cached:
+        return cached
     try:
-        return await db_service.get_categories(
+        categories = await db_service.get_categories(
             session,
-            created_by_id=user.get("user_id"),
+            created_by_id=principal.user_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            after=after
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
+    next_cursor = get_next_cursor(categories, limit=limit)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return cache_response(
+        request,
+        response,
+        user_id=principal.user_id,
+        version=version,
+        body=CATEGORIES_ADAPTER.dump_json(CATEGORIES_ADAPTER.validate_python(categories))
+    )
 
 
 @router.post(
@@ -60,10 +98,9 @@ async def get_categories(
 async def add_category(
     category_in: CategoryCreate,
     session: AsyncSession = Depends(get_async_session),
-    token: str = Depends(oauth2_scheme) 
+    principal: Principal = Depends(get_current_principal) 
 ) -> Category:
-        user = await verify_token(token)
-        category_in = CategoryInDB(name=category_in.name, created_by_id=user.get("user_id"))
+        category_in = CategoryInDB(name=category_in.name, created_by_id=principal.user_id)
         return await db_service.add_category(session, category_in=category_in)
 
 
@@ -78,17 +115,19 @@ async def add_category(
         ),
         status.HTTP_404_NOT_FOUND: get_open_api_response(
             {'Trying to delete non existing category': 'category does not exists'}
+        ),
+        status.HTTP_409_CONFLICT: get_open_api_response(
+            {'Trying to delete a category while todos are imported into it': 'category is in use, try again'}
         )
     }
 )
 @exception_handler
 async def delete_category(
     category_id: UUID,
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_async_session)
 ) -> None:
-    user = await verify_token(token)
-    user_id = UUID(user.get("user_id"))  # Convert string to UUID
+    user_id = principal.user_id
     logger.info(f"Deleting category: {category_id} by user: {user_id}")
     await db_service.delete_category(session, id_to_delete=category_id, created_by_id=user_id)
 
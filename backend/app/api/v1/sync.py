@@ -0,0 +1,40 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_async_session, get_read_async_session
+from app.dal import db_service
+from app.schemas import SyncChanges
+from app.utils import exception_handler, get_open_api_response, get_open_api_unauthorized_access_response
+from app.users.auth import Principal, get_current_principal
+
+router = APIRouter(
+    prefix='/sync',
+    dependencies=[
+        Depends(get_current_principal),
+        Depends(get_async_session)
+    ],
+    tags=['Sync']
+)
+
+
+@router.get(
+    '',
+    response_model=SyncChanges,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_400_BAD_REQUEST: get_open_api_response(
+            {'Trying to sync from a malformed token': 'sync token is not valid'}
+        )
+    }
+)
+@exception_handler
+async def sync(
+    since: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_async_session)
+) -> SyncChanges:
+    # the todos and categories of the user created, changed or deleted since the token of
+    # the previous sync (all of them without one), and the token to sync from next time
+    return await db_service.get_changes(session, created_by_id=principal.user_id, since=since)
@@ -1,24 +1,32 @@
 from asyncio.log import logger
-from fastapi import APIRouter, Depends, status, HTTPException
+from typing import AsyncIterator, Literal, Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, status, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import conint
+from pydantic import TypeAdapter, conint
 from uuid import UUID
-from app.core.db import User, get_async_session
+from app.core.db import User, get_async_session, get_read_async_session, read_session_router
 from app.models.tables import Todo
-from app.dal import db_service, GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT, MAX_POSTGRES_INTEGER
-from app.schemas import TodoRead, TodoInDB, TodoCreate, TodoUpdate, TodoUpdateInDB
+from app.dal import db_service, get_next_cursor, GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT, MAX_POSTGRES_INTEGER
+from app.schemas import TodoRead, TodoInDB, TodoCreate, TodoUpdate, TodoUpdateInDB, TodoBatch, TodoBatchItemResult, TodoFileFormat, TodoImportResult
+from app.schemas import TodoFilters, TodoSort, TodoStats
+from app.schemas.todo import TODO_SEARCH_QUERY_MAX_LENGTH, TODOS_FILTER_MAX_CATEGORIES
 from app.utils import exception_handler, get_open_api_response, get_open_api_unauthorized_access_response
+from app.utils import encode_todos, decode_todos, TODO_FILE_MEDIA_TYPES, get_not_modified_response
+from app.utils import get_cached_response, cache_response
 from app.core.config import get_config
-from app.users.auth import oauth2_scheme, verify_token, validate_token
+from app.users.auth import Principal, get_current_principal
 from app.users.users import current_active_user
 config = get_config()
 
+# serializes the pages of GET /todos that are cached, as its response_model would
+TODOS_ADAPTER = TypeAdapter(list[TodoRead])
 
 
 router = APIRouter(
     prefix='/todos',
     dependencies=[
-        Depends(oauth2_scheme),
+        Depends(get_current_principal),
         Depends(get_async_session)
     ],
     tags=['Todos']
@@ -27,29 +35,200 @@ router = APIRouter(
 @router.get(
     '',
     response_model=list[TodoRead],
-    responses={status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response()}
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_400_BAD_REQUEST: get_open_api_response(
+            {'Trying to continue from a malformed cursor': 'cursor is not valid'}
+        ),
+        status.HTTP_304_NOT_MODIFIED: {'description': 'The todos did not change since the If-None-Match ETag'}
+    }
 )
 @exception_handler
 async def get_todos(
+    request: Request,
+    response: Response,
     skip: conint(ge=0, le=MAX_POSTGRES_INTEGER) = GET_MULTI_DEFAULT_SKIP,  # type: ignore[valid-type]
     limit: conint(ge=0, le=MAX_POSTGRES_INTEGER) = GET_MULTI_DEFAULT_LIMIT,  # type: ignore[valid-type]
-    token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_async_session),
+    after: Optional[str] = None,
+    is_completed: Optional[bool] = None,
+    priority_id: Optional[UUID] = None,
+    category_id: list[UUID] = Query([], max_length=TODOS_FILTER_MAX_CATEGORIES),
+    category_match: Literal['any', 'all'] = 'any',
+    sort: TodoSort = 'id',
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_async_session),
 ) -> Todo:
-    user = await verify_token(token)
-    logger.info(f"Getting todos for user {user}")
+    # when 'after' is given, paging is done by cursor and 'skip' is ignored.
+    # the cursor of the next page (if any) is returned in the X-Next-Cursor header.
+    # category_id may be repeated - category_match tells whether a todo must be in any or all of them.
+    # the ETag is the version of the user's data - with a matching If-None-Match, 304 is returned.
+    # otherwise the page is served from the response cache, when it was cached at that version
+    version = await db_service.get_data_version(session, user_id=principal.user_id)
+    not_modified = get_not_modified_response(response, if_none_match=if_none_match, version=version)
+    if not_modified:
+        return not_modified
+    cached = get_cached_response(request, response, user_id=principal.user_id, version=version)
+    if cached:
+        return cached
+    logger.info(f"Getting todos for user {principal}")
     logger.info(f"current_active_user: {current_active_user}")
 
     # logger.info(f"current_logged_user: {current_logged_user}")
 
-    return await db_service.get_todos(
+    todos = await db_service.get_todos(
             session,
-            created_by_id=user.get("user_id"),
+            created_by_id=principal.user_id,
             skip=skip,
-            limit=limit
+            limit=limit,
+            after=after,
+            filters=TodoFilters(
+                is_completed=is_completed,
+                priority_id=priority_id,
+                categories_ids=category_id,
+                category_match=category_match
+            ),
+            sort=sort
             )
+    next_cursor = get_next_cursor(todos, limit=limit, sort_key=db_service.get_todos_sort_key(sort))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return cache_response(
+        request,
+        response,
+        user_id=principal.user_id,
+        version=version,
+        body=TODOS_ADAPTER.dump_json(TODOS_ADAPTER.validate_python(todos))
+    )
         
 
+@router.get(
+    '/search',
+    response_model=list[TodoRead],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_400_BAD_REQUEST: get_open_api_response(
+            {'Trying to continue from a malformed cursor': 'cursor is not valid'}
+        )
+    }
+)
+@exception_handler
+async def search_todos(
+    response: Response,
+    q: str = Query(min_length=1, max_length=TODO_SEARCH_QUERY_MAX_LENGTH),
+    limit: conint(ge=0, le=MAX_POSTGRES_INTEGER) = GET_MULTI_DEFAULT_LIMIT,  # type: ignore[valid-type]
+    after: Optional[str] = None,
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_async_session),
+) -> list[Todo]:
+    # q is in web search syntax ("quoted phrases", or, -excluded words). the best matches
+    # come first, and the cursor of the next page (if any) is returned in the X-Next-Cursor header
+    rows = await db_service.search_todos(
+        session,
+        created_by_id=principal.user_id,
+        search_query=q,
+        limit=limit,
+        after=after
+    )
+    next_cursor = get_next_cursor(rows, limit=limit, sort_key=lambda row: (row.rank, row.Todo.id))
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return [row.Todo for row in rows]
+
+
+@router.get(
+    '/stats',
+    response_model=TodoStats,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response()
+    }
+)
+@exception_handler
+async def get_todo_stats(
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_async_session),
+) -> TodoStats:
+    # the number of open and completed todos of the user - in total, per priority and per category
+    return await db_service.get_todo_stats(session, created_by_id=principal.user_id)
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_200_OK: {
+            'content': {media_type: {} for media_type in TODO_FILE_MEDIA_TYPES.values()},
+            'description': 'All the todos of the user, ordered by id'
+        }
+    }
+)
+@exception_handler
+async def export_todos(
+    request: Request,
+    file_format: TodoFileFormat = Query('ndjson', alias='format'),
+    principal: Principal = Depends(get_current_principal)
+) -> StreamingResponse:
+    # the todos are streamed from a server side cursor, so the memory used does not
+    # depend on their number. the session is opened by the body itself - the sessions
+    # of the request's dependencies are closed before the body is sent
+    user_id = principal.user_id
+    session_maker = read_session_router.get_session_maker(request)
+
+    async def export_body() -> AsyncIterator[str]:
+        async with session_maker() as session:
+            async for chunk in encode_todos(db_service.export_todos(session, created_by_id=user_id), file_format):
+                yield chunk
+
+    return StreamingResponse(
+        export_body(),
+        media_type=TODO_FILE_MEDIA_TYPES[file_format],
+        headers={'Content-Disposition': f'attachment; filename="todos.{file_format}"'}
+    )
+
+
+@router.post(
+    '/import',
+    response_model=TodoImportResult,
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_400_BAD_REQUEST: get_open_api_response(
+            {
+                'Trying to import a csv file without a header': 'file is not valid',
+                'Trying to import a file that is not utf-8, or with a line too long': 'file is not valid',
+                'Trying to import todos the database can not store': 'todos could not be imported'
+            }
+        )
+    }
+)
+@exception_handler
+async def import_todos(
+    request: Request,
+    file_format: TodoFileFormat = Query('ndjson', alias='format'),
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
+) -> TodoImportResult:
+    # the body is a file in the format of GET /todos/export, read as it is streamed.
+    # its valid rows are imported in a single transaction, the rest are reported as rejected
+    user_id = principal.user_id
+
+    result = await db_service.import_todos(
+        session,
+        rows=decode_todos(request.stream(), file_format),
+        created_by_id=user_id
+    )
+
+    if result.imported:
+        await db_service.notify_todo_update(
+            session,
+            user_id,
+            "todo.imported",
+            {"imported": result.imported}
+        )
+
+    return result
+
+
 @router.post(
     '',
     response_model=TodoRead,
@@ -68,11 +247,10 @@ async def get_todos(
 @exception_handler
 async def add_todo(
     todo_in: TodoCreate,
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_async_session)
 ) -> Todo:
-    user = await verify_token(token)
-    user_id = UUID(user.get("user_id"))
+    user_id = principal.user_id
     
     todo_in = TodoInDB(
         content=todo_in.content,
@@ -94,6 +272,44 @@ async def add_todo(
     return new_todo
 
 
+@router.post(
+    '/batch',
+    response_model=list[TodoBatchItemResult],
+    responses={
+        status.HTTP_401_UNAUTHORIZED: get_open_api_unauthorized_access_response(),
+        status.HTTP_400_BAD_REQUEST: get_open_api_response(
+            {'The batch could not be written': 'batch is not valid'}
+        )
+    }
+)
+@exception_handler
+async def batch_todos(
+    batch: TodoBatch,
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_async_session)
+) -> list[TodoBatchItemResult]:
+    # every operation gets its own result (with the status code it would have gotten
+    # from the single todo endpoints), and all the valid ones are written together
+    user_id = principal.user_id
+
+    results = await db_service.batch_todos(session, batch=batch, created_by_id=user_id)
+
+    # Notify about all the changes of the batch at once
+    succeeded = [r for r in results if r.status_code < status.HTTP_400_BAD_REQUEST]
+    if succeeded:
+        await db_service.notify_todo_update(
+            session,
+            user_id,
+            "todo.batch",
+            {
+                action: [str(r.id) for r in succeeded if r.action == action]
+                for action in ('create', 'update', 'delete')
+            }
+        )
+
+    return results
+
+
 @router.put(
     '/{todo_id}',
     response_model=TodoRead,
@@ -118,10 +334,9 @@ async def add_todo(
 async def update_todo(
     todo_id: str,
     updated_todo: TodoUpdate,
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_async_session)
 ) -> Todo:
-    user = await verify_token(token)
 
     logger.info(f"Updated todo: {updated_todo}")
     updated_todo = TodoUpdateInDB(
@@ -130,14 +345,14 @@ async def update_todo(
         priority_id=updated_todo.priority_id,
         categories_ids=updated_todo.categories_ids,
         is_completed=updated_todo.is_completed,
-        created_by_id=user.get("user_id")
+        created_by_id=principal.user_id
     )
     updated_todo = await db_service.update_todo(session, updated_todo=updated_todo)
     
     # Notify about the updated todo
     await db_service.notify_todo_update(
         session,
-        user.get("user_id"),
+        principal.user_id,
         "todo.updated",
         str(updated_todo)
     )
@@ -162,11 +377,10 @@ async def update_todo(
 @exception_handler
 async def delete_todo(
     todo_id: UUID,
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_async_session)
 ) -> None:
-    user = await verify_token(token)
-    user_id = UUID(user.get("user_id"))  # Convert string to UUID
+    user_id = principal.user_id
     logger.info(f"Attempting to delete todo {todo_id} by user {user_id}")
 
     await db_service.delete_todo(session, id_to_delete=todo_id, created_by_id=user_id)
@@ -1,13 +1,16 @@
 import json
 from app.core.config import get_config
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, status
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Header, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import get_async_session
-from app.users.auth import oauth2_scheme, verify_token
+from app.core.db import get_async_session, get_read_async_session
+from app.users.auth import Principal, get_current_principal
 from app.schemas.webhook import WebhookCreate, WebhookRead
 from app.models.tables import Webhook
-from typing import List
+from app.dal import db_service
+from app.http_exceptions import ResourceNotExists
+from app.utils import get_not_modified_response
+from typing import List, Optional
 import httpx
 from sqlalchemy import select
 from uuid import UUID
@@ -17,7 +20,7 @@ config = get_config()
 
 router = APIRouter(prefix='/webhooks',
                    dependencies=[
-                       Depends(oauth2_scheme),
+                       Depends(get_current_principal),
                        Depends(get_async_session)
                    ],
                    tags=['Webhooks'])
@@ -45,82 +48,70 @@ async def trigger_webhook(url: str, payload: dict, retry_count: int = 3):
 async def create_webhook(
     webhook: WebhookCreate,
     background_tasks: BackgroundTasks,
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_async_session)
 ):
-    user = await verify_token(token)
-    user_id = UUID(user.get("user_id"))
-    
-    db_webhook = Webhook(
-        url=str(webhook.url),
-        events=webhook.events,
-        is_active=webhook.is_active,
-        created_by_id=user_id
-    )
-    
-    session.add(db_webhook)
-    await session.commit()
-    await session.refresh(db_webhook)
-    
-    return db_webhook
+    user_id = principal.user_id
+    return await db_service.add_webhook(session, webhook_in=webhook, created_by_id=user_id)
 
 @router.get("", response_model=List[WebhookRead])
 async def get_webhooks(
-    token: str = Depends(oauth2_scheme),
-    session: AsyncSession = Depends(get_async_session)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_async_session)
 ):
-    user = await verify_token(token)
-    user_id = UUID(user.get("user_id"))
-    
-    result = await session.execute(
-        select(Webhook).where(Webhook.created_by_id == user_id)
+    # the ETag is the version of the user's data - with a matching If-None-Match, 304 is returned
+    user_id = principal.user_id
+    not_modified = get_not_modified_response(
+        response,
+        if_none_match=if_none_match,
+        version=await db_service.get_data_version(session, user_id=user_id)
     )
-    return result.scalars().all()
+    if not_modified:
+        return not_modified
+    return await db_service.get_webhooks(session, created_by_id=user_id)
 
 @router.delete("/{webhook_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_webhook(
     webhook_id: UUID,
-    token: str = Depends(oauth2_scheme),
+    principal: Principal = Depends(get_current_principal),
     session: AsyncSession = Depends(get_async_session)
 ):
-    user = await verify_token(token)
-    user_id = UUID(user.get("user_id"))
-    
-    result = await session.execute(
-        select(Webhook).where(
-            Webhook.id == webhook_id,
-            Webhook.created_by_id == user_id
-        )
-    )
-    webhook = result.scalar_one_or_none()
-    
-    if not webhook:
+    user_id = principal.user_id
+    try:
+        await db_service.delete_webhook(session, id_to_delete=webhook_id, created_by_id=user_id)
+    except ResourceNotExists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Webhook not found"
         )
-    
-    await session.delete(webhook)
-    await session.commit()
 
-async def notify_webhooks(
+async def get_active_webhooks(
     session: AsyncSession,
-    user_id: UUID, 
-    event: str, 
-    payload: dict
-):
+    user_id: UUID,
+    event: str
+) -> List[Webhook]:
     result = await session.execute(
         select(Webhook).where(
             Webhook.created_by_id == str(user_id),
             Webhook.is_active == True,
-            Webhook.events.any(event)
+            # events @> ARRAY[event] can use the GIN index on events, unlike event = ANY(events)
+            Webhook.events.contains([event])
         )
     )
+    return result.scalars().all()
+
+async def notify_webhooks(
+    session: AsyncSession,
+    user_id: UUID, 
+    event: str, 
+    payload: dict
+):
+    webhooks = await get_active_webhooks(session, user_id, event)
     logger.info(f"notify_webhooks Webhooks: {payload}")    
-    logger.info(f"notify_webhooks Webhooks: {result}")
+    logger.info(f"notify_webhooks Webhooks: {webhooks}")
 
-    
-    webhooks = result.scalars().all()
         
     for webhook in webhooks:
         background_tasks = BackgroundTasks()
@@ -1,5 +1,8 @@
+import itertools
+import math
+import time
 from collections.abc import AsyncGenerator
-from typing import Any
+from typing import Any, Optional
 from fastapi_users.db import (
     SQLAlchemyBaseOAuthAccountTableUUID,
     SQLAlchemyBaseUserTableUUID,
@@ -9,12 +12,13 @@ from fastapi_users_db_sqlalchemy.access_token import (
     SQLAlchemyAccessTokenDatabase,
     SQLAlchemyBaseAccessTokenTableUUID,
 )
-from fastapi import Depends
+from fastapi import Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, relationship
 
 from app.core.config import get_config
+from app.core.db_pool import create_engine_from_config
 
 config = get_config()
 
@@ -34,9 +38,80 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
 class AccessToken(SQLAlchemyBaseAccessTokenTableUUID, Base):  
     pass
 
-engine:AsyncEngine = create_async_engine(str(config.POSTGRES_URI), echo=True)
+engine:AsyncEngine = create_engine_from_config(str(config.POSTGRES_URI), config)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engines: list[AsyncEngine] = [
+    create_engine_from_config(uri.strip(), config)
+    for uri in (config.POSTGRES_REPLICA_URIS or '').split(',') if uri.strip()
+]
+
+
+class ReadSessionRouter:
+    # routes the sessions of read-only endpoints to the replicas (round robin).
+    # a user that wrote in the last read_your_writes_seconds reads from the primary,
+    # since the replicas may not have its writes yet. the time of the write is carried by
+    # the client, in a cookie set on the response of the write (see ReadYourWritesMiddleware),
+    # so any worker serves the next reads from the primary. the cookie holds the user_id of
+    # the principal that wrote, and is followed only for that principal (see
+    # get_current_principal) - whatever token it authenticates with. it is not signed: a
+    # client can only send itself to the primary with it, as it could by writing
+    READ_YOUR_WRITES_COOKIE = 'read_your_writes'
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replicas: list[async_sessionmaker],
+        read_your_writes_seconds: float
+    ) -> None:
+        self._primary = primary
+        self._replicas = itertools.cycle(replicas) if replicas else None
+        self._read_your_writes_seconds = read_your_writes_seconds
+
+    @staticmethod
+    def _get_user_id(request: Request) -> Optional[str]:
+        principal = getattr(request.state, 'principal', None)
+        return str(principal.user_id) if principal is not None else None
+
+    def mark_write(self, request: Request, response: Response) -> None:
+        if self._replicas is None:
+            return
+        user_id = self._get_user_id(request)
+        if user_id is None:
+            return
+        response.set_cookie(
+            self.READ_YOUR_WRITES_COOKIE,
+            f'{user_id}:{time.time():.3f}',
+            max_age=math.ceil(self._read_your_writes_seconds),
+            httponly=True,
+            samesite='lax'
+        )
+
+    def _has_written_recently(self, request: Request) -> bool:
+        user_id = self._get_user_id(request)
+        marker = request.cookies.get(self.READ_YOUR_WRITES_COOKIE)
+        if user_id is None or not marker:
+            return False
+        written_by, _, written_at = marker.partition(':')
+        try:
+            written_ago = time.time() - float(written_at)
+        except ValueError:
+            return False
+        # the clocks of the workers may be a bit apart - a write "in the future" is recent too
+        return written_by == user_id and abs(written_ago) < self._read_your_writes_seconds
+
+    def get_session_maker(self, request: Request) -> async_sessionmaker:
+        if self._replicas is None or self._has_written_recently(request):
+            return self._primary
+        return next(self._replicas)
+
+
+read_session_router = ReadSessionRouter(
+    primary=async_session_maker,
+    replicas=[async_sessionmaker(replica_engine, expire_on_commit=False) for replica_engine in replica_engines],
+    read_your_writes_seconds=config.READ_YOUR_WRITES_SECONDS
+)
+
 
 
 # engine: AsyncEngine = create_async_engine(str(config.POSTGRES_URI), echo=True)
@@ -65,6 +140,12 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_read_async_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # a session for read-only endpoints, possibly of a replica - never write with it
+    async with read_session_router.get_session_maker(request)() as session:
+        yield session
+
+
 async def get_user_db(session: AsyncSession = Depends(get_async_session)):
     yield SQLAlchemyUserDatabase(session, User, OAuthAccount)
 
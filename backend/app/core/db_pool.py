@@ -0,0 +1,91 @@
+import time
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+
+from app.core.config import Settings
+
+
+class PoolStats:
+    # checkout counters of a pool, for sizing the pools of the workers
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_checkout(self, wait_seconds: float) -> None:
+        self.checkouts += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'avg_wait_ms': self.total_wait_seconds / self.checkouts * 1000 if self.checkouts else 0.0,
+            'max_wait_ms': self.max_wait_seconds * 1000,
+        }
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    # the default pool of async engines, measuring how long checkouts wait for a connection
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record_checkout(time.perf_counter() - started_at)
+        return connection
+
+
+def create_engine_from_config(uri: str, config: Settings) -> AsyncEngine:
+    if config.DB_PGBOUNCER_MODE:
+        return create_async_engine(
+            uri,
+            echo=config.DB_ECHO,
+            poolclass=NullPool,
+            connect_args={
+                # asyncpg's own statement cache, and SQLAlchemy's cache of the asyncpg dialect
+                'statement_cache_size': 0,
+                'prepared_statement_cache_size': 0,
+                # unnamed statements may collide between clients sharing a server connection
+                'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+            },
+        )
+    return create_async_engine(
+        uri,
+        echo=config.DB_ECHO,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=config.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=config.DB_POOL_PRE_PING,
+    )
+
+
+def get_pool_status(engine: AsyncEngine) -> dict[str, Any]:
+    pool = engine.pool
+    if not isinstance(pool, InstrumentedAsyncAdaptedQueuePool):
+        return {'pool': type(pool).__name__}
+    return {
+        'pool': type(pool).__name__,
+        'size': pool.size(),
+        'in_use': pool.checkedout(),
+        'idle': pool.checkedin(),
+        # overflow() is negative while the pool has not opened all of its pool_size connections yet
+        'overflow': max(pool.overflow(), 0),
+        **pool.stats.dict(),
+    }
@@ -1,56 +1,78 @@
-from typing import Final, Optional, AsyncGenerator
+from typing import Final
 import json
 import logging
+import time
 from pathlib import Path
 
-from sqlalchemy import select
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import create_db_and_tables, get_async_session, engine
-from app.models.tables import Priority, Category, User
-from app.schemas.category import CategoryInDB
+from app.core.db import get_async_session
+from app.models.ids import uuid7
+from app.models.tables import Priority, Category
 from app.core.config import get_config
+from app.dal import reference_data_cache, response_cache
 
 logger = logging.getLogger(__name__)
 
 INITIAL_DATA_FILE_PATH: Final[str] = Path(__file__).parent.parent / 'scripts' / 'initial_data.json'
+MIGRATIONS_DIRECTORY_PATH: Final[str] = Path(__file__).parent.parent / 'migrations'
+# the key of the advisory lock the workers seed the initial data under - any constant
+# shared by all the workers would do
+INIT_DB_LOCK_KEY: Final[int] = 0x746F646F73
+
+
+def _ms_since(started_at: float) -> float:
+    return (time.perf_counter() - started_at) * 1000
 
-async def get_priority_by_name(session: AsyncSession, name: str) -> Optional[Priority]:
-    result = await session.execute(
-        select(Priority).filter(Priority.name == name)
-    )
-    return result.scalar_one_or_none()
 
-async def get_category_by_name(session: AsyncSession, name: str) -> Optional[Category]:
+async def check_migrations(session: AsyncSession) -> None:
+    """Raise when the database is not at the head revision of the migrations."""
+    head_revisions = set(ScriptDirectory(str(MIGRATIONS_DIRECTORY_PATH)).get_heads())
+    current_revisions = set(await session.run_sync(
+        lambda sync_session: MigrationContext.configure(sync_session.connection()).get_current_heads()
+    ))
+    if current_revisions != head_revisions:
+        raise RuntimeError(
+            f"The database is at revision {', '.join(sorted(current_revisions)) or 'none'}, "
+            f"not at the head revision {', '.join(sorted(head_revisions))} - run alembic upgrade head"
+        )
+
+
+async def init_priorities(session: AsyncSession, priorities_names: list[str]) -> int:
+    """Initialize default priorities if they don't exist. Returns how many were created."""
     result = await session.execute(
-        select(Category).filter(Category.name == name)
+        insert(Priority)
+        .values([{'id': uuid7(), 'name': priority_name} for priority_name in priorities_names])
+        .on_conflict_do_nothing(index_elements=[Priority.name])
+        .returning(Priority.name)
     )
-    return result.scalar_one_or_none()
-
-
-async def init_priorities(session: AsyncSession, priorities_names: list[str]) -> None:
-    """Initialize default priorities if they don't exist."""
-    for priority_name in priorities_names:
-        existing_priority = await get_priority_by_name(session, priority_name)
-        if not existing_priority:
-            priority = Priority(name=priority_name)
-            session.add(priority)
-            logger.info(f"Created priority: {priority_name}")
-
-async def init_categories(session: AsyncSession, categories_names: list[str]) -> None:
-    """Initialize default categories if they don't exist."""
-    for category_name in categories_names:
-        existing_category = await get_category_by_name(session, category_name)
-        if not existing_category:
-            category_in = CategoryInDB(
-                name=category_name,
-                created_by_id=None  # System-created categories have no user
-            )
-            category = category_in.to_orm()
-            session.add(category)
-            logger.info(f"Created category: {category_name}")
-      
-            
+    created_names = result.scalars().all()
+    for priority_name in created_names:
+        logger.info(f"Created priority: {priority_name}")
+    return len(created_names)
+
+async def init_categories(session: AsyncSession, categories_names: list[str]) -> int:
+    """Initialize default categories if they don't exist. Returns how many were created."""
+    # system categories have no user, and the NULLs of created_by_id never conflict in
+    # unique_category - so the missing ones are selected first. the lock of init_db
+    # keeps other workers from inserting them in between
+    existing_names = set((await session.execute(
+        select(Category.name).where(Category.created_by_id.is_(None), Category.name.in_(categories_names))
+    )).scalars())
+    missing_names = [name for name in categories_names if name not in existing_names]
+    if missing_names:
+        await session.execute(
+            insert(Category)
+            .values([{'id': uuid7(), 'name': name, 'created_by_id': None} for name in missing_names])
+        )
+    for category_name in missing_names:
+        logger.info(f"Created category: {category_name}")
+    return len(missing_names)
+
 
 async def init_db() -> None:
     """Initialize database with default data."""
@@ -59,45 +81,54 @@ async def init_db() -> None:
         with open(INITIAL_DATA_FILE_PATH, 'r') as f:
             initial_data: dict[str, list[str]] = json.load(f)
 
-        logger.info("Creating initial data")
-        
         async for session in get_async_session():
-            #Init auth tables
-            await create_db_and_tables()
-            # Initialize priorities
-            await init_priorities(session, initial_data["priorities_names"])
-            
-            # Initialize categories
-            await init_categories(session, initial_data["categories_names"])
-            
+            # the tables are created by the migrations (alembic upgrade head), not here
+            if get_config().DB_CHECK_MIGRATIONS:
+                started_at = time.perf_counter()
+                await check_migrations(session)
+                logger.info(f"Migrations checked in {_ms_since(started_at):.0f}ms")
+
+            # workers booting together seed one at a time: the first inserts the missing
+            # rows, the others wait for its commit and then find nothing to insert
+            started_at = time.perf_counter()
+            await session.execute(select(func.pg_advisory_xact_lock(INIT_DB_LOCK_KEY)))
+            lock_wait_ms = _ms_since(started_at)
+            created_count = await init_priorities(session, initial_data["priorities_names"])
+            created_count += await init_categories(session, initial_data["categories_names"])
+            # releases the lock
             await session.commit()
-            
-        logger.info("Initial data created successfully")
-        
+            logger.info(
+                f"Initial data seeded in {_ms_since(started_at):.0f}ms "
+                f"({lock_wait_ms:.0f}ms waiting for the lock, {created_count} rows created)"
+            )
+
+            if created_count:
+                reference_data_cache.invalidate()
+                response_cache.invalidate_all()
+
     except Exception as e:
         logger.error(f"Error creating initial data: {e}")
         raise
 
 async def init_app() -> None:
     """Initialize the application."""
-    config = get_config()
-    
+    started_at = time.perf_counter()
     logger.info("Initializing application")
-    
+
     # Initialize database with default data
     await init_db()
-    
-    logger.info("Application initialized successfully")
+
+    logger.info(f"Application initialized successfully in {_ms_since(started_at):.0f}ms")
 
 # Script execution part
 if __name__ == "__main__":
     import asyncio
     from app.core.db import engine
-    
+
     async def init_script() -> None:
         try:
             await init_db()
         finally:
             await engine.dispose()
 
-    asyncio.run(init_script())
\ No newline at end of file
+    asyncio.run(init_script())
@@ -0,0 +1,34 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import get_config
+from app.core.db import get_async_session
+from app.dal import db_service
+
+logger = logging.getLogger(__name__)
+
+
+async def purge_sync_tombstones(retention_days: int) -> None:
+    """Delete the sync tombstones of the todos and categories deleted more than retention_days ago."""
+    deleted_before = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    logger.info(f"Purging the sync tombstones of the rows deleted before {deleted_before}")
+    async for session in get_async_session():
+        purged = await db_service.purge_sync_tombstones(session, deleted_before=deleted_before)
+        logger.info(f"{purged} sync tombstones purged successfully")
+
+
+# Script execution part - run it periodically (e.g. daily, from cron):
+#   python -m app.core.purge_sync_tombstones
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import engine
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def purge_script() -> None:
+        try:
+            await purge_sync_tombstones(get_config().SYNC_TOMBSTONES_RETENTION_DAYS)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(purge_script())
@@ -0,0 +1,38 @@
+import argparse
+import logging
+from typing import Optional
+from uuid import UUID
+
+from app.core.db import get_async_session
+from app.dal import db_service
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_todo_stats(user_id: Optional[UUID] = None) -> None:
+    """Recompute the todo stats counters from the todos, of a single user or of all of them."""
+    logger.info(f"Rebuilding the todo stats of {user_id or 'all the users'}")
+    async for session in get_async_session():
+        await db_service.rebuild_todo_stats(session, created_by_id=user_id)
+    logger.info("Todo stats rebuilt successfully")
+
+
+# Script execution part:
+#   python -m app.core.rebuild_todo_stats [--user-id <uuid>]
+if __name__ == "__main__":
+    import asyncio
+    from app.core.db import engine
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Rebuild the todo stats counters from the todos')
+    parser.add_argument('--user-id', type=UUID, default=None, help='rebuild only the stats of this user')
+    args = parser.parse_args()
+
+    async def rebuild_script() -> None:
+        try:
+            await rebuild_todo_stats(args.user_id)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(rebuild_script())
@@ -1,2 +1,6 @@
 from .db_service import db_service
 from .constants import MAX_POSTGRES_INTEGER, GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT
+from .pagination import encode_cursor, decode_cursor, get_next_cursor
+from .load_profiles import LoadProfile, BARE_ROW, TODO_LIST_VIEW, TODO_CATEGORIES_LINKS
+from .reference_cache import reference_data_cache
+from .response_cache import response_cache, ResponseCache, ResponseCacheBackend, CachedResponse
@@ -8,3 +8,15 @@ MAX_POSTGRES_INTEGER: Final[int] = (2 ** 31) - 1
 
 GET_MULTI_DEFAULT_SKIP: Final[int] = 0
 GET_MULTI_DEFAULT_LIMIT: Final[int] = 100
+
+# rows fetched from the server side cursor of a streamed query at a time
+STREAM_YIELD_PER: Final[int] = 1000
+
+# imported todos that are resolved and copied to the database together
+TODOS_IMPORT_BATCH_SIZE: Final[int] = 5000
+# the version of the imported todos until the import commits - they are given the
+# new version of the user's data then (see DBService.import_todos)
+TODOS_IMPORTING_VERSION: Final[int] = -1
+
+# the SQLSTATE of a lock that could not be taken without waiting (FOR UPDATE NOWAIT)
+LOCK_NOT_AVAILABLE_SQLSTATE: Final[str] = '55P03'
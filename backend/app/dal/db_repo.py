@@ -1,11 +1,16 @@
-from typing import Optional, Type, TypeVar, Union, Any
+from typing import AsyncIterator, Optional, Sequence, Type, TypeVar, Union, Any
+from uuid import UUID
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
+from sqlalchemy import and_, inspect, select, insert, update, delete, text, tuple_, values, column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Executable
 
 from app.models.base import Base
 from app.schemas.base import BaseInDB, BaseUpdateInDB
-from app.dal.constants import GET_MULTI_DEFAULT_SKIP
+from app.dal.constants import GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT
+from app.dal.load_profiles import LoadProfile, BARE_ROW
 
 
 ModelType = TypeVar('ModelType', bound=Base)
@@ -23,11 +28,17 @@ class DBRepo:
         session: AsyncSession,
         *,
         table_model: Type[ModelType],
-        query_filter=None  # type: ignore
+        query_filter=None,  # type: ignore
+        load_profile: LoadProfile = BARE_ROW,
+        populate_existing: bool = False
     ) -> Union[Optional[ModelType]]:
-        query = select(table_model)
+        # populate_existing - reload an object that is already in the session
+        # (e.g. after it was modified) instead of returning it as is
+        query = select(table_model).options(*load_profile)
         if query_filter is not None:
             query = query.filter(query_filter)
+        if populate_existing:
+            query = query.execution_options(populate_existing=True)
         result = await session.execute(query)
         return result.scalars().first()
 
@@ -37,28 +48,151 @@ class DBRepo:
         *,
         table_model: Type[ModelType],
         query_filter=None,
+        order_by=None,
         skip: int = GET_MULTI_DEFAULT_SKIP,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        load_profile: LoadProfile = BARE_ROW
     ) -> list[ModelType]:
-        query = select(table_model)
+        query = select(table_model).options(*load_profile)
         if query_filter is not None:
             query = query.filter(query_filter)
+        if order_by is not None:
+            query = query.order_by(*order_by)
         query = query.offset(skip)
         if limit is not None:
             query = query.limit(limit)
         result = await session.execute(query)
         return result.scalars().all()
 
+    async def get_multi_after(    # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        order_by,
+        query_filter=None,
+        after: Optional[Sequence[Any]] = None,
+        limit: int = GET_MULTI_DEFAULT_LIMIT,
+        load_profile: LoadProfile = BARE_ROW,
+        descending: bool = False
+    ) -> list[ModelType]:
+        # seek (keyset) pagination - instead of skipping rows with OFFSET, continues
+        # right after the sort key of the last row that was returned, so the cost of
+        # a page does not depend on how deep it is. order_by must be a unique key.
+        # descending - all the columns of order_by are sorted in descending order
+        query = select(table_model).options(*load_profile)
+        if query_filter is not None:
+            query = query.filter(query_filter)
+        if after is not None:
+            if descending:
+                query = query.filter(tuple_(*order_by) < tuple_(*after))
+            else:
+                query = query.filter(tuple_(*order_by) > tuple_(*after))
+        if descending:
+            query = query.order_by(*[c.desc() for c in order_by]).limit(limit)
+        else:
+            query = query.order_by(*order_by).limit(limit)
+        result = await session.execute(query)
+        return result.scalars().all()
+
+    async def get_rows(    # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        columns: Sequence[Any],
+        query_filter=None
+    ) -> list[Row]:
+        # selects only the given columns, without loading whole models and their relationships
+        query = select(*columns)
+        if query_filter is not None:
+            query = query.filter(query_filter)
+        result = await session.execute(query)
+        return result.all()
+
+    async def get_multi_from_query(
+        self,
+        session: AsyncSession,
+        *,
+        query: Executable,
+        params: dict[str, Any]
+    ) -> Sequence[Any]:
+        # runs a prebuilt statement (see app.dal.queries) with the bound parameters of the request
+        result = await session.execute(query, params)
+        return result.scalars().all()
+
+    async def get_rows_from_query(
+        self,
+        session: AsyncSession,
+        *,
+        query: Executable,
+        params: dict[str, Any]
+    ) -> list[Row]:
+        # like get_multi_from_query, for prebuilt statements of columns
+        result = await session.execute(query, params)
+        return result.all()
+
+    async def stream_rows(
+        self,
+        session: AsyncSession,
+        *,
+        query: Executable,
+        params: dict[str, Any],
+        yield_per: int
+    ) -> AsyncIterator[Row]:
+        # the rows of the query, through a server side cursor - only yield_per rows
+        # are held in memory at a time, whatever the size of the result
+        result = await session.stream(query.execution_options(yield_per=yield_per), params)
+        async for row in result:
+            yield row
+
     async def create(
         self,
         session: AsyncSession,
         *,
-        obj_to_create: InDBSchemaType
+        obj_to_create: InDBSchemaType,
+        load_profile: LoadProfile = BARE_ROW,
+        values_to_set: Optional[dict[str, Any]] = None
     ) -> ModelType:
+        # the generated columns are fetched by the INSERT itself (RETURNING),
+        # so a created row is not read back unless a load profile asks for its relationships.
+        # values_to_set - values of columns that are not in the schema (e.g. the version)
         db_obj: ModelType = obj_to_create.to_orm()
+        for key, value in (values_to_set or {}).items():
+            setattr(db_obj, key, value)
         session.add(db_obj)
         await session.commit()
-        await session.refresh(db_obj)
+        if load_profile:
+            # by the whole primary key - for partitioned tables it holds the partition key
+            mapper = inspect(type(db_obj))
+            return await self.get(  # type: ignore[return-value]
+                session,
+                table_model=type(db_obj),
+                query_filter=and_(*(
+                    key_column == value
+                    for key_column, value in zip(mapper.primary_key, mapper.primary_key_from_instance(db_obj))
+                )),
+                load_profile=load_profile,
+                populate_existing=True
+            )
+        return db_obj
+
+    async def create_unless_conflict(
+        self,
+        session: AsyncSession,
+        *,
+        obj_to_create: InDBSchemaType,
+        constraint: str,
+        values_to_set: Optional[dict[str, Any]] = None
+    ) -> Optional[ModelType]:
+        # INSERT ... ON CONFLICT ON CONSTRAINT ... DO NOTHING RETURNING - a single statement that
+        # creates the row unless it violates the unique constraint, in which case None is returned
+        table_model = obj_to_create.Config.orm_model
+        query = pg_insert(table_model).values({**dict(obj_to_create), **(values_to_set or {})}).on_conflict_do_nothing(
+            constraint=constraint
+        ).returning(table_model)
+        result = await session.execute(query)
+        db_obj = result.scalars().first()
+        await session.commit()
         return db_obj
 
     async def update(
@@ -94,3 +228,205 @@ class DBRepo:
         query = delete(table_model).where(table_model.id == id_to_delete)
         await session.execute(query)
         await session.commit()
+
+    # the *_owned methods write a single row of a user with one statement - the ownership
+    # predicate is part of the statement, and RETURNING tells whether it matched, so the row
+    # is not read before it is written. they do not commit. when no row matched, the row does
+    # not exist or belongs to another user, which the caller tells apart if it needs to
+
+    async def update_owned(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        id_to_update: UUID,
+        owner_id: UUID,
+        values_to_set: dict[str, Any],
+        returning: Optional[Sequence[Any]] = None
+    ) -> Optional[Row]:
+        query = update(table_model).where(
+            table_model.id == id_to_update,  # type: ignore[attr-defined]
+            table_model.created_by_id == owner_id  # type: ignore[attr-defined]
+        ).values(values_to_set).returning(*(returning or (table_model.id,)))  # type: ignore[attr-defined]
+        result = await session.execute(query)
+        return result.first()
+
+    async def delete_owned(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        id_to_delete: UUID,
+        owner_id: UUID,
+        returning: Optional[Sequence[Any]] = None
+    ) -> Optional[Row]:
+        query = delete(table_model).where(
+            table_model.id == id_to_delete,  # type: ignore[attr-defined]
+            table_model.created_by_id == owner_id  # type: ignore[attr-defined]
+        ).returning(*(returning or (table_model.id,)))  # type: ignore[attr-defined]
+        result = await session.execute(query)
+        return result.first()
+
+    async def lock_owned(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        id_to_lock: UUID,
+        owner_id: UUID
+    ) -> None:
+        # locks the row as a DELETE of it would (FOR UPDATE), but NOWAIT - when another transaction
+        # holds a lock on it, fails right away (LOCK_NOT_AVAILABLE_SQLSTATE) instead of waiting
+        await session.execute(
+            select(table_model.id).where(  # type: ignore[attr-defined]
+                table_model.id == id_to_lock,  # type: ignore[attr-defined]
+                table_model.created_by_id == owner_id  # type: ignore[attr-defined]
+            ).with_for_update(nowait=True)
+        )
+
+    async def copy_rows(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        columns: Sequence[str],
+        records: list[tuple[Any, ...]]
+    ) -> None:
+        # loads rows with COPY (asyncpg's copy_records_to_table), in the transaction of the session.
+        # python side column defaults are not applied - records must hold every column but
+        # those with a server default. does not commit
+        if not records:
+            return
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        asyncpg_connection = raw_connection.driver_connection
+        if not asyncpg_connection.is_in_transaction():
+            # the asyncpg dialect begins its transaction with the first statement it sends,
+            # a COPY sent to asyncpg directly would be committed on its own
+            await connection.exec_driver_sql('SELECT 1')
+        await asyncpg_connection.copy_records_to_table(
+            table_model.__tablename__,
+            records=records,
+            columns=list(columns)
+        )
+
+    async def add_to_counters(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        rows: list[dict[str, Any]],
+        counter_column: str = 'count',
+        returning: Sequence[Any] = ()
+    ) -> list[Row]:
+        # INSERT ... ON CONFLICT (primary key) DO UPDATE SET count = count + excluded.count -
+        # adds the delta of every row to its counter (creating missing counters), in one statement.
+        # rows are written in key order, so concurrent transactions lock them in the same order.
+        # returns the returning columns of the counters (e.g. their new values). does not commit
+        if not rows:
+            return []
+        primary_key = [c.key for c in table_model.__table__.primary_key]  # type: ignore[attr-defined]
+        rows = sorted(rows, key=lambda row: tuple(str(row[key]) for key in primary_key))
+        query = pg_insert(table_model).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=primary_key,
+            set_={counter_column: getattr(table_model, counter_column) + query.excluded[counter_column]}
+        )
+        if not returning:
+            await session.execute(query)
+            return []
+        result = await session.execute(query.returning(*returning))
+        return list(result.all())
+
+    async def replace_from_query(  # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        query: Executable,
+        query_filter=None
+    ) -> None:
+        # replaces the rows of the table (that match query_filter) with the rows of the query,
+        # whose columns are named as the table's. the table is locked against writes first,
+        # so writes that started earlier are either seen by the query or wait for it. does not commit
+        table = table_model.__table__  # type: ignore[attr-defined]
+        await session.execute(text(f'LOCK TABLE {table.name} IN EXCLUSIVE MODE'))
+        query_delete = delete(table_model)
+        if query_filter is not None:
+            query_delete = query_delete.where(query_filter)
+        await session.execute(query_delete)
+        columns = [c.key for c in query.selected_columns]  # type: ignore[attr-defined]
+        await session.execute(insert(table_model).from_select(columns, query))
+
+    # the *_many methods write many rows in a single statement and do not commit,
+    # so several of them can be combined into one transaction by the caller
+
+    async def create_many(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        rows: list[dict[str, Any]],
+        returning: Optional[Sequence[Any]] = None
+    ) -> list[Row]:
+        if not rows:
+            return []
+        query = insert(table_model)
+        if returning is None:
+            await session.execute(query, rows)
+            return []
+        result = await session.execute(query.returning(*returning, sort_by_parameter_order=True), rows)
+        return result.all()
+
+    async def update_many(  # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        rows: list[dict[str, Any]],
+        query_filter=None,
+        returning: Sequence[Any] = ()
+    ) -> list[Row]:
+        # UPDATE ... FROM (VALUES ...) matched by id, so every row gets its own values.
+        # returns the id (and the returning columns) of every updated row
+        if not rows:
+            return []
+        table_columns = [table_model.__table__.c[key] for key in rows[0]]  # type: ignore[attr-defined]
+        rows_values = values(
+            *[column(c.key, c.type) for c in table_columns],
+            name='rows_values'
+        ).data([tuple(row[c.key] for c in table_columns) for row in rows])
+        query = update(table_model).where(table_model.id == rows_values.c.id)  # type: ignore[attr-defined]
+        if query_filter is not None:
+            query = query.where(query_filter)
+        query = query.values(
+            {c.key: rows_values.c[c.key] for c in table_columns if c.key != 'id'}
+        ).returning(table_model.id, *returning)  # type: ignore[attr-defined]
+        result = await session.execute(query)
+        return list(result.all())
+
+    async def update_where(  # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        query_filter,
+        values_to_set: dict[str, Any]
+    ) -> None:
+        # sets the same values to all the rows that match the filter. does not commit
+        await session.execute(update(table_model).where(query_filter).values(values_to_set))
+
+    async def delete_many(  # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        table_model: Type[ModelType],
+        query_filter,
+        returning: Optional[Sequence[Any]] = None
+    ) -> list[Row]:
+        query = delete(table_model).where(query_filter)
+        if returning is None:
+            await session.execute(query)
+            return []
+        result = await session.execute(query.returning(*returning))
+        return result.all()
@@ -1,24 +1,99 @@
+import heapq
+from datetime import datetime
+from collections import Counter
 from asyncio.log import logger
+from itertools import islice
+from operator import attrgetter
 from uuid import UUID
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, Iterable, NoReturn, Optional, Union
 
-from sqlalchemy import or_, and_
-from sqlalchemy.exc import IntegrityError
+from asyncpg import PostgresError
+from sqlalchemy import and_, exists, select, ColumnElement
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dal.db_repo import DBRepo
-from app.dal.constants import GET_MULTI_DEFAULT_SKIP, GET_MULTI_DEFAULT_LIMIT
-from app.models.tables import Priority, Category, Todo, TodoCategory
-from app.schemas import CategoryInDB, TodoInDB, TodoUpdateInDB
-from app.http_exceptions import ResourceNotExists, UserNotAllowed, ResourceAlreadyExists
+from app.dal.constants import (
+    MAX_POSTGRES_INTEGER,
+    GET_MULTI_DEFAULT_SKIP,
+    GET_MULTI_DEFAULT_LIMIT,
+    STREAM_YIELD_PER,
+    TODOS_IMPORT_BATCH_SIZE,
+    TODOS_IMPORTING_VERSION,
+    LOCK_NOT_AVAILABLE_SQLSTATE
+)
+from app.dal.pagination import encode_cursor, decode_cursor
+from app.dal.reference_cache import reference_data_cache
+from app.dal.response_cache import response_cache
+from app.dal.load_profiles import TODO_LIST_VIEW
+from app.dal.queries import (
+    USER_TODOS_PAGE_QUERY,
+    USER_TODOS_PAGE_AFTER_QUERY,
+    USER_CATEGORIES_PAGE_QUERY,
+    USER_CATEGORIES_PAGE_AFTER_QUERY,
+    USER_CATEGORIES_IDS_QUERY,
+    TODO_CATEGORIES_IDS_COLUMN,
+    USER_TODOS_EXPORT_QUERY,
+    USER_CATEGORIES_BY_NAMES_QUERY,
+    USER_TODOS_SEARCH_QUERY,
+    USER_TODOS_SEARCH_AFTER_QUERY,
+    TODO_IS_COMPLETED_BEFORE_COLUMN,
+    TODO_PRIORITY_ID_BEFORE_COLUMN,
+    USER_TODO_STATS_QUERY,
+    TODO_STATS_FROM_TODOS_QUERY,
+    USER_DATA_VERSION_QUERY,
+    USER_PRUNED_VERSION_QUERY,
+    USER_TODOS_CHANGED_QUERY,
+    USER_CATEGORIES_CHANGED_QUERY,
+    USER_TOMBSTONES_QUERY
+)
+from app.models.tables import Priority, Category, Todo, TodoCategory, TodoStatsCounter, UserDataVersion, SyncTombstone, Webhook
+from app.models.ids import uuid7
+from app.schemas import CategoryInDB, TodoInDB, TodoUpdateInDB, TodoBatch, TodoBatchItemResult
+from app.schemas import TodoImportRow, TodoImportRejectedRow, TodoImportResult, TodoFilters, TodoSort
+from app.schemas import TodoStats, TodoStatsCount, SyncChanges
+from app.schemas.todo import TODOS_IMPORT_MAX_REPORTED_REJECTIONS
+from app.schemas.webhook import WebhookCreate
+from app.http_exceptions import ResourceNotExists, UserNotAllowed, ResourceAlreadyExists, ResourceInUse
 from app.websockets.manager import websocket_manager
-from app.api.v1.webhooks import notify_webhooks
+
+# sort orders of the todos lists - (sort key columns, descending). every key ends
+# with the id, so it is unique and a cursor can continue from it
+TODOS_SORTS: dict[str, tuple[tuple[Any, ...], bool]] = {
+    'id': ((Todo.id,), False),
+    '-id': ((Todo.id,), True),
+    'content': ((Todo.content, Todo.id), False),
+    '-content': ((Todo.content, Todo.id), True),
+}
+
 
 class DBService:
 
     def __init__(self) -> None:
         self._repo = DBRepo()
 
+    @staticmethod
+    def _decode_id_cursor(after: str) -> tuple[UUID]:
+        # list endpoints are ordered by id, so their cursors hold a single id
+        values = decode_cursor(after)
+        if len(values) != 1:
+            raise ValueError('cursor is not valid')
+        return (UUID(values[0]),)
+
+    async def _get_system_categories(self, session: AsyncSession) -> list[Category]:
+        # system categories (created_by_id IS NULL) are served from the reference data cache,
+        # as detached copies ordered by id - they are shared between requests
+        async def load_system_categories() -> list[Category]:
+            rows = await self._repo.get_rows(
+                session,
+                columns=(Category.id, Category.name),
+                query_filter=Category.created_by_id.is_(None)
+            )
+            categories = [Category(id=row.id, name=row.name, created_by_id=None) for row in rows]
+            return sorted(categories, key=attrgetter('id'))
+        return await reference_data_cache.get_or_load('system_categories', load_system_categories)
+
     async def _validate_todo_categories(
         self,
         session: AsyncSession,
@@ -27,21 +102,85 @@ class DBService:
         created_by_id: UUID
     ) -> bool:
         # validates that the todo categories are valid to the user + no duplications
-        default_categories_filter = Category.created_by_id.is_(None)
-        user_categories_filter = Category.created_by_id == created_by_id
-        valid_categories_filter = or_(default_categories_filter, user_categories_filter)
-        todo_categories_ids_filter = Category.id.in_(todo_categories_ids)
+        if len(set(todo_categories_ids)) != len(todo_categories_ids):
+            return False
+        system_categories_ids = {c.id for c in await self._get_system_categories(session)}
+        user_categories_ids = set(todo_categories_ids) - system_categories_ids
+        if not user_categories_ids:
+            return True
+        categories_from_db = await self._repo.get_multi_from_query(
+            session,
+            query=USER_CATEGORIES_IDS_QUERY,
+            params={'created_by_id': created_by_id, 'categories_ids': list(user_categories_ids)}
+        )
+        return len(user_categories_ids) == len(categories_from_db)
 
-        categories_from_db: list[Category] = await self._repo.get_multi(
+    async def _raise_not_owned(
+        self,
+        session: AsyncSession,
+        *,
+        table_model: type[Union[Category, Todo]],
+        id_not_owned: UUID,
+        resource: str,
+        message: str
+    ) -> NoReturn:
+        # a write with an ownership predicate matched no row - only then the row
+        # is looked up, to tell a missing row (404) from a row of another user (403)
+        if not await self._repo.get_rows(
             session,
-            table_model=Category,
-            query_filter=and_(valid_categories_filter, todo_categories_ids_filter)
+            columns=(table_model.id,),
+            query_filter=table_model.id == id_not_owned
+        ):
+            raise ResourceNotExists(resource=resource)
+        raise UserNotAllowed(message)
+
+    async def _bump_data_version(self, session: AsyncSession, *, user_id: UUID) -> int:
+        # every write to the data of a user calls it first (an import last, see import_todos), and returns
+        # the new version - the version of the todos and categories it writes (see sync). the version row
+        # stays locked until the commit, so the writes of a user commit one after the other, in the order
+        # of their versions, and the new version is visible together with the changes. the cached
+        # responses of the user are dropped too - they are of older versions, and would not be served
+        # anymore. does not commit
+        response_cache.invalidate(user_id)
+        rows = await self._repo.add_to_counters(
+            session,
+            table_model=UserDataVersion,
+            rows=[dict(user_id=user_id, version=1)],
+            counter_column='version',
+            returning=(UserDataVersion.version,)
         )
-        are_categories_valid: bool = len(todo_categories_ids) == len(categories_from_db)
-        return are_categories_valid
+        return rows[0].version
+
+    async def _add_tombstones(
+        self,
+        session: AsyncSession,
+        *,
+        kind: str,
+        rows_ids: Iterable[UUID],
+        created_by_id: UUID,
+        version: int
+    ) -> None:
+        await self._repo.create_many(
+            session,
+            table_model=SyncTombstone,
+            rows=[dict(kind=kind, row_id=row_id, created_by_id=created_by_id, version=version) for row_id in rows_ids]
+        )
+
+    async def get_data_version(self, session: AsyncSession, *, user_id: UUID) -> int:
+        # a single primary key lookup. read it before the data it versions - read committed
+        # data is then at least as new as the version
+        rows = await self._repo.get_rows_from_query(session, query=USER_DATA_VERSION_QUERY, params={'user_id': user_id})
+        return rows[0].version if rows else 0
+
+    async def _validate_priority(self, session: AsyncSession, *, priority_id: UUID) -> bool:
+        return any(priority.id == priority_id for priority in await self.get_priorities(session))
 
     async def get_priorities(self, session: AsyncSession) -> list[Priority]:
-        return await self._repo.get_multi(session, table_model=Priority)
+        # served from the reference data cache, as detached copies shared between requests
+        async def load_priorities() -> list[Priority]:
+            rows = await self._repo.get_rows(session, columns=(Priority.id, Priority.name))
+            return [Priority(id=row.id, name=row.name) for row in rows]
+        return await reference_data_cache.get_or_load('priorities', load_priorities)
 
     async def get_categories(
         self,
@@ -49,18 +188,29 @@ class DBService:
         *,
         created_by_id: UUID,
         skip: int = GET_MULTI_DEFAULT_SKIP,
-        limit: int = GET_MULTI_DEFAULT_LIMIT
+        limit: int = GET_MULTI_DEFAULT_LIMIT,
+        after: Optional[str] = None
     ) -> list[Category]:
-        default_categories_filter = Category.created_by_id.is_(None)
-        user_categories_filter = Category.created_by_id == created_by_id
-        query_filter = or_(user_categories_filter, default_categories_filter)
-        return await self._repo.get_multi(
+        # only the user's categories are queried, the (cached) system categories
+        # are merged into them by id, which is the order of the list
+        system_categories = await self._get_system_categories(session)
+        if after is not None:
+            after_id, = self._decode_id_cursor(after)
+            user_categories = await self._repo.get_multi_from_query(
+                session,
+                query=USER_CATEGORIES_PAGE_AFTER_QUERY,
+                params={'created_by_id': created_by_id, 'after_id': after_id, 'limit': limit}
+            )
+            system_categories = [c for c in system_categories if c.id > after_id]
+            categories = heapq.merge(system_categories, user_categories, key=attrgetter('id'))
+            return list(islice(categories, limit))
+        user_categories = await self._repo.get_multi_from_query(
             session,
-            table_model=Category,
-            query_filter=query_filter,
-            limit=limit,
-            skip=skip
+            query=USER_CATEGORIES_PAGE_QUERY,
+            params={'created_by_id': created_by_id, 'limit': min(skip + limit, MAX_POSTGRES_INTEGER)}
         )
+        categories = heapq.merge(system_categories, user_categories, key=attrgetter('id'))
+        return list(islice(categories, skip, skip + limit))
 
     async def add_category(
         self,
@@ -68,13 +218,26 @@ class DBService:
         *,
         category_in: CategoryInDB
     ) -> Category:
-        users_categories: list[Category] = await self.get_categories(
+        # the names of the system categories are taken too - they are checked against the cache,
+        # the user's own names by the unique constraint of the INSERT, whatever their number
+        system_categories_names = {c.name for c in await self._get_system_categories(session)}
+        if category_in.name in system_categories_names:
+            raise ResourceAlreadyExists(resource='category name')
+        version = 0
+        if category_in.created_by_id is not None:
+            version = await self._bump_data_version(session, user_id=category_in.created_by_id)
+        category = await self._repo.create_unless_conflict(
             session,
-            created_by_id=category_in.created_by_id)
-        users_categories_names: list[str] = [c.name for c in users_categories]
-        if category_in.name in users_categories_names:
+            obj_to_create=category_in,
+            constraint='unique_category',
+            values_to_set={'version': version}
+        )
+        if category is None:
             raise ResourceAlreadyExists(resource='category name')
-        return await self._repo.create(session, obj_to_create=category_in)
+        if category_in.created_by_id is None:
+            reference_data_cache.invalidate()
+            response_cache.invalidate_all()
+        return category
 
     async def delete_category(
         self,
@@ -83,16 +246,91 @@ class DBService:
         id_to_delete: UUID,
         created_by_id: UUID
     ) -> None:
-        category_to_delete: Optional[Category] = await self._repo.get(
+        version = await self._bump_data_version(session, user_id=created_by_id)
+        # the other writes of the user wait for the version row, so while it is held only an import
+        # (see import_todos) can hold a lock on the category - the links it copied lock it until its
+        # commit, and the import takes the version row then. waiting for the category here would
+        # deadlock with it, so the delete is refused instead
+        try:
+            await self._repo.lock_owned(session, table_model=Category, id_to_lock=id_to_delete, owner_id=created_by_id)
+        except DBAPIError as e:
+            if getattr(e.orig, 'sqlstate', None) != LOCK_NOT_AVAILABLE_SQLSTATE:
+                raise
+            await session.rollback()
+            raise ResourceInUse(resource='category')
+        # its todos lose it, so they are changed too. if it is not the user's, none of them is
+        await self._repo.update_where(
+            session,
+            table_model=Todo,
+            query_filter=and_(
+                Todo.created_by_id == created_by_id,
+                Todo.id.in_(
+                    select(TodoCategory.todo_id)
+                    .where(TodoCategory.created_by_id == created_by_id, TodoCategory.category_id == id_to_delete)
+                )
+            ),
+            values_to_set={'version': version}
+        )
+        if not await self._repo.delete_owned(
             session,
             table_model=Category,
-            query_filter=Category.id == id_to_delete
+            id_to_delete=id_to_delete,
+            owner_id=created_by_id
+        ):
+            # system categories are never owned by a user, so they can not be deleted either
+            await self._raise_not_owned(
+                session,
+                table_model=Category,
+                id_not_owned=id_to_delete,
+                resource='category',
+                message='a user can not delete a category that was not created by him'
+            )
+        # the links of its todos were deleted with it (ON DELETE CASCADE), and so are its counters
+        await self._repo.delete_many(
+            session,
+            table_model=TodoStatsCounter,
+            query_filter=and_(
+                TodoStatsCounter.created_by_id == created_by_id,
+                TodoStatsCounter.kind == 'category',
+                TodoStatsCounter.key_id == id_to_delete
+            )
         )
-        if not category_to_delete:
-            raise ResourceNotExists(resource='category')
-        if category_to_delete.created_by_id != created_by_id:
-            raise UserNotAllowed('a user can not delete a category that was not created by him')
-        await self._repo.delete(session, table_model=Category, id_to_delete=id_to_delete)
+        await self._add_tombstones(
+            session, kind='category', rows_ids=(id_to_delete,), created_by_id=created_by_id, version=version
+        )
+        await session.commit()
+
+    @staticmethod
+    def _get_todos_filter(created_by_id: UUID, filters: TodoFilters) -> ColumnElement[bool]:
+        conditions = [Todo.created_by_id == created_by_id]
+        if filters.is_completed is not None:
+            conditions.append(Todo.is_completed == filters.is_completed)
+        if filters.priority_id is not None:
+            conditions.append(Todo.priority_id == filters.priority_id)
+        if filters.categories_ids:
+            # EXISTS probes of the primary key of todo_category (todo_id, category_id, created_by_id)
+            if filters.category_match == 'all':
+                conditions.extend(
+                    exists().where(
+                        TodoCategory.created_by_id == Todo.created_by_id,
+                        TodoCategory.todo_id == Todo.id,
+                        TodoCategory.category_id == c_id
+                    )
+                    for c_id in set(filters.categories_ids)
+                )
+            else:
+                conditions.append(exists().where(
+                    TodoCategory.created_by_id == Todo.created_by_id,
+                    TodoCategory.todo_id == Todo.id,
+                    TodoCategory.category_id.in_(filters.categories_ids)
+                ))
+        return and_(*conditions)
+
+    @staticmethod
+    def get_todos_sort_key(sort: TodoSort) -> Callable[[Todo], tuple]:
+        # the values of a todo that a cursor of the sort order continues from
+        columns, _ = TODOS_SORTS[sort]
+        return lambda todo: tuple(getattr(todo, column.key) for column in columns)
 
     async def get_todos(
         self,
@@ -100,15 +338,295 @@ class DBService:
         *,
         created_by_id: UUID,
         skip: int = GET_MULTI_DEFAULT_SKIP,
-        limit: int = GET_MULTI_DEFAULT_LIMIT
+        limit: int = GET_MULTI_DEFAULT_LIMIT,
+        after: Optional[str] = None,
+        filters: Optional[TodoFilters] = None,
+        sort: TodoSort = 'id'
+    ) -> list[Todo]:
+        # the filters and the sort order are compiled into a single query. the common case -
+        # no filter, by id - runs the prebuilt statements
+        if (filters is not None and filters != TodoFilters()) or sort != 'id':
+            return await self._get_filtered_todos(
+                session,
+                query_filter=self._get_todos_filter(created_by_id, filters or TodoFilters()),
+                skip=skip,
+                limit=limit,
+                after=after,
+                sort=sort
+            )
+        if after is not None:
+            after_id, = self._decode_id_cursor(after)
+            return await self._repo.get_multi_from_query(
+                session,
+                query=USER_TODOS_PAGE_AFTER_QUERY,
+                params={'created_by_id': created_by_id, 'after_id': after_id, 'limit': limit}
+            )
+        return await self._repo.get_multi_from_query(
+            session,
+            query=USER_TODOS_PAGE_QUERY,
+            params={'created_by_id': created_by_id, 'skip': skip, 'limit': limit}
+        )
+
+    async def _get_filtered_todos(  # type: ignore[no-untyped-def]
+        self,
+        session: AsyncSession,
+        *,
+        query_filter,
+        skip: int,
+        limit: int,
+        after: Optional[str],
+        sort: TodoSort
     ) -> list[Todo]:
+        columns, descending = TODOS_SORTS[sort]
+        if after is not None:
+            values = decode_cursor(after)
+            if len(values) != len(columns):
+                raise ValueError('cursor is not valid')
+            # the last column of every sort order is the id
+            after_key = (*values[:-1], UUID(values[-1]))
+            return await self._repo.get_multi_after(
+                session,
+                table_model=Todo,
+                query_filter=query_filter,
+                order_by=columns,
+                descending=descending,
+                after=after_key,
+                limit=limit,
+                load_profile=TODO_LIST_VIEW
+            )
         return await self._repo.get_multi(
             session,
             table_model=Todo,
-            query_filter=Todo.created_by_id == created_by_id,
+            query_filter=query_filter,
+            order_by=[c.desc() for c in columns] if descending else columns,
             skip=skip,
-            limit=limit
+            limit=limit,
+            load_profile=TODO_LIST_VIEW
+        )
+
+    async def search_todos(
+        self,
+        session: AsyncSession,
+        *,
+        created_by_id: UUID,
+        search_query: str,
+        limit: int = GET_MULTI_DEFAULT_LIMIT,
+        after: Optional[str] = None
+    ) -> list[Row]:
+        # rows of (Todo, rank) - the todos whose content matches the query (websearch syntax),
+        # by descending rank. after is a cursor of the (rank, id) of the last row of a page
+        params = {'created_by_id': created_by_id, 'search_query': search_query, 'limit': limit}
+        if after is None:
+            return await self._repo.get_rows_from_query(session, query=USER_TODOS_SEARCH_QUERY, params=params)
+        values = decode_cursor(after)
+        if len(values) != 2:
+            raise ValueError('cursor is not valid')
+        after_rank, after_id = float(values[0]), UUID(values[1])
+        return await self._repo.get_rows_from_query(
+            session,
+            query=USER_TODOS_SEARCH_AFTER_QUERY,
+            params={**params, 'after_rank': after_rank, 'after_id': after_id}
+        )
+
+    def export_todos(self, session: AsyncSession, *, created_by_id: UUID) -> AsyncIterator[Row]:
+        # streams all the todos of the user, ordered by id (see USER_TODOS_EXPORT_QUERY)
+        return self._repo.stream_rows(
+            session,
+            query=USER_TODOS_EXPORT_QUERY,
+            params={'created_by_id': created_by_id},
+            yield_per=STREAM_YIELD_PER
+        )
+
+    async def import_todos(
+        self,
+        session: AsyncSession,
+        *,
+        rows: AsyncIterator[tuple[int, Union[TodoImportRow, str]]],
+        created_by_id: UUID
+    ) -> TodoImportResult:
+        # rows are (row number, the todo or why it could not be read) - see app.utils.decode_todos.
+        # they are resolved and copied in batches, so only a batch is held in memory at a time,
+        # and all of them are committed together. invalid rows are rejected, not failing the import.
+        # the rows of the user that other writes lock - its data version and its stats counters -
+        # are written only once the body is read, right before the commit: a slow upload does not
+        # hold up the other writes of the user. the todos are copied with TODOS_IMPORTING_VERSION
+        # until then. the categories of the copied links stay locked (FOR KEY SHARE) until the commit -
+        # they are not deleted meanwhile (see delete_category)
+        result = TodoImportResult()
+        priorities_ids = {priority.name: priority.id for priority in await self.get_priorities(session)}
+        deltas: Counter = Counter()
+        batch: list[tuple[int, TodoImportRow]] = []
+        async for row_number, row in rows:
+            if isinstance(row, str):
+                self._reject_imported_row(result, row_number=row_number, detail=row)
+                continue
+            batch.append((row_number, row))
+            if len(batch) == TODOS_IMPORT_BATCH_SIZE:
+                await self._import_todos_batch(
+                    session,
+                    batch=batch,
+                    priorities_ids=priorities_ids,
+                    created_by_id=created_by_id,
+                    deltas=deltas,
+                    result=result
+                )
+                batch = []
+        await self._import_todos_batch(
+            session,
+            batch=batch,
+            priorities_ids=priorities_ids,
+            created_by_id=created_by_id,
+            deltas=deltas,
+            result=result
         )
+        if result.imported:
+            version = await self._bump_data_version(session, user_id=created_by_id)
+            await self._repo.update_where(
+                session,
+                table_model=Todo,
+                query_filter=and_(Todo.created_by_id == created_by_id, Todo.version == TODOS_IMPORTING_VERSION),
+                values_to_set={'version': version}
+            )
+            await self._add_to_todo_stats(session, created_by_id=created_by_id, deltas=deltas)
+        await session.commit()
+        return result
+
+    @staticmethod
+    def _reject_imported_row(result: TodoImportResult, *, row_number: int, detail: str) -> None:
+        result.rejected += 1
+        if len(result.rejected_rows) < TODOS_IMPORT_MAX_REPORTED_REJECTIONS:
+            result.rejected_rows.append(TodoImportRejectedRow(row=row_number, detail=detail))
+
+    async def _import_todos_batch(
+        self,
+        session: AsyncSession,
+        *,
+        batch: list[tuple[int, TodoImportRow]],
+        priorities_ids: dict[str, UUID],
+        created_by_id: UUID,
+        deltas: Counter,
+        result: TodoImportResult
+    ) -> None:
+        # copies the valid todos of the batch, and adds them to the deltas of the stats
+        if not batch:
+            return
+        # the names of the categories are resolved with the (cached) system categories,
+        # and a single query for the user's categories of the batch
+        categories_ids = {c.name: c.id for c in await self._get_system_categories(session)}
+        names = {name for _, row in batch for name in row.categories} - categories_ids.keys()
+        if names:
+            user_categories = await self._repo.get_rows_from_query(
+                session,
+                query=USER_CATEGORIES_BY_NAMES_QUERY,
+                params={'created_by_id': created_by_id, 'names': list(names)}
+            )
+            categories_ids.update((category.name, category.id) for category in user_categories)
+
+        todos_records: list[tuple] = []
+        todos_categories_records: list[tuple] = []
+        for row_number, row in batch:
+            if row.priority not in priorities_ids:
+                self._reject_imported_row(result, row_number=row_number, detail='priority is not valid')
+                continue
+            if len(set(row.categories)) != len(row.categories) or not categories_ids.keys() >= set(row.categories):
+                self._reject_imported_row(result, row_number=row_number, detail='categories are not valid')
+                continue
+            todo_id = uuid7()
+            todos_records.append(
+                (todo_id, row.is_completed, row.content, created_by_id, priorities_ids[row.priority],
+                 TODOS_IMPORTING_VERSION)
+            )
+            todos_categories_records.extend((todo_id, categories_ids[name], created_by_id) for name in row.categories)
+            self._count_todo(
+                deltas,
+                priority_id=priorities_ids[row.priority],
+                is_completed=row.is_completed,
+                categories_ids=[categories_ids[name] for name in row.categories]
+            )
+
+        try:
+            await self._repo.copy_rows(
+                session,
+                table_model=Todo,
+                columns=('id', 'is_completed', 'content', 'created_by_id', 'priority_id', 'version'),
+                records=todos_records
+            )
+            await self._repo.copy_rows(
+                session,
+                table_model=TodoCategory,
+                columns=('todo_id', 'category_id', 'created_by_id'),
+                records=todos_categories_records
+            )
+        except PostgresError as e:
+            # the rows were validated one by one - what still fails the COPY (e.g. a category
+            # deleted meanwhile) fails the whole import, as it can not tell the row
+            logger.error(f"COPY of imported todos failed: {e}")
+            await session.rollback()
+            raise ValueError('todos could not be imported')
+        result.imported += len(todos_records)
+
+    @staticmethod
+    def _count_todo(
+        deltas: Counter,
+        *,
+        priority_id: UUID,
+        is_completed: bool,
+        categories_ids: Iterable[UUID],
+        sign: int = 1
+    ) -> None:
+        # adds (or with sign=-1, removes) a todo to the deltas of the counters it is counted in -
+        # its priority and each of its categories, split by completion (see TodoStatsCounter)
+        deltas[('priority', priority_id, is_completed)] += sign
+        for category_id in categories_ids:
+            deltas[('category', category_id, is_completed)] += sign
+
+    async def _add_to_todo_stats(self, session: AsyncSession, *, created_by_id: UUID, deltas: Counter) -> None:
+        # a single upsert, in the transaction of the write that caused the deltas
+        await self._repo.add_to_counters(
+            session,
+            table_model=TodoStatsCounter,
+            rows=[
+                dict(created_by_id=created_by_id, kind=kind, key_id=key_id, is_completed=is_completed, count=delta)
+                for (kind, key_id, is_completed), delta in deltas.items() if delta
+            ]
+        )
+
+    async def get_todo_stats(self, session: AsyncSession, *, created_by_id: UUID) -> TodoStats:
+        # reads only the counters of the user - one per priority / category and completion
+        stats = TodoStats()
+        rows = await self._repo.get_rows_from_query(
+            session,
+            query=USER_TODO_STATS_QUERY,
+            params={'created_by_id': created_by_id}
+        )
+        for row in rows:
+            by_key = stats.priorities if row.kind == 'priority' else stats.categories
+            count = by_key.setdefault(row.key_id, TodoStatsCount())
+            if row.is_completed:
+                count.completed += row.count
+            else:
+                count.open += row.count
+            if row.kind == 'priority':
+                # every todo has exactly one priority
+                stats.total.completed += row.count if row.is_completed else 0
+                stats.total.open += 0 if row.is_completed else row.count
+        return stats
+
+    async def rebuild_todo_stats(self, session: AsyncSession, *, created_by_id: Optional[UUID] = None) -> None:
+        # recomputes the counters of a user (or of all the users) from the todos
+        query = TODO_STATS_FROM_TODOS_QUERY
+        query_filter = None
+        if created_by_id is not None:
+            todo_stats = TODO_STATS_FROM_TODOS_QUERY.subquery()
+            query = select(todo_stats).where(todo_stats.c.created_by_id == created_by_id)
+            query_filter = TodoStatsCounter.created_by_id == created_by_id
+        await self._repo.replace_from_query(
+            session,
+            table_model=TodoStatsCounter,
+            query=query,
+            query_filter=query_filter
+        )
+        await session.commit()
 
     async def add_todo(
         self,
@@ -121,8 +639,25 @@ class DBService:
             todo_categories_ids=todo_in.categories_ids,
             created_by_id=todo_in.created_by_id
         ):
+            if not await self._validate_priority(session, priority_id=todo_in.priority_id):
+                raise ValueError('priority is not valid')
+            version = await self._bump_data_version(session, user_id=todo_in.created_by_id)
+            deltas: Counter = Counter()
+            self._count_todo(
+                deltas,
+                priority_id=todo_in.priority_id,
+                is_completed=False,
+                categories_ids=todo_in.categories_ids
+            )
+            await self._add_to_todo_stats(session, created_by_id=todo_in.created_by_id, deltas=deltas)
             try:
-                return await self._repo.create(session, obj_to_create=todo_in)
+                # committed together with the stats and the version
+                return await self._repo.create(
+                    session,
+                    obj_to_create=todo_in,
+                    load_profile=TODO_LIST_VIEW,
+                    values_to_set={'version': version}
+                )
             except IntegrityError:
                 raise ValueError('priority is not valid')
         raise ValueError('categories are not valid')
@@ -132,94 +667,460 @@ class DBService:
         *,
         updated_todo: TodoUpdateInDB
     ) -> Todo:
-        todo_to_update: Optional[Todo] = await self._repo.get(
-            session,
-            table_model=Todo,
-            query_filter=Todo.id == updated_todo.id
-        )
-        if not todo_to_update:
-            raise ResourceNotExists(resource='todo')
-        if not todo_to_update.created_by_id == updated_todo.created_by_id:
-            raise UserNotAllowed('a user can not update a todo that was not created by him')
-        
-        if await self._validate_todo_categories(
+        version = await self._bump_data_version(session, user_id=updated_todo.created_by_id)
+        try:
+            # the ownership is checked by the UPDATE itself, an unknown priority fails its foreign key.
+            # it also returns the current categories of the todo, to sync them by difference,
+            # and its columns before the update, for the stats
+            updated_row = await self._repo.update_owned(
+                session,
+                table_model=Todo,
+                id_to_update=updated_todo.id,
+                owner_id=updated_todo.created_by_id,
+                values_to_set={
+                    'content': updated_todo.content,
+                    'is_completed': updated_todo.is_completed,
+                    'priority_id': updated_todo.priority_id,
+                    'version': version
+                },
+                returning=(
+                    Todo.id,
+                    TODO_CATEGORIES_IDS_COLUMN,
+                    TODO_IS_COMPLETED_BEFORE_COLUMN,
+                    TODO_PRIORITY_ID_BEFORE_COLUMN
+                )
+            )
+            if not updated_row:
+                await self._raise_not_owned(
+                    session,
+                    table_model=Todo,
+                    id_not_owned=updated_todo.id,
+                    resource='todo',
+                    message='a user can not update a todo that was not created by him'
+                )
+        except IntegrityError as e:
+            logger.error(f"IntegrityError during todo update: {e}")
+            await session.rollback()
+            raise ValueError('priority is not valid')
+
+        # only the categories that are added are validated (the linked ones are valid, or their links
+        # were deleted with them) and only the links that changed are written - toggling is_completed
+        # does not touch todo_category at all
+        current_categories_ids = set(updated_row.categories_ids or ())
+        categories_ids = set(updated_todo.categories_ids)
+        added_categories_ids = categories_ids - current_categories_ids
+        removed_categories_ids = current_categories_ids - categories_ids
+        if len(categories_ids) != len(updated_todo.categories_ids) or not await self._validate_todo_categories(
             session,
-            todo_categories_ids=updated_todo.categories_ids,
+            todo_categories_ids=list(added_categories_ids),
             created_by_id=updated_todo.created_by_id
         ):
-            try:
-                # Update the existing todo's attributes
-                todo_to_update.content = updated_todo.content
-                todo_to_update.is_completed = updated_todo.is_completed
-                todo_to_update.priority_id = updated_todo.priority_id
-                
-                # Clear and recreate category relationships
-                todo_to_update.todos_categories = []
-                await session.flush()
-                
-                todo_to_update.todos_categories = [
-                    TodoCategory(category_id=c_id) 
-                    for c_id in updated_todo.categories_ids
-                ]
-                
-                # Commit the changes
-                await session.commit()
-                return todo_to_update
-                
-            except IntegrityError as e:
-                logger.error(f"IntegrityError during todo update: {e}")
-                await session.rollback()
-                raise ValueError('priority is not valid')
-        raise ValueError('categories are not valid')
-   
+            await session.rollback()
+            raise ValueError('categories are not valid')
+
+        if removed_categories_ids:
+            await self._repo.delete_many(
+                session,
+                table_model=TodoCategory,
+                query_filter=and_(
+                    TodoCategory.created_by_id == updated_todo.created_by_id,
+                    TodoCategory.todo_id == updated_todo.id,
+                    TodoCategory.category_id.in_(removed_categories_ids)
+                )
+            )
+        await self._repo.create_many(
+            session,
+            table_model=TodoCategory,
+            rows=[
+                dict(todo_id=updated_todo.id, category_id=c_id, created_by_id=updated_todo.created_by_id)
+                for c_id in added_categories_ids
+            ]
+        )
+        deltas: Counter = Counter()
+        self._count_todo(
+            deltas,
+            priority_id=updated_row.priority_id_before,
+            is_completed=updated_row.is_completed_before,
+            categories_ids=current_categories_ids,
+            sign=-1
+        )
+        self._count_todo(
+            deltas,
+            priority_id=updated_todo.priority_id,
+            is_completed=updated_todo.is_completed,
+            categories_ids=categories_ids
+        )
+        await self._add_to_todo_stats(session, created_by_id=updated_todo.created_by_id, deltas=deltas)
+        await session.commit()
+        # the priority and categories have changed, reload them for the response
+        return await self._repo.get(
+            session,
+            table_model=Todo,
+            query_filter=and_(Todo.id == updated_todo.id, Todo.created_by_id == updated_todo.created_by_id),
+            load_profile=TODO_LIST_VIEW,
+            populate_existing=True
+        )
+
     async def delete_todo(
-    self,
-    session: AsyncSession,
-    *,
-    id_to_delete: UUID,
-    created_by_id: UUID
-) -> None:
+        self,
+        session: AsyncSession,
+        *,
+        id_to_delete: UUID,
+        created_by_id: UUID
+    ) -> None:
+        # a single DELETE with the ownership predicate - its todo_category entries
+        # are deleted by ON DELETE CASCADE. it returns what the todo was counted in, for the stats
+        version = await self._bump_data_version(session, user_id=created_by_id)
+        deleted_row = await self._repo.delete_owned(
+            session,
+            table_model=Todo,
+            id_to_delete=id_to_delete,
+            owner_id=created_by_id,
+            returning=(Todo.id, Todo.is_completed, Todo.priority_id, TODO_CATEGORIES_IDS_COLUMN)
+        )
+        if not deleted_row:
+            logger.error(f"User {created_by_id} could not delete todo {id_to_delete}")
+            await self._raise_not_owned(
+                session,
+                table_model=Todo,
+                id_not_owned=id_to_delete,
+                resource='todo',
+                message='a user can not delete a todo that was not created by him'
+            )
+        deltas: Counter = Counter()
+        self._count_todo(
+            deltas,
+            priority_id=deleted_row.priority_id,
+            is_completed=deleted_row.is_completed,
+            categories_ids=deleted_row.categories_ids or (),
+            sign=-1
+        )
+        await self._add_to_todo_stats(session, created_by_id=created_by_id, deltas=deltas)
+        await self._add_tombstones(
+            session, kind='todo', rows_ids=(id_to_delete,), created_by_id=created_by_id, version=version
+        )
+        await session.commit()
+        logger.info(f"Successfully deleted todo {id_to_delete}")
+
+    async def _get_valid_batch_references(
+        self,
+        session: AsyncSession,
+        *,
+        todos: list,
+        created_by_id: UUID
+    ) -> tuple[set[UUID], set[UUID]]:
+        # validates the priorities (from the reference data cache) and categories
+        # of all the todos of a batch at once, with at most one query
+        categories_ids = {c_id for todo in todos for c_id in todo.categories_ids}
+        valid_priorities_ids = {priority.id for priority in await self.get_priorities(session)}
+        system_categories_ids = {c.id for c in await self._get_system_categories(session)}
+        valid_categories_ids = categories_ids & system_categories_ids
+        user_categories_ids = categories_ids - system_categories_ids
+        if user_categories_ids:
+            valid_categories_ids |= set(await self._repo.get_multi_from_query(
+                session,
+                query=USER_CATEGORIES_IDS_QUERY,
+                params={'created_by_id': created_by_id, 'categories_ids': list(user_categories_ids)}
+            ))
+        return valid_priorities_ids, valid_categories_ids
+
+    @staticmethod
+    def _get_todo_error(todo, valid_priorities_ids: set[UUID], valid_categories_ids: set[UUID]) -> Optional[str]:
+        # same rules as add_todo / update_todo - no duplicated, foreign or non existing categories
+        categories_ids = todo.categories_ids
+        if len(set(categories_ids)) != len(categories_ids) or not set(categories_ids) <= valid_categories_ids:
+            return 'categories are not valid'
+        if todo.priority_id not in valid_priorities_ids:
+            return 'priority is not valid'
+        return None
+
+    async def batch_todos(
+        self,
+        session: AsyncSession,
+        *,
+        batch: TodoBatch,
+        created_by_id: UUID
+    ) -> list[TodoBatchItemResult]:
+        # creates, updates and deletes many todos in a single transaction.
+        # invalid operations are reported in the results and do not fail the rest of the batch
+        version = await self._bump_data_version(session, user_id=created_by_id)
+        results: list[TodoBatchItemResult] = []
+        valid_priorities_ids, valid_categories_ids = await self._get_valid_batch_references(
+            session,
+            todos=[*batch.create, *batch.update],
+            created_by_id=created_by_id
+        )
+
+        # ownership of all the updated and deleted todos, with a single query of the user's partition.
+        # only the ids that are not the user's are looked up in all the partitions, to tell a
+        # missing todo (404) from a todo of another user (403) - as _raise_not_owned does
+        owned_ids: set[UUID] = set()
+        not_owned_ids: set[UUID] = set()
+        referenced_ids = {todo.id for todo in batch.update} | set(batch.delete)
+        if referenced_ids:
+            rows = await self._repo.get_rows(
+                session,
+                columns=(Todo.id,),
+                query_filter=and_(Todo.created_by_id == created_by_id, Todo.id.in_(referenced_ids))
+            )
+            owned_ids = {row.id for row in rows}
+        if referenced_ids - owned_ids:
+            rows = await self._repo.get_rows(
+                session,
+                columns=(Todo.id,),
+                query_filter=Todo.id.in_(referenced_ids - owned_ids)
+            )
+            not_owned_ids = {row.id for row in rows}
+
+        def get_ownership_error(todo_id: UUID, action: str) -> Optional[tuple[int, str]]:
+            if todo_id in owned_ids:
+                return None
+            if todo_id in not_owned_ids:
+                return 403, f'a user can not {action} a todo that was not created by him'
+            return 404, 'todo does not exist'
+
+        todos_rows: list[dict] = []
+        todos_categories_rows: list[dict] = []
+        categories_ids_by_todo_id: dict[UUID, list[UUID]] = {}
+        for index, todo in enumerate(batch.create):
+            error = self._get_todo_error(todo, valid_priorities_ids, valid_categories_ids)
+            if error:
+                results.append(TodoBatchItemResult(action='create', index=index, id=None, status_code=400, detail=error))
+                continue
+            todo_id = uuid7()
+            todos_rows.append(dict(
+                id=todo_id,
+                content=todo.content,
+                is_completed=False,
+                priority_id=todo.priority_id,
+                created_by_id=created_by_id,
+                version=version
+            ))
+            todos_categories_rows.extend(
+                dict(todo_id=todo_id, category_id=c_id, created_by_id=created_by_id) for c_id in todo.categories_ids
+            )
+            categories_ids_by_todo_id[todo_id] = todo.categories_ids
+            results.append(TodoBatchItemResult(action='create', index=index, id=todo_id, status_code=201))
+
+        updated_rows: list[dict] = []
+        for index, todo in enumerate(batch.update):
+            ownership_error = get_ownership_error(todo.id, 'update')
+            if ownership_error:
+                status_code, detail = ownership_error
+                results.append(TodoBatchItemResult(
+                    action='update', index=index, id=todo.id, status_code=status_code, detail=detail
+                ))
+                continue
+            if any(row['id'] == todo.id for row in updated_rows):
+                results.append(TodoBatchItemResult(
+                    action='update', index=index, id=todo.id, status_code=400, detail='todo is updated more than once'
+                ))
+                continue
+            error = self._get_todo_error(todo, valid_priorities_ids, valid_categories_ids)
+            if error:
+                results.append(TodoBatchItemResult(action='update', index=index, id=todo.id, status_code=400, detail=error))
+                continue
+            updated_rows.append(dict(
+                id=todo.id,
+                content=todo.content,
+                is_completed=todo.is_completed,
+                priority_id=todo.priority_id,
+                version=version
+            ))
+            todos_categories_rows.extend(
+                dict(todo_id=todo.id, category_id=c_id, created_by_id=created_by_id) for c_id in todo.categories_ids
+            )
+            categories_ids_by_todo_id[todo.id] = todo.categories_ids
+            results.append(TodoBatchItemResult(action='update', index=index, id=todo.id, status_code=200))
+
+        ids_to_delete: list[UUID] = []
+        for index, todo_id in enumerate(batch.delete):
+            ownership_error = get_ownership_error(todo_id, 'delete')
+            if ownership_error:
+                status_code, detail = ownership_error
+                results.append(TodoBatchItemResult(
+                    action='delete', index=index, id=todo_id, status_code=status_code, detail=detail
+                ))
+                continue
+            ids_to_delete.append(todo_id)
+            results.append(TodoBatchItemResult(action='delete', index=index, id=todo_id, status_code=204))
+
+        # the stats of the created todos, and of the updated and deleted ones as they were before
+        deltas: Counter = Counter()
+        for todo_row in todos_rows:
+            self._count_todo(
+                deltas,
+                priority_id=todo_row['priority_id'],
+                is_completed=todo_row['is_completed'],
+                categories_ids=categories_ids_by_todo_id[todo_row['id']]
+            )
         try:
-            # Get the todo with all its relationships
-            todo_to_delete: Optional[Todo] = await self._repo.get(
+            await self._repo.create_many(session, table_model=Todo, rows=todos_rows, returning=(Todo.id,))
+            updated = await self._repo.update_many(
                 session,
                 table_model=Todo,
-                query_filter=Todo.id == id_to_delete
-            )
-
-            if not todo_to_delete:
-                logger.error(f"Todo with id {id_to_delete} not found")
-                raise ResourceNotExists(resource='todo')
-
-            # Convert UUIDs to strings for comparison
-            todo_user_id = str(todo_to_delete.created_by_id)
-            request_user_id = str(created_by_id)
-            
-            logger.info(f"Todo user ID: {todo_user_id}, Request user ID: {request_user_id}")
-                
-            if todo_user_id != request_user_id:
-                logger.error(f"User {created_by_id} attempted to delete todo owned by {todo_to_delete.created_by_id}")
-                raise UserNotAllowed('a user can not delete a todo that was not created by him')
-            
-            # Delete related todo_category entries first
-            if todo_to_delete.todos_categories:
-                todo_to_delete.todos_categories = []
-                await session.flush()
-            
-            # Delete the todo
-            await self._repo.delete(session, table_model=Todo, id_to_delete=id_to_delete)
+                rows=updated_rows,
+                query_filter=Todo.created_by_id == created_by_id,
+                returning=(TODO_CATEGORIES_IDS_COLUMN, TODO_IS_COMPLETED_BEFORE_COLUMN, TODO_PRIORITY_ID_BEFORE_COLUMN)
+            )
+            updated_rows_by_id = {row['id']: row for row in updated_rows}
+            for updated_row in updated:
+                self._count_todo(
+                    deltas,
+                    priority_id=updated_row.priority_id_before,
+                    is_completed=updated_row.is_completed_before,
+                    categories_ids=updated_row.categories_ids or (),
+                    sign=-1
+                )
+                self._count_todo(
+                    deltas,
+                    priority_id=updated_rows_by_id[updated_row.id]['priority_id'],
+                    is_completed=updated_rows_by_id[updated_row.id]['is_completed'],
+                    categories_ids=categories_ids_by_todo_id[updated_row.id]
+                )
+            updated_ids = [row.id for row in updated]
+            if updated_ids:
+                # the categories of the updated todos are replaced as a whole
+                await self._repo.delete_many(
+                    session,
+                    table_model=TodoCategory,
+                    query_filter=and_(TodoCategory.created_by_id == created_by_id, TodoCategory.todo_id.in_(updated_ids))
+                )
+            await self._repo.create_many(session, table_model=TodoCategory, rows=todos_categories_rows)
+            if ids_to_delete:
+                deleted = await self._repo.delete_many(
+                    session,
+                    table_model=Todo,
+                    query_filter=and_(Todo.id.in_(ids_to_delete), Todo.created_by_id == created_by_id),
+                    returning=(Todo.id, Todo.is_completed, Todo.priority_id, TODO_CATEGORIES_IDS_COLUMN)
+                )
+                for deleted_row in deleted:
+                    self._count_todo(
+                        deltas,
+                        priority_id=deleted_row.priority_id,
+                        is_completed=deleted_row.is_completed,
+                        categories_ids=deleted_row.categories_ids or (),
+                        sign=-1
+                    )
+                await self._add_tombstones(
+                    session,
+                    kind='todo',
+                    rows_ids=[row.id for row in deleted],
+                    created_by_id=created_by_id,
+                    version=version
+                )
+            await self._add_to_todo_stats(session, created_by_id=created_by_id, deltas=deltas)
             await session.commit()
-            
-            logger.info(f"Successfully deleted todo {id_to_delete}")
-            
         except IntegrityError as e:
-            logger.error(f"Error deleting todo {id_to_delete}: {e}")
-            await session.rollback()
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error deleting todo {id_to_delete}: {e}")
+            logger.error(f"IntegrityError during todos batch: {e}")
             await session.rollback()
-            raise
+            raise ValueError('batch is not valid')
+        return results
+
+    async def get_changes(self, session: AsyncSession, *, created_by_id: UUID, since: Optional[str]) -> SyncChanges:
+        # since is the token of the previous sync - the data version of the user it was at.
+        # without it, all the todos and categories of the user are returned (a full sync), and no
+        # deleted ones - the client replaces its rows with them.
+        # the version is read first: the rows of the writes up to it are all committed (the writes
+        # of a user commit in version order), and those of the writes after it are left for the next sync
+        since_version = -1
+        if since is not None:
+            try:
+                since_version = int(decode_cursor(since)[0])
+            except ValueError:
+                raise ValueError('sync token is not valid')
+        version = await self.get_data_version(session, user_id=created_by_id)
+        token = encode_cursor(version)
+        if since_version >= version:
+            return SyncChanges(token=token)
+        params = {'created_by_id': created_by_id, 'since': since_version, 'until': version}
+        tombstones: list[Row] = []
+        if since is not None:
+            tombstones = await self._repo.get_rows_from_query(session, query=USER_TOMBSTONES_QUERY, params=params)
+            # read after the tombstones - a purge is committed together with its pruned version, so
+            # when the tombstones since the token were purged by then, it is seen here
+            pruned_versions = await self._repo.get_rows_from_query(
+                session,
+                query=USER_PRUNED_VERSION_QUERY,
+                params={'user_id': created_by_id}
+            )
+            if pruned_versions and since_version < pruned_versions[0].pruned_version:
+                tombstones = []
+                params['since'] = -1
+        return SyncChanges(
+            token=token,
+            full=params['since'] == -1,
+            todos=await self._repo.get_multi_from_query(session, query=USER_TODOS_CHANGED_QUERY, params=params),
+            categories=await self._repo.get_multi_from_query(
+                session,
+                query=USER_CATEGORIES_CHANGED_QUERY,
+                params=params
+            ),
+            deleted_todos_ids=[tombstone.row_id for tombstone in tombstones if tombstone.kind == 'todo'],
+            deleted_categories_ids=[tombstone.row_id for tombstone in tombstones if tombstone.kind == 'category']
+        )
+
+    async def purge_sync_tombstones(self, session: AsyncSession, *, deleted_before: datetime) -> int:
+        # deletes the tombstones of the rows deleted before the date, and moves the pruned version
+        # of their users past them - a sync from a token older than that is a full sync (see get_changes).
+        # the version rows are locked in the order of the users, after the writes in progress. returns
+        # the number of purged tombstones
+        purged = await self._repo.delete_many(
+            session,
+            table_model=SyncTombstone,
+            query_filter=SyncTombstone.deleted_at < deleted_before,
+            returning=(SyncTombstone.created_by_id, SyncTombstone.version)
+        )
+        pruned_versions: dict[UUID, int] = {}
+        for tombstone in purged:
+            pruned_versions[tombstone.created_by_id] = max(
+                tombstone.version,
+                pruned_versions.get(tombstone.created_by_id, 0)
+            )
+        for user_id, pruned_version in sorted(pruned_versions.items()):
+            await self._repo.update_where(
+                session,
+                table_model=UserDataVersion,
+                query_filter=and_(
+                    UserDataVersion.user_id == user_id,
+                    UserDataVersion.pruned_version < pruned_version
+                ),
+                values_to_set={'pruned_version': pruned_version}
+            )
+        await session.commit()
+        return len(purged)
+
+    async def get_webhooks(self, session: AsyncSession, *, created_by_id: UUID) -> list[Webhook]:
+        return await self._repo.get_multi(
+            session,
+            table_model=Webhook,
+            query_filter=Webhook.created_by_id == created_by_id,
+            limit=None
+        )
+
+    async def add_webhook(self, session: AsyncSession, *, webhook_in: WebhookCreate, created_by_id: UUID) -> Webhook:
+        webhook = Webhook(
+            url=str(webhook_in.url),
+            events=webhook_in.events,
+            is_active=webhook_in.is_active,
+            created_by_id=created_by_id
+        )
+        await self._bump_data_version(session, user_id=created_by_id)
+        session.add(webhook)
+        await session.commit()
+        return webhook
+
+    async def delete_webhook(self, session: AsyncSession, *, id_to_delete: UUID, created_by_id: UUID) -> None:
+        # the webhooks of other users are not found either
+        await self._bump_data_version(session, user_id=created_by_id)
+        if not await self._repo.delete_owned(
+            session,
+            table_model=Webhook,
+            id_to_delete=id_to_delete,
+            owner_id=created_by_id
+        ):
+            raise ResourceNotExists(resource='webhook')
+        await session.commit()
 
     async def notify_todo_update(
         self,
@@ -237,7 +1138,8 @@ class DBService:
             }
         )
         
-        # Notify via webhooks
+        # Notify via webhooks (imported here, the webhooks router imports the dal)
+        from app.api.v1.webhooks import notify_webhooks
         await notify_webhooks(session, user_id, event_type, todo_data)
 
 
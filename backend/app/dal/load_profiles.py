@@ -0,0 +1,27 @@
+from typing import Final
+
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from app.models.tables import Todo
+
+
+# loader profiles - the relationships a query loads together with its rows.
+# models load no relationship by default (lazy='raise'), so every DBRepo read
+# passes the profile that matches what its caller (usually a response model) uses
+
+LoadProfile = tuple[LoaderOption, ...]
+
+# only the columns of the table - PriorityRead, CategoryRead and internal checks
+BARE_ROW: Final[LoadProfile] = ()
+
+# everything TodoRead serializes - the priority (one row, joined) and the categories
+TODO_LIST_VIEW: Final[LoadProfile] = (
+    joinedload(Todo.priority),
+    selectinload(Todo.categories),
+)
+
+# the association rows of a todo, needed to replace its categories
+TODO_CATEGORIES_LINKS: Final[LoadProfile] = (
+    selectinload(Todo.todos_categories),
+)
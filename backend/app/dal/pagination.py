@@ -0,0 +1,35 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Optional, Sequence
+
+
+# cursors are opaque to clients: an url-safe base64 encoding of the
+# json list of sort key values of the last row of the previous page
+def encode_cursor(*values: Any) -> str:
+    payload = json.dumps([str(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> list[str]:
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('cursor is not valid')
+    if not isinstance(values, list) or not values or not all(isinstance(v, str) for v in values):
+        raise ValueError('cursor is not valid')
+    return values
+
+
+def get_next_cursor(
+    rows: Sequence[Any],
+    *,
+    limit: Optional[int],
+    sort_key: Callable[[Any], Sequence[Any]] = lambda row: (row.id,)
+) -> Optional[str]:
+    # a page shorter than the limit is the last one, so there is nothing to continue from.
+    # sort_key - the sort key values of a row, for pages that are not ordered by id alone
+    if not rows or limit is None or len(rows) < limit:
+        return None
+    return encode_cursor(*sort_key(rows[-1]))
@@ -0,0 +1,216 @@
+from sqlalchemy import select, bindparam, func, and_, or_, literal, union_all, BigInteger, Float, Integer
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased
+
+from app.dal.load_profiles import TODO_LIST_VIEW
+from app.models.tables import (
+    Category,
+    Priority,
+    Todo,
+    TodoCategory,
+    TodoStatsCounter,
+    UserDataVersion,
+    SyncTombstone,
+    TODO_SEARCH_CONFIG
+)
+
+
+# statements of the hot read paths of the DBService, built once at import.
+# only their bound parameters change between requests, so each request skips building
+# the statement and its cache key (which is memoized on the statement) and goes
+# straight to SQLAlchemy's compiled cache
+
+# pages of a user's todos by id - the ids are UUIDv7 (see app.models.ids), so this is the order
+# the todos were created in, except for the todos created before them (uuid4): most of those come
+# after the new ones, in random order
+USER_TODOS_PAGE_QUERY = (
+    select(Todo)
+    .options(*TODO_LIST_VIEW)
+    .where(Todo.created_by_id == bindparam('created_by_id'))
+    .order_by(Todo.id)
+    .offset(bindparam('skip', type_=Integer))
+    .limit(bindparam('limit', type_=Integer))
+)
+
+USER_TODOS_PAGE_AFTER_QUERY = (
+    select(Todo)
+    .options(*TODO_LIST_VIEW)
+    .where(Todo.created_by_id == bindparam('created_by_id'), Todo.id > bindparam('after_id'))
+    .order_by(Todo.id)
+    .limit(bindparam('limit', type_=Integer))
+)
+
+# full-text search of the user's todos, best matches first. a page continues after the
+# (rank, id) of the last todo of the previous page
+TODO_SEARCH_RANK_COLUMN = func.ts_rank(
+    Todo.search_vector,
+    func.websearch_to_tsquery(TODO_SEARCH_CONFIG, bindparam('search_query'))
+).label('rank')
+
+USER_TODOS_SEARCH_QUERY = (
+    select(Todo, TODO_SEARCH_RANK_COLUMN)
+    .options(*TODO_LIST_VIEW)
+    .where(
+        Todo.created_by_id == bindparam('created_by_id'),
+        Todo.search_vector.bool_op('@@')(func.websearch_to_tsquery(TODO_SEARCH_CONFIG, bindparam('search_query')))
+    )
+    .order_by(TODO_SEARCH_RANK_COLUMN.desc(), Todo.id)
+    .limit(bindparam('limit', type_=Integer))
+)
+
+USER_TODOS_SEARCH_AFTER_QUERY = USER_TODOS_SEARCH_QUERY.where(
+    or_(
+        TODO_SEARCH_RANK_COLUMN < bindparam('after_rank', type_=Float),
+        and_(TODO_SEARCH_RANK_COLUMN == bindparam('after_rank', type_=Float), Todo.id > bindparam('after_id'))
+    )
+)
+
+USER_CATEGORIES_PAGE_QUERY = (
+    select(Category)
+    .where(Category.created_by_id == bindparam('created_by_id'))
+    .order_by(Category.id)
+    .limit(bindparam('limit', type_=Integer))
+)
+
+USER_CATEGORIES_PAGE_AFTER_QUERY = (
+    select(Category)
+    .where(Category.created_by_id == bindparam('created_by_id'), Category.id > bindparam('after_id'))
+    .order_by(Category.id)
+    .limit(bindparam('limit', type_=Integer))
+)
+
+# the user's categories of the given names
+USER_CATEGORIES_BY_NAMES_QUERY = (
+    select(Category.id, Category.name)
+    .where(
+        Category.created_by_id == bindparam('created_by_id'),
+        Category.name.in_(bindparam('names', expanding=True))
+    )
+)
+
+# which of the given categories belong to the user
+USER_CATEGORIES_IDS_QUERY = (
+    select(Category.id)
+    .where(
+        Category.created_by_id == bindparam('created_by_id'),
+        Category.id.in_(bindparam('categories_ids', expanding=True))
+    )
+)
+
+# the ids of the categories of a todo, as an array (NULL when it has none) - a column for
+# statements on the todo table, e.g. the RETURNING of an UPDATE
+TODO_CATEGORIES_IDS_COLUMN = (
+    select(func.array_agg(TodoCategory.category_id))
+    .where(TodoCategory.created_by_id == Todo.created_by_id, TodoCategory.todo_id == Todo.id)
+    .scalar_subquery()
+    .label('categories_ids')
+)
+
+# the names of the categories of a todo, sorted
+TODO_CATEGORIES_NAMES_COLUMN = (
+    select(func.array_agg(aggregate_order_by(Category.name, Category.name)))
+    .join(TodoCategory, TodoCategory.category_id == Category.id)
+    .where(TodoCategory.created_by_id == Todo.created_by_id, TodoCategory.todo_id == Todo.id)
+    .scalar_subquery()
+    .label('categories')
+)
+
+# all the todos of a user as flat rows - the priority and categories are resolved
+# to their names by the database, so no model is loaded for the rows
+USER_TODOS_EXPORT_QUERY = (
+    select(
+        Todo.id,
+        Todo.content,
+        Todo.is_completed,
+        Priority.name.label('priority'),
+        TODO_CATEGORIES_NAMES_COLUMN
+    )
+    .join(Priority, Priority.id == Todo.priority_id)
+    .where(Todo.created_by_id == bindparam('created_by_id'))
+    .order_by(Todo.id)
+)
+
+# the columns of a todo before a statement that changes it, for its RETURNING - the
+# subqueries run on the snapshot of the statement, which does not include its own changes
+_todo_before = aliased(Todo)
+TODO_IS_COMPLETED_BEFORE_COLUMN = (
+    select(_todo_before.is_completed)
+    .where(_todo_before.created_by_id == Todo.created_by_id, _todo_before.id == Todo.id)
+    .scalar_subquery()
+    .label('is_completed_before')
+)
+TODO_PRIORITY_ID_BEFORE_COLUMN = (
+    select(_todo_before.priority_id)
+    .where(_todo_before.created_by_id == Todo.created_by_id, _todo_before.id == Todo.id)
+    .scalar_subquery()
+    .label('priority_id_before')
+)
+
+USER_TODO_STATS_QUERY = (
+    select(TodoStatsCounter.kind, TodoStatsCounter.key_id, TodoStatsCounter.is_completed, TodoStatsCounter.count)
+    .where(TodoStatsCounter.created_by_id == bindparam('created_by_id'), TodoStatsCounter.count != 0)
+)
+
+# the counters of TodoStatsCounter, computed from the todos
+TODO_STATS_FROM_TODOS_QUERY = union_all(
+    select(
+        Todo.created_by_id,
+        literal('priority').label('kind'),
+        Todo.priority_id.label('key_id'),
+        Todo.is_completed,
+        func.count().label('count')
+    ).group_by(Todo.created_by_id, Todo.priority_id, Todo.is_completed),
+    select(
+        Todo.created_by_id,
+        literal('category').label('kind'),
+        TodoCategory.category_id.label('key_id'),
+        Todo.is_completed,
+        func.count().label('count')
+    ).join(TodoCategory, and_(TodoCategory.created_by_id == Todo.created_by_id, TodoCategory.todo_id == Todo.id))
+    .group_by(Todo.created_by_id, TodoCategory.category_id, Todo.is_completed)
+)
+
+# the version of the data of a user (no row until the user's first write)
+USER_DATA_VERSION_QUERY = (
+    select(UserDataVersion.version)
+    .where(UserDataVersion.user_id == bindparam('user_id'))
+)
+
+# the version up to which the tombstones of a user were purged - for sync
+USER_PRUNED_VERSION_QUERY = (
+    select(UserDataVersion.pruned_version)
+    .where(UserDataVersion.user_id == bindparam('user_id'))
+)
+
+# the rows of a user changed by the writes of the data versions in (since, until] - for
+# sync. until is the version of the user when the sync started, so the rows of writes that
+# commit during it are left for the next sync (they get a newer version)
+USER_TODOS_CHANGED_QUERY = (
+    select(Todo)
+    .options(*TODO_LIST_VIEW)
+    .where(
+        Todo.created_by_id == bindparam('created_by_id'),
+        Todo.version > bindparam('since', type_=BigInteger),
+        Todo.version <= bindparam('until', type_=BigInteger)
+    )
+    .order_by(Todo.id)
+)
+
+USER_CATEGORIES_CHANGED_QUERY = (
+    select(Category)
+    .where(
+        Category.created_by_id == bindparam('created_by_id'),
+        Category.version > bindparam('since', type_=BigInteger),
+        Category.version <= bindparam('until', type_=BigInteger)
+    )
+    .order_by(Category.id)
+)
+
+USER_TOMBSTONES_QUERY = (
+    select(SyncTombstone.kind, SyncTombstone.row_id)
+    .where(
+        SyncTombstone.created_by_id == bindparam('created_by_id'),
+        SyncTombstone.version > bindparam('since', type_=BigInteger),
+        SyncTombstone.version <= bindparam('until', type_=BigInteger)
+    )
+)
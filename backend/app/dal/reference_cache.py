@@ -0,0 +1,56 @@
+import time
+from typing import Any, Callable, Awaitable, Optional, TypeVar
+
+from app.core.config import get_config
+
+
+config = get_config()
+
+ValueType = TypeVar('ValueType')
+
+
+# in-process cache for data that is (almost) never written, like priorities and system categories.
+# entries expire after ttl_seconds, which bounds how long other processes (that did not see
+# the write) may serve stale data. writes in this process call invalidate(), which bumps the
+# version - so a value that was being loaded while the data changed is not stored.
+class ReferenceDataCache:
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._version = 0
+        # key -> (expires at, value)
+        self._entries: dict[str, tuple[float, Any]] = {}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any, *, version: int) -> None:
+        # version is the version the value was loaded at, see get_or_load
+        if version == self._version:
+            self._entries[key] = (time.monotonic() + self._ttl_seconds, value)
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[ValueType]]) -> ValueType:
+        value = self.get(key)
+        if value is None:
+            version = self._version
+            value = await load()
+            self.set(key, value, version=version)
+        return value
+
+    def invalidate(self) -> None:
+        self._version += 1
+        self._entries.clear()
+
+
+reference_data_cache = ReferenceDataCache(ttl_seconds=config.REFERENCE_DATA_CACHE_TTL_SECONDS)
@@ -0,0 +1,181 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+from uuid import UUID
+
+from app.core.config import get_config
+
+
+config = get_config()
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    # a serialized page of a list, with the headers the endpoint set for it (e.g. X-Next-Cursor)
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(name) + len(value) for name, value in self.headers.items())
+
+
+class ResponseCacheBackend(ABC):
+    # where the cached responses are stored. entries are grouped by user, so all
+    # the entries of a user can be dropped together
+
+    @abstractmethod
+    def get(self, user_id: str, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def set(self, user_id: str, key: str, value: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    def delete_user(self, user_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class NullResponseCacheBackend(ResponseCacheBackend):
+    # stores nothing - every read is a miss
+
+    def get(self, user_id: str, key: str) -> Optional[CachedResponse]:
+        return None
+
+    def set(self, user_id: str, key: str, value: CachedResponse) -> None:
+        pass
+
+    def delete_user(self, user_id: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+class LRUResponseCacheBackend(ResponseCacheBackend):
+    # in-process, bounded by the total size of the entries - the least recently used
+    # entries are evicted to make room for a new one
+
+    def __init__(self, max_bytes: int) -> None:
+        self._max_bytes = max_bytes
+        self._size = 0
+        self.evictions = 0
+        # (user id, key) -> value, least recently used first
+        self._entries: OrderedDict[tuple[str, str], CachedResponse] = OrderedDict()
+        self._keys_by_user: dict[str, set[str]] = {}
+
+    def get(self, user_id: str, key: str) -> Optional[CachedResponse]:
+        value = self._entries.get((user_id, key))
+        if value is not None:
+            self._entries.move_to_end((user_id, key))
+        return value
+
+    def set(self, user_id: str, key: str, value: CachedResponse) -> None:
+        if value.size > self._max_bytes:
+            return
+        self._pop(user_id, key)
+        while self._entries and self._size + value.size > self._max_bytes:
+            (evicted_user_id, evicted_key), _ = next(iter(self._entries.items()))
+            self._pop(evicted_user_id, evicted_key)
+            self.evictions += 1
+        self._entries[(user_id, key)] = value
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+        self._size += value.size
+
+    def _pop(self, user_id: str, key: str) -> None:
+        value = self._entries.pop((user_id, key), None)
+        if value is None:
+            return
+        self._size -= value.size
+        user_keys = self._keys_by_user[user_id]
+        user_keys.discard(key)
+        if not user_keys:
+            del self._keys_by_user[user_id]
+
+    def delete_user(self, user_id: str) -> None:
+        for key in list(self._keys_by_user.get(user_id, ())):
+            self._pop(user_id, key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_user.clear()
+        self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'users': len(self._keys_by_user),
+            'bytes': self._size,
+            'max_bytes': self._max_bytes,
+            'evictions': self.evictions,
+        }
+
+
+# responses of the lists of a user, per (user, request). an entry is stored under the data
+# version of the user it was read at (see DBService.get_data_version), so a response is never
+# served after a write - in any process. DBService writes also drop the entries of the user,
+# which frees the memory of the entries of the older versions right away
+class ResponseCache:
+
+    def __init__(self, backend: ResponseCacheBackend) -> None:
+        self._backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _get_key(version: int, key: str) -> str:
+        return f'{version}:{key}'
+
+    def get(self, user_id: Union[UUID, str], *, version: int, key: str) -> Optional[CachedResponse]:
+        value = self._backend.get(str(user_id), self._get_key(version, key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, user_id: Union[UUID, str], *, version: int, key: str, value: CachedResponse) -> None:
+        self._backend.set(str(user_id), self._get_key(version, key), value)
+
+    def invalidate(self, user_id: Union[UUID, str]) -> None:
+        self.invalidations += 1
+        self._backend.delete_user(str(user_id))
+
+    def invalidate_all(self) -> None:
+        # for writes of data shared by all the users, like the system categories
+        self.invalidations += 1
+        self._backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            'backend': type(self._backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / requests if requests else 0.0,
+            'invalidations': self.invalidations,
+            **self._backend.stats(),
+        }
+
+
+def create_response_cache_backend(name: str, *, max_bytes: int) -> ResponseCacheBackend:
+    if name == 'memory':
+        return LRUResponseCacheBackend(max_bytes=max_bytes)
+    if name == 'none':
+        return NullResponseCacheBackend()
+    raise ValueError(f'unknown response cache backend: {name}')
+
+
+response_cache = ResponseCache(
+    create_response_cache_backend(config.RESPONSE_CACHE_BACKEND, max_bytes=config.RESPONSE_CACHE_MAX_BYTES)
+)
@@ -1,3 +1,4 @@
 from .resource_already_exists import ResourceAlreadyExists
+from .resource_in_use import ResourceInUse
 from .resource_not_exists import ResourceNotExists
 from .user_not_allowed import UserNotAllowed
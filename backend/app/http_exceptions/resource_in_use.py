@@ -0,0 +1,4 @@
+class ResourceInUse(Exception):
+    def __init__(self, *, resource: str):
+        self.msg = f'{resource} is in use, try again'
+        super().__init__(self.msg)
@@ -0,0 +1,18 @@
+from typing import Callable, Final
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.db import read_session_router
+
+SAFE_METHODS: Final[frozenset[str]] = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    # marks the users whose (non safe method) requests succeeded as writers, with a cookie
+    # on the response, so their next reads are served from the primary database
+    async def dispatch(self, request: Request, call_next: Callable):
+        response = await call_next(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            read_session_router.mark_write(request, response)
+        return response
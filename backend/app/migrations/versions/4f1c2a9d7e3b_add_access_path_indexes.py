@@ -0,0 +1,36 @@
+"""add_access_path_indexes
+
+Revision ID: 4f1c2a9d7e3b
+Revises: 533ffea5d82a
+Create Date: 2026-10-18 10:12:41.532907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2a9d7e3b'
+down_revision = '533ffea5d82a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # listing a user's todos / categories - filtered by owner and ordered (and paged) by id
+    op.create_index('ix_todo_created_by_id_id', 'todo', ['created_by_id', 'id'], unique=False)
+    op.create_index('ix_category_created_by_id_id', 'category', ['created_by_id', 'id'], unique=False)
+    # the primary key (todo_id, category_id) only serves lookups by todo,
+    # deleting a category (ON DELETE CASCADE) and Category.todos look up by category
+    op.create_index('ix_todo_category_category_id', 'todo_category', ['category_id'], unique=False)
+    # notify_webhooks - the active webhooks of a user, whose events contain the event
+    op.create_index('ix_webhooks_created_by_id', 'webhooks', ['created_by_id'], unique=False)
+    op.create_index('ix_webhooks_events', 'webhooks', ['events'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_webhooks_events', table_name='webhooks')
+    op.drop_index('ix_webhooks_created_by_id', table_name='webhooks')
+    op.drop_index('ix_todo_category_category_id', table_name='todo_category')
+    op.drop_index('ix_category_created_by_id_id', table_name='category')
+    op.drop_index('ix_todo_created_by_id_id', table_name='todo')
@@ -0,0 +1,37 @@
+"""add_todo_search_vector
+
+Revision ID: 9b2e7c4d1a6f
+Revises: 4f1c2a9d7e3b
+Create Date: 2026-10-18 14:03:17.204519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e7c4d1a6f'
+down_revision = '4f1c2a9d7e3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /todos/search - a generated (stored) tsvector of the content, searched through a GIN index.
+    # adding a stored generated column rewrites the todo table
+    op.add_column(
+        'todo',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+            nullable=True
+        )
+    )
+    op.create_index('ix_todo_search_vector', 'todo', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_todo_search_vector', table_name='todo')
+    op.drop_column('todo', 'search_vector')
@@ -0,0 +1,32 @@
+"""add_user_data_version
+
+Revision ID: a7d2e9c4b815
+Revises: e4c71b9a2f58
+Create Date: 2026-10-18 17:52:41.306127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import fastapi_users_db_sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e9c4b815'
+down_revision = 'e4c71b9a2f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the ETag of the lists of a user - a missing row is version 0
+    op.create_table(
+        'user_data_version',
+        sa.Column('user_id', fastapi_users_db_sqlalchemy.generics.GUID(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('user_data_version')
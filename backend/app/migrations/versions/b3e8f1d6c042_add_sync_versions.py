@@ -0,0 +1,54 @@
+"""add_sync_versions
+
+Revision ID: b3e8f1d6c042
+Revises: a7d2e9c4b815
+Create Date: 2026-10-18 18:41:09.527384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import fastapi_users_db_sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f1d6c042'
+down_revision = 'a7d2e9c4b815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /sync - the rows changed since a data version of the user, and the deleted ones.
+    # the existing rows get version 0, so they are only in a full sync
+    for table in ('todo', 'category'):
+        op.add_column(table, sa.Column('version', sa.BigInteger(), server_default='0', nullable=False))
+        op.add_column(
+            table,
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+        )
+    op.create_index('ix_todo_created_by_id_version', 'todo', ['created_by_id', 'version'], unique=False)
+    op.create_index('ix_category_created_by_id_version', 'category', ['created_by_id', 'version'], unique=False)
+
+    op.create_table(
+        'sync_tombstone',
+        sa.Column('kind', sa.String(length=15), nullable=False),
+        sa.Column('row_id', sa.UUID(), nullable=False),
+        sa.Column('created_by_id', fastapi_users_db_sqlalchemy.generics.GUID(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('kind', 'row_id')
+    )
+    op.create_index(
+        'ix_sync_tombstone_created_by_id_version', 'sync_tombstone', ['created_by_id', 'version'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_sync_tombstone_created_by_id_version', table_name='sync_tombstone')
+    op.drop_table('sync_tombstone')
+    op.drop_index('ix_category_created_by_id_version', table_name='category')
+    op.drop_index('ix_todo_created_by_id_version', table_name='todo')
+    for table in ('todo', 'category'):
+        op.drop_column(table, 'updated_at')
+        op.drop_column(table, 'version')
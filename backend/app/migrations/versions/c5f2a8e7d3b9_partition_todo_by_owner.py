@@ -0,0 +1,151 @@
+"""partition_todo_by_owner
+
+Revision ID: c5f2a8e7d3b9
+Revises: b3e8f1d6c042
+Create Date: 2026-10-18 20:12:47.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import fastapi_users_db_sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f2a8e7d3b9'
+down_revision = 'b3e8f1d6c042'
+branch_labels = None
+depends_on = None
+
+
+# the number of hash partitions of todo and todo_category (TODO_PARTITIONS of the models)
+PARTITIONS = 16
+
+TODO_COLUMNS = 'id, is_completed, content, created_by_id, priority_id, version, updated_at'
+
+TODO_INDEXES = (
+    'ix_todo_created_by_id_id',
+    'ix_todo_created_by_id_is_completed_id',
+    'ix_todo_created_by_id_priority_id_id',
+    'ix_todo_search_vector',
+    'ix_todo_created_by_id_version',
+)
+
+
+def _create_tables(partitioned):
+    # todo and todo_category as of b3e8f1d6c042 - partitioned by the owner of the todo or not.
+    # a partitioned table can only have unique keys that include the partition key, so the
+    # owner is part of the primary key of todo, and todo_category gets the owner of its todo
+    todo_partition_args = {'postgresql_partition_by': 'HASH (created_by_id)'} if partitioned else {}
+    op.create_table(
+        'todo',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('is_completed', sa.Boolean(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_by_id', fastapi_users_db_sqlalchemy.generics.GUID(), nullable=False),
+        sa.Column('priority_id', sa.UUID(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('english', content)", persisted=True),
+            nullable=True
+        ),
+        sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ),
+        sa.ForeignKeyConstraint(['priority_id'], ['priority.id'], ),
+        sa.PrimaryKeyConstraint('id', 'created_by_id') if partitioned else sa.PrimaryKeyConstraint('id'),
+        **todo_partition_args
+    )
+    if partitioned:
+        op.create_table(
+            'todo_category',
+            sa.Column('todo_id', sa.UUID(), nullable=False),
+            sa.Column('category_id', sa.UUID(), nullable=False),
+            sa.Column('created_by_id', fastapi_users_db_sqlalchemy.generics.GUID(), nullable=False),
+            sa.ForeignKeyConstraint(['category_id'], ['category.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(
+                ['todo_id', 'created_by_id'], ['todo.id', 'todo.created_by_id'], ondelete='CASCADE'
+            ),
+            sa.PrimaryKeyConstraint('todo_id', 'category_id', 'created_by_id'),
+            postgresql_partition_by='HASH (created_by_id)'
+        )
+        for table in ('todo', 'todo_category'):
+            for remainder in range(PARTITIONS):
+                op.execute(
+                    f'CREATE TABLE {table}_p{remainder} PARTITION OF {table} '
+                    f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+                )
+    else:
+        op.create_table(
+            'todo_category',
+            sa.Column('todo_id', sa.UUID(), nullable=False),
+            sa.Column('category_id', sa.UUID(), nullable=False),
+            sa.ForeignKeyConstraint(['category_id'], ['category.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['todo_id'], ['todo.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('todo_id', 'category_id')
+        )
+
+    # on a partitioned table, an index is created on each partition
+    op.create_index('ix_todo_created_by_id_id', 'todo', ['created_by_id', 'id'], unique=False)
+    op.create_index(
+        'ix_todo_created_by_id_is_completed_id', 'todo', ['created_by_id', 'is_completed', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_todo_created_by_id_priority_id_id', 'todo', ['created_by_id', 'priority_id', 'id'], unique=False
+    )
+    op.create_index('ix_todo_search_vector', 'todo', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_todo_created_by_id_version', 'todo', ['created_by_id', 'version'], unique=False)
+    op.create_index('ix_todo_category_category_id', 'todo_category', ['category_id'], unique=False)
+
+
+def _move_aside():
+    # keeps the current tables as *_unpartitioned until their rows are copied. their indexes
+    # are dropped and the primary keys renamed, so the new tables can take the names
+    op.rename_table('todo_category', 'todo_category_unpartitioned')
+    op.rename_table('todo', 'todo_unpartitioned')
+    op.drop_index('ix_todo_category_category_id', table_name='todo_category_unpartitioned')
+    for index in TODO_INDEXES:
+        op.drop_index(index, table_name='todo_unpartitioned')
+    op.execute('ALTER TABLE todo_unpartitioned RENAME CONSTRAINT todo_pkey TO todo_unpartitioned_pkey')
+    op.execute(
+        'ALTER TABLE todo_category_unpartitioned '
+        'RENAME CONSTRAINT todo_category_pkey TO todo_category_unpartitioned_pkey'
+    )
+
+
+def _drop_moved_aside():
+    op.drop_table('todo_category_unpartitioned')
+    op.drop_table('todo_unpartitioned')
+    op.execute('ANALYZE todo')
+    op.execute('ANALYZE todo_category')
+
+
+def upgrade():
+    # todo and todo_category hash partitioned by the owner of the todo - the queries of a
+    # user (all filtered by created_by_id) only read the partition of the user, and vacuum
+    # and reindex work a partition at a time.
+    # the rows are copied in the migration's transaction, which locks the tables until it commits
+    _move_aside()
+    _create_tables(partitioned=True)
+    op.execute(f'INSERT INTO todo ({TODO_COLUMNS}) SELECT {TODO_COLUMNS} FROM todo_unpartitioned')
+    op.execute(
+        'INSERT INTO todo_category (todo_id, category_id, created_by_id) '
+        'SELECT todo_category_unpartitioned.todo_id, todo_category_unpartitioned.category_id, '
+        'todo_unpartitioned.created_by_id '
+        'FROM todo_category_unpartitioned '
+        'JOIN todo_unpartitioned ON todo_unpartitioned.id = todo_category_unpartitioned.todo_id'
+    )
+    _drop_moved_aside()
+
+
+def downgrade():
+    # the partitions are dropped along with their partitioned tables
+    _move_aside()
+    _create_tables(partitioned=False)
+    op.execute(f'INSERT INTO todo ({TODO_COLUMNS}) SELECT {TODO_COLUMNS} FROM todo_unpartitioned')
+    op.execute(
+        'INSERT INTO todo_category (todo_id, category_id) '
+        'SELECT todo_id, category_id FROM todo_category_unpartitioned'
+    )
+    _drop_moved_aside()
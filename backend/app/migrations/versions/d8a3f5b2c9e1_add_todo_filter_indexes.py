@@ -0,0 +1,32 @@
+"""add_todo_filter_indexes
+
+Revision ID: d8a3f5b2c9e1
+Revises: 9b2e7c4d1a6f
+Create Date: 2026-10-18 15:21:44.918305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a3f5b2c9e1'
+down_revision = '9b2e7c4d1a6f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /todos filtered by completion or priority - the user's matching todos, ordered (and paged) by id.
+    # filtering by category probes the primary key of todo_category per todo
+    op.create_index(
+        'ix_todo_created_by_id_is_completed_id', 'todo', ['created_by_id', 'is_completed', 'id'], unique=False
+    )
+    op.create_index(
+        'ix_todo_created_by_id_priority_id_id', 'todo', ['created_by_id', 'priority_id', 'id'], unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_todo_created_by_id_priority_id_id', table_name='todo')
+    op.drop_index('ix_todo_created_by_id_is_completed_id', table_name='todo')
@@ -0,0 +1,46 @@
+"""add_todo_stats_counter
+
+Revision ID: e4c71b9a2f58
+Revises: d8a3f5b2c9e1
+Create Date: 2026-10-18 16:37:05.113842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import fastapi_users_db_sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4c71b9a2f58'
+down_revision = 'd8a3f5b2c9e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GET /todos/stats - counters of the todos of every user, kept up to date by the writes
+    op.create_table(
+        'todo_stats_counter',
+        sa.Column('created_by_id', fastapi_users_db_sqlalchemy.generics.GUID(), nullable=False),
+        sa.Column('kind', sa.String(length=15), nullable=False),
+        sa.Column('key_id', sa.UUID(), nullable=False),
+        sa.Column('is_completed', sa.Boolean(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('created_by_id', 'kind', 'key_id', 'is_completed')
+    )
+    # the counters of the existing todos (the same query as DBService.rebuild_todo_stats)
+    op.execute('''
+        INSERT INTO todo_stats_counter (created_by_id, kind, key_id, is_completed, count)
+        SELECT created_by_id, 'priority', priority_id, is_completed, count(*)
+        FROM todo
+        GROUP BY created_by_id, priority_id, is_completed
+        UNION ALL
+        SELECT todo.created_by_id, 'category', todo_category.category_id, todo.is_completed, count(*)
+        FROM todo JOIN todo_category ON todo_category.todo_id = todo.id
+        GROUP BY todo.created_by_id, todo_category.category_id, todo.is_completed
+    ''')
+
+
+def downgrade():
+    op.drop_table('todo_stats_counter')
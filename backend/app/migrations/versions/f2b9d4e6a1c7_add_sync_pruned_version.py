@@ -0,0 +1,29 @@
+"""add_sync_pruned_version
+
+Revision ID: f2b9d4e6a1c7
+Revises: c5f2a8e7d3b9
+Create Date: 2026-10-18 23:05:31.842617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b9d4e6a1c7'
+down_revision = 'c5f2a8e7d3b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the version up to which the sync tombstones of a user were purged (see purge_sync_tombstones).
+    # none were purged yet
+    op.add_column(
+        'user_data_version',
+        sa.Column('pruned_version', sa.BigInteger(), server_default='0', nullable=False)
+    )
+
+
+def downgrade():
+    op.drop_column('user_data_version', 'pruned_version')
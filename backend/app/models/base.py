@@ -16,7 +16,12 @@ class Base:
         return humps.depascalize(cls.__name__)
 
     def dict(self) -> dict[str, Any]:
-        return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
+        # deferred columns are included only when they were loaded
+        state = inspect(self)
+        return {
+            c.key: getattr(self, c.key) for c in state.mapper.column_attrs
+            if not (c.deferred and c.key in state.unloaded)
+        }
 
     def __repr__(self) -> str:
         columns = [f'{col}: {getattr(self, col)}' for col in self.dict()]
@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+from uuid import UUID
+
+
+# the ids of new rows are UUIDv7 (RFC 9562): 48 bits of unix time in milliseconds, then
+# 74 random bits. ids created close in time are close in the primary key index, so inserts
+# append to its right-most pages instead of touching a random page each - the index stays
+# smaller and its hot pages stay in the buffer cache. they are still UUIDs, so the uuid4 ids
+# of the rows created before them need no migration - but they do not sort after those: their
+# first byte is 0x01 until 2039 (the time), so they sort before most uuid4 ids, which
+# are spread over the whole range. in a user's pages by id, the rows created since are
+# ordered among themselves by creation, and mostly come before the older rows
+
+_lock = threading.Lock()
+_last_timestamp = 0
+_last_counter = 0
+
+# rand_a (12 bits) is a counter within the millisecond, so the ids of a process are
+# increasing - it starts from a random value in the lower half, to leave room to count
+_COUNTER_BITS = 12
+_COUNTER_MAX = (1 << _COUNTER_BITS) - 1
+
+
+def uuid7() -> UUID:
+    global _last_timestamp, _last_counter
+    with _lock:
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp > _last_timestamp:
+            counter = int.from_bytes(os.urandom(2)) >> (16 - _COUNTER_BITS + 1)
+        else:
+            # the same millisecond (or the clock went back) - count on from the last id,
+            # borrowing the next millisecond when the counter is exhausted
+            timestamp = _last_timestamp
+            counter = _last_counter + 1
+            if counter > _COUNTER_MAX:
+                timestamp += 1
+                counter = 0
+        _last_timestamp, _last_counter = timestamp, counter
+
+    rand_b = int.from_bytes(os.urandom(8)) & ((1 << 62) - 1)
+    value = (timestamp & ((1 << 48) - 1)) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return UUID(int=value)
+
+
+def get_uuid7_timestamp(value: UUID) -> float:
+    # the unix time (in seconds) a UUIDv7 was created at
+    return (value.int >> 80) / 1000
@@ -1,13 +1,29 @@
 from typing import Union
-from uuid import uuid4
 
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
 from fastapi_users_db_sqlalchemy import GUID
-from sqlalchemy.dialects.postgresql import ARRAY, UUID
-from sqlalchemy import Column, ForeignKey, Text, String, Boolean, UniqueConstraint
-from sqlalchemy.orm import relationship, Mapped
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR, UUID
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Text,
+    String,
+    Boolean,
+    UniqueConstraint,
+    Index,
+    event,
+    inspect,
+    func,
+    text
+)
+from sqlalchemy.orm import deferred, relationship, Mapped
 
 from app.models.base import Base
+from app.models.ids import uuid7
 
 
 class User(SQLAlchemyBaseUserTableUUID, Base):
@@ -16,22 +32,38 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     pass
 
 
+# the text search configuration of Todo.search_vector, queries must use the same one
+TODO_SEARCH_CONFIG = 'english'
+
+# todo and todo_category are hash partitioned by the owner of the todo (created_by_id) into
+# this many partitions, <table>_p0 ... - a user's todos are all in the same partition, so
+# the queries of a user (which always filter by created_by_id) read a single one of them
+TODO_PARTITIONS = 16
+
+
+# relationships are never loaded implicitly (lazy='raise'), every query states
+# the graph it needs with one of the loader profiles of app.dal.load_profiles
 class Priority(Base):
-    id = Column( UUID(), default=uuid4, primary_key=True)
+    id = Column( UUID(), default=uuid7, primary_key=True)
     name = Column(String(15), nullable=False, unique=True)
 
-    todos: Mapped[list["Todo"]] = relationship("Todo", back_populates="priority", lazy='selectin')
+    todos: Mapped[list["Todo"]] = relationship("Todo", back_populates="priority", lazy='raise')
 
 
 class Category(Base):
-    id = Column(UUID(), default=uuid4, primary_key=True)
+    id = Column(UUID(), default=uuid7, primary_key=True)
     name = Column(Text(), nullable=False)
     # Default categories are those where created_by_id is NULL,
     # indicating they are created by the system and are applicable to all users
     created_by_id = Column(GUID, ForeignKey('user.id'))
+    # the data version of the user (see UserDataVersion) of the write that last changed it, for sync
+    version = Column(BigInteger, nullable=False, server_default='0')
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
     __table_args__ = (
         UniqueConstraint('name', 'created_by_id', name='unique_category'),
+        Index('ix_category_created_by_id_id', 'created_by_id', 'id'),
+        Index('ix_category_created_by_id_version', 'created_by_id', 'version'),
     )
 
      # Update relationships
@@ -39,7 +71,7 @@ class Category(Base):
         'TodoCategory',
         back_populates='category',
         cascade='all, delete-orphan',
-        lazy='selectin'
+        lazy='raise'
     )
     
     todos: Mapped[list["Todo"]] = relationship(
@@ -47,75 +79,159 @@ class Category(Base):
         secondary='todo_category',
         back_populates='categories',
         viewonly=True,
-        lazy='selectin'
+        lazy='raise'
     )
 
     user: Mapped["User"] = relationship("User", backref="categories")
 
 
 class Todo(Base):
-    id = Column(UUID(), default=uuid4, primary_key=True)
+    id = Column(UUID(), default=uuid7, primary_key=True)
     is_completed = Column(Boolean(), nullable=False, default=False)
     content = Column(Text(), nullable=False)
-    created_by_id = Column(GUID, ForeignKey('user.id'), nullable=False)
+    # the partition key - part of the primary key, as every unique key of a partitioned table
+    created_by_id = Column(GUID, ForeignKey('user.id'), primary_key=True)
     priority_id = Column(UUID, ForeignKey('priority.id'), nullable=False)
+    # the data version of the user (see UserDataVersion) of the write that last changed it,
+    # its categories included, for sync
+    version = Column(BigInteger, nullable=False, server_default='0')
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    # maintained by the database, for full-text search of the content. deferred - it is only
+    # used in queries, never loaded
+    search_vector = deferred(
+        Column(TSVECTOR, Computed(f"to_tsvector('{TODO_SEARCH_CONFIG}', content)", persisted=True)),
+        raiseload=True
+    )
+
+    __table_args__ = (
+        Index('ix_todo_created_by_id_id', 'created_by_id', 'id'),
+        Index('ix_todo_created_by_id_is_completed_id', 'created_by_id', 'is_completed', 'id'),
+        Index('ix_todo_created_by_id_priority_id_id', 'created_by_id', 'priority_id', 'id'),
+        Index('ix_todo_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_todo_created_by_id_version', 'created_by_id', 'version'),
+        {'postgresql_partition_by': 'HASH (created_by_id)'},
+    )
 
      # Update relationships
-    priority: Mapped["Priority"] = relationship('Priority', back_populates='todos', lazy='selectin')
+    priority: Mapped["Priority"] = relationship('Priority', back_populates='todos', lazy='raise')
     categories: Mapped[list["Category"]] = relationship(
         'Category',
         secondary='todo_category',
         back_populates='todos',
         viewonly=True,
-        lazy='selectin'
+        lazy='raise'
     )
     todos_categories: Mapped[list["TodoCategory"]] = relationship(
         'TodoCategory',
         back_populates='todo',
         cascade='all, delete-orphan',
-        lazy='selectin'
+        lazy='raise'
     )
     user: Mapped["User"] = relationship("User", backref="todos")
 
     def dict(self) -> dict:
         todo_dict: dict[str, Union[str, str, bool]] = super().dict()
-        todo_dict['todos_categories'] = self.todos_categories
+        if 'todos_categories' not in inspect(self).unloaded:
+            todo_dict['todos_categories'] = self.todos_categories
         return todo_dict
 
 
 class TodoCategory(Base):
-    todo_id = Column(
-        UUID,
-        ForeignKey('todo.id', ondelete='CASCADE'),
-        primary_key=True
-    )
+    todo_id = Column(UUID, primary_key=True)
     category_id = Column(
         UUID,
         ForeignKey('category.id', ondelete='CASCADE'),
         primary_key=True
     )
+    # the owner of the todo - the partition key, in the same partition as the todo
+    created_by_id = Column(GUID, primary_key=True)
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['todo_id', 'created_by_id'],
+            ['todo.id', 'todo.created_by_id'],
+            ondelete='CASCADE'
+        ),
+        Index('ix_todo_category_category_id', 'category_id'),
+        {'postgresql_partition_by': 'HASH (created_by_id)'},
+    )
 
     # Update relationships
     todo: Mapped["Todo"] = relationship(
         'Todo',
         back_populates='todos_categories',
-        lazy='selectin'
+        lazy='raise'
     )
     category: Mapped["Category"] = relationship(
         'Category',
         back_populates='todos_categories',
-        lazy='selectin'
+        lazy='raise'
+    )
+
+
+def _create_todo_partitions(table, connection, **kw):  # type: ignore[no-untyped-def]
+    # the partitions of a table created by metadata.create_all (the migrations create their own)
+    if connection.dialect.name != 'postgresql':
+        return
+    for remainder in range(TODO_PARTITIONS):
+        connection.execute(text(
+            f'CREATE TABLE {table.name}_p{remainder} PARTITION OF {table.name} '
+            f'FOR VALUES WITH (MODULUS {TODO_PARTITIONS}, REMAINDER {remainder})'
+        ))
+
+
+for _partitioned_table in (Todo.__table__, TodoCategory.__table__):
+    event.listen(_partitioned_table, 'after_create', _create_todo_partitions)
+
+
+class TodoStatsCounter(Base):
+    # the number of todos of a user per priority and per category, split by completion -
+    # kind is 'priority' or 'category', and key_id the id of the priority / category.
+    # maintained by the DBService writes with delta upserts, in their own transactions
+    created_by_id = Column(GUID, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    kind = Column(String(15), primary_key=True)
+    key_id = Column(UUID, primary_key=True)
+    is_completed = Column(Boolean, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+
+class UserDataVersion(Base):
+    # a version of the data of a user (todos, categories, webhooks), bumped by every
+    # DBService write in its own transaction - the ETag of the user's lists
+    user_id = Column(GUID, ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    # the tombstones of the writes up to this version were purged (see SyncTombstone), so a sync
+    # from an older token can not tell the deleted rows, and is a full sync instead
+    pruned_version = Column(BigInteger, nullable=False, server_default='0')
+
+
+class SyncTombstone(Base):
+    # a deleted todo or category of a user (kind is 'todo' or 'category'), at the data
+    # version of the write that deleted it - so sync can tell clients to delete it too
+    kind = Column(String(15), primary_key=True)
+    row_id = Column(UUID, primary_key=True)
+    created_by_id = Column(GUID, ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    version = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_sync_tombstone_created_by_id_version', 'created_by_id', 'version'),
     )
 
 
 class Webhook(Base):
     __tablename__ = "webhooks"
 
-    id = Column(UUID(), primary_key=True, default=uuid4)
+    id = Column(UUID(), primary_key=True, default=uuid7)
     url = Column(String, nullable=False)
     events = Column(ARRAY(String), nullable=False)
     is_active = Column(Boolean, default=True)
     created_by_id = Column(GUID, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (
+        Index('ix_webhooks_created_by_id', 'created_by_id'),
+        Index('ix_webhooks_events', 'events', postgresql_using='gin'),
+    )
+
     user: Mapped["User"] = relationship("User", backref="webhooks")
 
@@ -7,5 +7,8 @@ from .base import BaseInDB
 from .user import UserRead, UserCreate, UserUpdate
 from .priority import PriorityRead
 from .category import CategoryRead, CategoryCreate, CategoryInDB
-from .todo import TodoRead, TodoCreate, TodoInDB, TodoUpdate, TodoUpdateInDB
+from .todo import TodoRead, TodoCreate, TodoInDB, TodoUpdate, TodoUpdateInDB, TodoBatch, TodoBatchUpdate, TodoBatchItemResult, TodoFileFormat
+from .todo import TodoImportRow, TodoImportRejectedRow, TodoImportResult, TodoFilters, TodoSort
+from .todo import TodoStats, TodoStatsCount
 from .webhook import WebhookCreate, WebhookRead
+from .sync import SyncChanges
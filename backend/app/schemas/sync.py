@@ -0,0 +1,19 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from app.schemas.category import CategoryRead
+from app.schemas.todo import TodoRead
+
+
+class SyncChanges(BaseModel):
+    # the todos and categories of the user that were created or changed since the sync token,
+    # and the ids of those that were deleted. token is where the next sync continues from.
+    # full is set when they are all the todos and categories of the user instead (no token, or
+    # a token older than the kept deleted ids) - the client replaces its rows with them
+    token: str
+    full: bool = False
+    todos: list[TodoRead] = []
+    categories: list[CategoryRead] = []
+    deleted_todos_ids: list[UUID] = []
+    deleted_categories_ids: list[UUID] = []
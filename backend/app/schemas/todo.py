@@ -1,6 +1,7 @@
+from typing import Final, Literal, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, conlist
 
 from app.schemas.base import BaseInDB, BaseUpdateInDB
 from app.schemas.priority import PriorityRead
@@ -49,3 +50,86 @@ class TodoUpdate(TodoCreate):
 
 class TodoUpdateInDB(BaseUpdateInDB, TodoInDB):
     is_completed: bool
+
+
+# maximum number of operations (of each kind) in a single batch request
+TODOS_BATCH_MAX_SIZE: Final[int] = 500
+
+
+class TodoBatchUpdate(TodoUpdate):
+    id: UUID
+
+
+class TodoBatch(BaseModel):
+    create: conlist(TodoCreate, max_length=TODOS_BATCH_MAX_SIZE) = []  # type: ignore[valid-type]
+    update: conlist(TodoBatchUpdate, max_length=TODOS_BATCH_MAX_SIZE) = []  # type: ignore[valid-type]
+    delete: conlist(UUID, max_length=TODOS_BATCH_MAX_SIZE) = []  # type: ignore[valid-type]
+
+
+# sort orders of GET /todos - by a column, descending when prefixed with '-'.
+# ties are broken by id, in the same direction
+TodoSort = Literal['id', '-id', 'content', '-content']
+
+# maximum number of categories a list of todos can be filtered by
+TODOS_FILTER_MAX_CATEGORIES: Final[int] = 20
+
+
+class TodoFilters(BaseModel):
+    # filters of GET /todos, None (or no categories) does not filter.
+    # category_match - whether a todo must be in any of categories_ids, or in all of them
+    is_completed: Optional[bool] = None
+    priority_id: Optional[UUID] = None
+    categories_ids: list[UUID] = []
+    category_match: Literal['any', 'all'] = 'any'
+
+
+# maximum length of the query of GET /todos/search
+TODO_SEARCH_QUERY_MAX_LENGTH: Final[int] = 256
+
+# formats of the files of GET /todos/export and POST /todos/import
+TodoFileFormat = Literal['ndjson', 'csv']
+
+# rejected rows of an import that are reported one by one, the rest are only counted
+TODOS_IMPORT_MAX_REPORTED_REJECTIONS: Final[int] = 1000
+
+
+class TodoImportRow(BaseModel):
+    # a todo of an imported file - its priority and categories are given by name
+    content: str
+    is_completed: bool = False
+    priority: str
+    categories: list[str] = []
+
+
+class TodoImportRejectedRow(BaseModel):
+    # row is the number of the todo in the file, starting at 1 (a csv header is not counted)
+    row: int
+    detail: str
+
+
+class TodoImportResult(BaseModel):
+    imported: int = 0
+    rejected: int = 0
+    rejected_rows: list[TodoImportRejectedRow] = []
+
+
+class TodoBatchItemResult(BaseModel):
+    # the result of a single operation of a batch request.
+    # index is the position of the operation in its list in the request
+    action: Literal['create', 'update', 'delete']
+    index: int
+    id: Optional[UUID]
+    status_code: int
+    detail: Optional[str] = None
+
+
+class TodoStatsCount(BaseModel):
+    open: int = 0
+    completed: int = 0
+
+
+class TodoStats(BaseModel):
+    # the number of todos of the user, in total, per priority id and per category id
+    total: TodoStatsCount = TodoStatsCount()
+    priorities: dict[UUID, TodoStatsCount] = {}
+    categories: dict[UUID, TodoStatsCount] = {}
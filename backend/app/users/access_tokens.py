@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Depends
+from fastapi_users.authentication.strategy.db import AccessTokenDatabase
+from fastapi_users_db_sqlalchemy.access_token import SQLAlchemyAccessTokenDatabase
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import get_config
+from app.core.db import AccessToken, get_access_token_db
+from app.users.token_cache import VerifiedTokenCache
+
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+# notified with the digest of a revoked access token (never the token itself)
+ACCESS_TOKEN_REVOKED_CHANNEL = 'access_token_revoked'
+
+
+# the database access tokens (see auth_db_backend) found by this worker process, so a request
+# does not look its token up in the accesstoken table. an entry lives for at most
+# ACCESS_TOKEN_CACHE_TTL_SECONDS; a revoked token is also dropped right away from the caches
+# of all the workers, by access_token_revocation_listener (a token read by a worker while it
+# is being revoked may still be cached by it until its entry expires)
+access_token_cache = VerifiedTokenCache(max_entries=config.ACCESS_TOKEN_CACHE_MAX_ENTRIES)
+
+
+class CachedAccessTokenDatabase(AccessTokenDatabase[AccessToken]):
+    # the access tokens of a SQLAlchemyAccessTokenDatabase, read through access_token_cache.
+    # the cached tokens are detached copies - only their columns are read (DatabaseStrategy
+    # reads the user_id), and they are written through the database by their token
+
+    def __init__(self, database: SQLAlchemyAccessTokenDatabase, cache: VerifiedTokenCache) -> None:
+        self._database = database
+        self._cache = cache
+
+    def _cache_token(self, access_token: AccessToken) -> None:
+        snapshot = AccessToken(
+            token=access_token.token,
+            user_id=access_token.user_id,
+            created_at=access_token.created_at
+        )
+        expires_at = time.time() + config.ACCESS_TOKEN_CACHE_TTL_SECONDS
+        self._cache.set(access_token.token, snapshot, expires_at=expires_at)
+
+    async def get_by_token(self, token: str, max_age: Optional[datetime] = None) -> Optional[AccessToken]:
+        access_token = self._cache.get(token)
+        if access_token is None:
+            # tokens that are not found are not cached - they may be created by another worker
+            access_token = await self._database.get_by_token(token)
+            if access_token is None:
+                return None
+            self._cache_token(access_token)
+        if max_age is not None and access_token.created_at < max_age:
+            return None
+        return access_token
+
+    async def create(self, create_dict: dict[str, Any]) -> AccessToken:
+        access_token = await self._database.create(create_dict)
+        self._cache_token(access_token)
+        return access_token
+
+    async def update(self, access_token: AccessToken, update_dict: dict[str, Any]) -> AccessToken:
+        self._cache.delete(access_token.token)
+        persistent_access_token = await self._database.get_by_token(access_token.token)
+        if persistent_access_token is None:
+            raise ValueError('access token does not exist')
+        return await self._database.update(persistent_access_token, update_dict)
+
+    async def delete(self, access_token: AccessToken) -> None:
+        # the notification is sent when the transaction of the delete commits - every
+        # worker (this one included) then drops the token from its cache
+        session = self._database.session
+        await session.execute(delete(AccessToken).where(AccessToken.token == access_token.token))
+        await session.execute(select(func.pg_notify(
+            ACCESS_TOKEN_REVOKED_CHANNEL,
+            VerifiedTokenCache.get_digest(access_token.token).hex()
+        )))
+        await session.commit()
+        self._cache.delete(access_token.token)
+
+
+async def get_cached_access_token_db(
+    access_token_db: SQLAlchemyAccessTokenDatabase = Depends(get_access_token_db),
+) -> CachedAccessTokenDatabase:
+    return CachedAccessTokenDatabase(access_token_db, cache=access_token_cache)
+
+
+class AccessTokenRevocationListener:
+    # drops the access tokens revoked by any worker process from the cache of this one -
+    # LISTENs on a connection of its own, held from start to stop (opened by an engine
+    # without a pool, so it is not taken out of the pool of the requests).
+    # notifications need a session level connection, so they are not available through
+    # PgBouncer in transaction pooling mode, and are lost while the connection is down -
+    # the cache is then cleared, and the connection is opened again, retrying with a
+    # growing delay (is_listening is false until it is back)
+    RECONNECT_MIN_DELAY_SECONDS = 1.0
+    RECONNECT_MAX_DELAY_SECONDS = 60.0
+
+    def __init__(self, cache: VerifiedTokenCache, channel: str) -> None:
+        self._cache = cache
+        self._channel = channel
+        self._engine: Optional[AsyncEngine] = None
+        self._connection: Optional[AsyncConnection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_listening(self) -> bool:
+        return self._connection is not None
+
+    async def start(self, uri: str) -> None:
+        if config.DB_PGBOUNCER_MODE:
+            logger.warning(
+                f"Access token revocations are not listened to through PgBouncer - revoked tokens "
+                f"are dropped from the cache after {config.ACCESS_TOKEN_CACHE_TTL_SECONDS}s"
+            )
+            return
+        self._engine = create_async_engine(uri, echo=config.DB_ECHO, poolclass=NullPool)
+        await self._listen()
+
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            driver_connection = (await connection.get_raw_connection()).driver_connection
+            await driver_connection.remove_listener(self._channel, self._on_notification)
+            driver_connection.remove_termination_listener(self._on_termination)
+            await connection.close()
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+    async def _listen(self) -> None:
+        connection = await self._engine.connect()
+        try:
+            driver_connection = (await connection.get_raw_connection()).driver_connection
+            await driver_connection.add_listener(self._channel, self._on_notification)
+            driver_connection.add_termination_listener(self._on_termination)
+        except BaseException:
+            await connection.invalidate()
+            raise
+        self._connection = connection
+
+    async def _reconnect(self, terminated_connection: Optional[AsyncConnection]) -> None:
+        if terminated_connection is not None:
+            # its driver connection is closed already - it is only discarded
+            await terminated_connection.invalidate()
+        delay = self.RECONNECT_MIN_DELAY_SECONDS
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._listen()
+            except Exception as e:
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY_SECONDS)
+                logger.warning(f"Could not listen to access token revocations, retrying in {delay}s: {e}")
+                continue
+            # the tokens revoked while the connection was down were not heard of
+            self._cache.clear()
+            self._reconnect_task = None
+            logger.info('Listening to access token revocations again')
+            return
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        self._cache.delete_digest(bytes.fromhex(payload))
+
+    def _on_termination(self, connection: Any) -> None:
+        logger.warning('The connection listening to access token revocations was closed, reconnecting')
+        terminated_connection, self._connection = self._connection, None
+        self._cache.clear()
+        if self._reconnect_task is None:
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect(terminated_connection))
+
+
+access_token_revocation_listener = AccessTokenRevocationListener(
+    access_token_cache,
+    channel=ACCESS_TOKEN_REVOKED_CHANNEL
+)
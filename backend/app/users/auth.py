@@ -5,9 +5,12 @@ from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends
 from app.users.security import get_database_strategy, get_jwt_strategy
+from app.users.token_cache import verified_token_cache
 from app.core.config import get_config
 from fastapi.security import HTTPBearer
+from dataclasses import dataclass
 from typing import Optional
+from uuid import UUID
 from fastapi import Request
 
 
@@ -63,50 +66,80 @@ auth_db_backend = AuthenticationBackend(
     get_strategy=get_database_strategy,
 )
 
-async def verify_token(token: str):
+@dataclass(frozen=True, slots=True)
+class Principal:
+    # the authenticated user of a request (see get_current_principal)
+    user_id: UUID
+    email: Optional[str]
+
+
+def _decode_token(token: str) -> dict:
+    # the claims of a token, decoded and verified with a single decode
     try:
-        strategy = get_jwt_strategy()
-        # Test raw decode
-        decoded = strategy.decode_jwt_token(token)
-        # Test full validation
-        validated = await strategy.read_token(token)
-        return {
-            "token_type": "Bearer",
-            "valid": True,
-            "decoded": decoded,
-            "validated": validated,
-            "audiences": decoded.get("aud", []),
-            "user_id": decoded.get("user_id"),
-            "email": decoded.get("email")
-        }
+        return get_jwt_strategy().decode_jwt_token(token)
     except Exception as e:
         raise HTTPException(
             status_code=401,
             detail=f"Token validation failed: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+def _verify_principal(token: str) -> Principal:
+    # the principal of a token, verified and then cached until the token expires
+    decoded = _decode_token(token)
+    try:
+        principal = Principal(user_id=UUID(decoded.get("user_id")), email=decoded.get("email"))
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=401,
+            detail="Token validation failed: no user in token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    verified_token_cache.set(token, principal, expires_at=decoded.get("exp"))
+    return principal
+
+
+async def get_current_principal(request: Request, token: str = Depends(oauth2_scheme)) -> Principal:
+    """The user of the request, from its access token."""
+    # FastAPI resolves a dependency once per request, however many times it is declared (e.g.
+    # by a router and its endpoint). a token is verified once - until it expires, its principal
+    # is read from verified_token_cache. the principal is kept in the request state as well,
+    # for the routing of its reads (see ReadSessionRouter)
+    principal = verified_token_cache.get(token)
+    if principal is None:
+        principal = _verify_principal(token)
+    request.state.principal = principal
+    return principal
+
+
+async def verify_token(token: str):
+    # the claims of a token, for the endpoints that return them (the API endpoints use
+    # get_current_principal)
+    decoded = _decode_token(token)
+    return {
+        "token_type": "Bearer",
+        "valid": True,
+        "decoded": decoded,
+        # Test full validation - of the decoded claims, without decoding the token again
+        "validated": get_jwt_strategy().validate_claims(decoded),
+        "audiences": decoded.get("aud", []),
+        "user_id": decoded.get("user_id"),
+        "email": decoded.get("email")
+    }
     
 
 
 async def validate_token(token: str = Depends(oauth2_scheme)) -> dict:
     """Validate token and return decoded data"""
-    try:
-        strategy = get_jwt_strategy()
-        decoded = strategy.decode_jwt_token(token)
-        validated = await strategy.read_token(token)
-        if not validated:
-            raise HTTPException(
-                status_code=401,
-                detail="Token validation failed",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return decoded
-    except Exception as e:
+    verified = await verify_token(token)
+    if not verified["validated"]:
         raise HTTPException(
             status_code=401,
-            detail=f"Token validation failed: {str(e)}",
+            detail="Token validation failed",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return verified["decoded"]
     
 async def create_access_token(user: User):
     strategy = get_jwt_strategy()
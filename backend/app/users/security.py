@@ -1,6 +1,8 @@
+from functools import lru_cache
 from typing import Optional, Final, Union, Any
 
-from app.core.db import AccessToken, get_access_token_db
+from app.core.db import AccessToken
+from app.users.access_tokens import get_cached_access_token_db
 from fastapi_users.authentication import JWTStrategy
 from fastapi_users.jwt import SecretType, generate_jwt
 from fastapi_users.authentication.strategy.db import AccessTokenDatabase, DatabaseStrategy
@@ -101,13 +103,17 @@ class TodosJWTStrategy(JWTStrategy):
             print(f"JWT decode error: {e}")
             raise
 
+    @staticmethod
+    def validate_claims(data: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """Return the decoded claims when they are valid, None otherwise."""
+        if isinstance(data.get("aud"), list):  # Handle list audience
+            return data
+        return None
+
     async def read_token(self, token: str, user_manager=None) -> Optional[dict[str, Any]]:
         """Override read_token to handle custom audience"""
         try:
-            data = self.decode_jwt_token(token)
-            if isinstance(data.get("aud"), list):  # Handle list audience
-                return data
-            return None
+            return self.validate_claims(self.decode_jwt_token(token))
         except Exception as e:
             print(f"Token validation error: {e}")  # Add debug print
             return None
@@ -151,7 +157,9 @@ class TodosDBStrategy(DatabaseStrategy):
     
     
 
+@lru_cache()
 def get_jwt_strategy() -> JWTStrategy:
+    # built once - the strategy holds no per-request state
     return TodosJWTStrategy(
         secret=config.JWT_SECRET_KEY,
         algorithm=config.JWT_ALGORITHM,
@@ -162,8 +170,9 @@ def get_jwt_strategy() -> JWTStrategy:
 
 
 def get_database_strategy(
-    access_token_db: AccessTokenDatabase[AccessToken] = Depends(get_access_token_db),
+    access_token_db: AccessTokenDatabase[AccessToken] = Depends(get_cached_access_token_db),
 ) -> DatabaseStrategy:
+    # the tokens are read through the access tokens cache, and revoked in every worker
     return DatabaseStrategy(access_token_db,                             
                             lifetime_seconds=3600)
 
@@ -0,0 +1,79 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from app.core.config import get_config
+
+
+config = get_config()
+
+
+# tokens verified once, not on every request they come with - the principals (see
+# app.users.auth.Principal) of the verified access JWTs, and the database access tokens
+# (see app.users.access_tokens). keyed by a digest of the token (the tokens themselves are
+# not kept), bounded by the number of entries - the least recently used are evicted - and
+# an entry expires at the given time (the exp of a JWT). only verified tokens are stored,
+# so an invalid token is verified (and rejected) every time
+class VerifiedTokenCache:
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        # token digest -> (expires at, value), least recently used first
+        self._entries: OrderedDict[bytes, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Any]:
+        key = self.get_digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, token: str, value: Any, *, expires_at: Optional[float]) -> None:
+        # tokens without an expiry are not cached - they would never leave the cache on their own
+        if expires_at is None or self._max_entries <= 0:
+            return
+        key = self.get_digest(token)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, token: str) -> None:
+        self.delete_digest(self.get_digest(token))
+
+    def delete_digest(self, digest: bytes) -> None:
+        self._entries.pop(digest, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self._max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / requests if requests else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+verified_token_cache = VerifiedTokenCache(max_entries=config.VERIFIED_TOKEN_CACHE_MAX_ENTRIES)
@@ -1,3 +1,6 @@
 from .emails import send_reset_password_email, send_account_verification_email
 from .exceptions import exception_handler
 from.open_api import get_open_api_response, get_open_api_unauthorized_access_response
+from .todo_files import encode_todos, decode_todos, TODO_FILE_MEDIA_TYPES
+from .etags import get_not_modified_response, get_version_etag
+from .cached_responses import get_cached_response, cache_response
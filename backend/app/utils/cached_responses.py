@@ -0,0 +1,57 @@
+from typing import Optional, Union
+from urllib.parse import urlencode
+from uuid import UUID
+
+from fastapi import Request, Response
+
+from app.dal import response_cache, CachedResponse
+
+
+# headers set from the data version of every request (see get_not_modified_response),
+# not cached with the response
+_VERSION_HEADERS = frozenset(('etag', 'cache-control'))
+
+
+def get_response_cache_key(request: Request) -> str:
+    # the path and the query parameters, in a canonical order
+    return f'{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}'
+
+
+def _to_response(response: Response, cached: CachedResponse) -> Response:
+    # a returned response is sent as is - the headers the endpoint set on its response
+    # parameter are copied to it
+    return Response(
+        content=cached.body,
+        media_type='application/json',
+        headers={**response.headers, **cached.headers}
+    )
+
+
+def get_cached_response(
+    request: Request,
+    response: Response,
+    *,
+    user_id: Union[UUID, str],
+    version: int
+) -> Optional[Response]:
+    cached = response_cache.get(user_id, version=version, key=get_response_cache_key(request))
+    if cached is None:
+        return None
+    return _to_response(response, cached)
+
+
+def cache_response(
+    request: Request,
+    response: Response,
+    *,
+    user_id: Union[UUID, str],
+    version: int,
+    body: bytes
+) -> Response:
+    # body is the serialized response of the endpoint, for the data of the given version
+    cached = CachedResponse(
+        body=body,
+        headers={name: value for name, value in response.headers.items() if name not in _VERSION_HEADERS}
+    )
+    response_cache.set(user_id, version=version, key=get_response_cache_key(request), value=cached)
+    return _to_response(response, cached)
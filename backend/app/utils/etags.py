@@ -0,0 +1,28 @@
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def get_version_etag(version: int) -> str:
+    # weak - the version tells the data changed, not that the bytes of the response are the same
+    return f'W/"{version}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison of an If-None-Match list of etags (or *)
+    if if_none_match.strip() == '*':
+        return True
+    opaque_tag = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque_tag for tag in if_none_match.split(','))
+
+
+def get_not_modified_response(response: Response, *, if_none_match: Optional[str], version: int) -> Optional[Response]:
+    # sets the ETag of a list to the version of the user's data, and returns a 304 response
+    # when the client already has it - then the list is neither queried nor serialized.
+    # the responses are per user, and must be revalidated before they are reused
+    etag = get_version_etag(version)
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -3,7 +3,7 @@ from functools import wraps
 
 from fastapi import status, HTTPException
 
-from app.http_exceptions import ResourceNotExists, UserNotAllowed, ResourceAlreadyExists
+from app.http_exceptions import ResourceNotExists, UserNotAllowed, ResourceAlreadyExists, ResourceInUse
 
 
 def exception_handler(f: Callable) -> Any:
@@ -12,6 +12,7 @@ def exception_handler(f: Callable) -> Any:
         UserNotAllowed: status.HTTP_403_FORBIDDEN,
         ResourceNotExists: status.HTTP_404_NOT_FOUND,
         ResourceAlreadyExists: status.HTTP_409_CONFLICT,
+        ResourceInUse: status.HTTP_409_CONFLICT,
     }
 
     exceptions: tuple[Type[Exception], ...] = tuple(exception_map.keys())
@@ -21,7 +22,9 @@ def exception_handler(f: Callable) -> Any:
         try:
             return await f(*args, **kwargs)
         except exceptions as err:
-            exception_cls = type(err)
-            status_code = exception_map[exception_cls]
+            # subclasses too (e.g. a UnicodeDecodeError is a ValueError)
+            status_code = next(
+                status_code for exception_cls, status_code in exception_map.items() if isinstance(err, exception_cls)
+            )
             raise HTTPException(status_code=status_code, detail=str(err))
     return decorated
@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Final, Union
+
+from pydantic import ValidationError
+
+from app.schemas import TodoFileFormat, TodoImportRow
+
+
+# the columns of an exported todos file. priority and categories are names, not ids
+TODO_FILE_FIELDS: Final[tuple[str, ...]] = ('id', 'content', 'is_completed', 'priority', 'categories')
+# separates the categories names in the single categories column of a csv file
+CSV_CATEGORIES_SEPARATOR: Final[str] = ';'
+# rows encoded into a single chunk of the response body
+ROWS_PER_CHUNK: Final[int] = 500
+# the longest line (or csv record) of an imported file - a longer one makes the file not valid.
+# not above the field size limit of the csv module (csv.field_size_limit(), 128KiB)
+TODOS_IMPORT_MAX_LINE_BYTES: Final[int] = 128 * 1024
+# a character postgres text can not hold
+NUL: Final[str] = '\x00'
+
+TODO_FILE_MEDIA_TYPES: Final[dict[str, str]] = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _to_ndjson_line(row: Any) -> str:
+    return json.dumps({
+        'id': str(row.id),
+        'content': row.content,
+        'is_completed': row.is_completed,
+        'priority': row.priority,
+        'categories': row.categories or [],
+    }) + '\n'
+
+
+def _to_csv_row(row: Any) -> tuple[Any, ...]:
+    return (
+        row.id,
+        row.content,
+        str(row.is_completed).lower(),
+        row.priority,
+        CSV_CATEGORIES_SEPARATOR.join(row.categories or ()),
+    )
+
+
+async def encode_todos(rows: AsyncIterator[Any], file_format: TodoFileFormat) -> AsyncIterator[str]:
+    # encodes streamed export rows (see USER_TODOS_EXPORT_QUERY) into chunks of the file,
+    # so only a single chunk is held in memory at a time
+    buffer = io.StringIO()
+    csv_writer = csv.writer(buffer, lineterminator='\n')
+    if file_format == 'csv':
+        csv_writer.writerow(TODO_FILE_FIELDS)
+
+    rows_in_buffer = 0
+    async for row in rows:
+        if file_format == 'csv':
+            csv_writer.writerow(_to_csv_row(row))
+        else:
+            buffer.write(_to_ndjson_line(row))
+        rows_in_buffer += 1
+        if rows_in_buffer == ROWS_PER_CHUNK:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows_in_buffer = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _decode_line(line: bytes) -> str:
+    if len(line) > TODOS_IMPORT_MAX_LINE_BYTES:
+        raise ValueError('file is not valid')
+    try:
+        return line.decode('utf-8').rstrip('\r')
+    except UnicodeDecodeError:
+        raise ValueError('file is not valid')
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # the lines of a streamed utf-8 body, without holding more than a line of it (of at most
+    # TODOS_IMPORT_MAX_LINE_BYTES). the body is split on the newline byte - it is never a part
+    # of a multi-byte utf-8 character - and only the chunk that arrived is scanned for it
+    pending = bytearray()
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b'\n')
+        for line in lines:
+            pending += line
+            yield _decode_line(pending)
+            pending.clear()
+        pending += rest
+        if len(pending) > TODOS_IMPORT_MAX_LINE_BYTES:
+            raise ValueError('file is not valid')
+    if pending:
+        yield _decode_line(pending)
+
+
+def _read_csv_record(record: str) -> list[str]:
+    try:
+        return next(csv.reader([record]))
+    except csv.Error:
+        raise ValueError('file is not valid')
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[list[str]]:
+    # a quoted value may span lines - a record ends on a line where the quotes are balanced
+    record_lines: list[str] = []
+    record_length = 0
+    quotes = 0
+    async for line in lines:
+        record_lines.append(line)
+        # with the newline the lines are joined by
+        record_length += len(line) + 1
+        if record_length > TODOS_IMPORT_MAX_LINE_BYTES:
+            raise ValueError('file is not valid')
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        record = '\n'.join(record_lines)
+        record_lines, record_length, quotes = [], 0, 0
+        if record:
+            yield _read_csv_record(record)
+    if record_lines:
+        yield _read_csv_record('\n'.join(record_lines))
+
+
+def _to_import_row(data: Any) -> Union[TodoImportRow, str]:
+    try:
+        row = TodoImportRow.model_validate(data)
+    except ValidationError as e:
+        error = e.errors()[0]
+        return f"{'.'.join(str(loc) for loc in error['loc']) or 'row'}: {error['msg']}"
+    # valid json / csv, but not storable - the COPY of the import would fail on it
+    if NUL in row.content:
+        return 'content is not valid'
+    if any(NUL in name for name in row.categories):
+        return 'categories are not valid'
+    return row
+
+
+async def decode_todos(
+    chunks: AsyncIterator[bytes],
+    file_format: TodoFileFormat
+) -> AsyncIterator[tuple[int, Union[TodoImportRow, str]]]:
+    # reads the todos of a streamed file, in the format of encode_todos (ids are ignored).
+    # yields (row number, the todo or why it is not valid). raises ValueError when the
+    # file can not be read at all
+    lines = _iter_lines(chunks)
+    if file_format == 'ndjson':
+        row_number = 0
+        async for line in lines:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                yield row_number, 'row is not valid json'
+                continue
+            yield row_number, _to_import_row(data)
+        return
+
+    records = _iter_csv_records(lines)
+    header = await anext(records, None)
+    if header is None or not {'content', 'priority'} <= set(header):
+        raise ValueError('file is not valid')
+    row_number = 0
+    async for record in records:
+        if not any(record):
+            continue
+        row_number += 1
+        if len(record) != len(header):
+            yield row_number, 'row is not valid csv'
+            continue
+        data: dict[str, Any] = {field: value for field, value in zip(header, record) if value != ''}
+        data['categories'] = [name for name in data.get('categories', '').split(CSV_CATEGORIES_SEPARATOR) if name]
+        yield row_number, _to_import_row(data)
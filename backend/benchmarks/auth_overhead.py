@@ -0,0 +1,84 @@
+"""Measures the CPU cost of authenticating a request, without and with the verified tokens cache.
+
+Compares verifying a token the way verify_token did on every request - building
+a TodosJWTStrategy and decoding and verifying the token twice (decode_jwt_token,
+then read_token) - with get_current_principal, the dependency of the API
+endpoints, which verifies a token once and then reads its principal from
+app.users.token_cache.verified_token_cache until it expires. The requests cycle
+through --users tokens, as concurrent clients do. The database is not involved:
+the difference is pure CPU time per request, reported also as the share of one
+core it costs at the given rate.
+
+Run from the backend directory:
+
+    uv run python -m benchmarks.auth_overhead --requests 20000 --rps 5000
+"""
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from starlette.requests import Request
+
+from app.core.config import get_config
+from app.models.ids import uuid7
+from app.models.tables import User
+from app.users.auth import get_current_principal
+from app.users.security import TodosJWTStrategy, get_jwt_strategy
+from app.users.token_cache import verified_token_cache
+
+
+async def verify_token_uncached(token: str) -> Any:
+    # verify_token before the verified tokens cache
+    config = get_config()
+    strategy = TodosJWTStrategy(
+        secret=config.JWT_SECRET_KEY,
+        algorithm=config.JWT_ALGORITHM,
+        lifetime_seconds=config.JWT_LIFETIME_SECONDS,
+        token_audience=['fastapi-users:auth', 'fastapi-users:verify']
+    )
+    decoded = strategy.decode_jwt_token(token)
+    validated = await strategy.read_token(token)
+    return decoded, validated
+
+
+async def measure(verify: Callable[[str], Awaitable[Any]], tokens: list[str], requests: int) -> float:
+    # seconds per request
+    started_at = time.perf_counter()
+    for request in range(requests):
+        await verify(tokens[request % len(tokens)])
+    return (time.perf_counter() - started_at) / requests
+
+
+async def run(args: argparse.Namespace) -> None:
+    strategy = get_jwt_strategy()
+    tokens = [
+        await strategy.write_token(User(id=uuid7(), email=f'bench-{i}@bench.local', is_superuser=False))
+        for i in range(args.users)
+    ]
+
+    # warm up
+    await measure(verify_token_uncached, tokens, 100)
+    verified_token_cache.clear()
+
+    uncached = await measure(verify_token_uncached, tokens, args.requests)
+    request = Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []})
+    cached = await measure(lambda token: get_current_principal(request, token), tokens, args.requests)
+    saved = uncached - cached
+    print(f'{"uncached µs":>12} {"cached µs":>10} {"saved µs":>9} {"CPU saved at " + str(args.rps) + " rps":>22}')
+    print(f'{uncached * 1e6:>12.1f} {cached * 1e6:>10.1f} {saved * 1e6:>9.1f} {saved * args.rps * 100:>21.1f}%')
+    print(f'cache: {verified_token_cache.stats()}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=1000, help='distinct tokens the requests cycle through')
+    parser.add_argument('--rps', type=int, default=5000, help='request rate to report the CPU share at')
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""Seeds a large dataset and records EXPLAIN ANALYZE for every query of the DBService.
+
+Every DBService call is run inside a transaction that is rolled back, while the
+statements it sends to the database (including the selectin relationship loads)
+are captured. The captured statements are then replayed, in order, with
+EXPLAIN (ANALYZE, BUFFERS) - and rolled back again - so the plans show whether
+the indexes of the real access paths are used.
+
+Run from the backend directory, against a migrated (alembic upgrade head) and
+initialized (priorities seeded) database:
+
+    uv run python -m benchmarks.explain_queries --users 1000 --todos-per-user 3000
+"""
+import argparse
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
+
+from app.core.config import get_config
+from app.api.v1.webhooks import get_active_webhooks
+from app.dal import db_service, encode_cursor
+from app.schemas import CategoryInDB, TodoInDB, TodoUpdateInDB
+
+logger = logging.getLogger(__name__)
+
+BENCH_EMAIL_PATTERN = 'bench-%@bench.local'
+# statements that are part of the benchmark's own transaction handling
+IGNORED_STATEMENTS_PREFIXES = ('SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT', 'EXPLAIN')
+
+SEED_STATEMENTS = (
+    '''
+    DELETE FROM todo WHERE created_by_id IN (SELECT id FROM "user" WHERE email LIKE :pattern)
+    ''',
+    '''
+    DELETE FROM category WHERE created_by_id IN (SELECT id FROM "user" WHERE email LIKE :pattern)
+    ''',
+    '''
+    DELETE FROM "user" WHERE email LIKE :pattern
+    ''',
+    '''
+    INSERT INTO "user" (id, email, hashed_password, is_active, is_superuser, is_verified)
+    SELECT gen_random_uuid(), 'bench-' || i || '@bench.local', 'not-a-password', true, false, true
+    FROM generate_series(1, :users) AS i
+    ''',
+    '''
+    INSERT INTO category (id, name, created_by_id)
+    SELECT gen_random_uuid(), 'category ' || c, u.id
+    FROM "user" AS u, generate_series(1, :categories_per_user) AS c
+    WHERE u.email LIKE :pattern
+    ''',
+    '''
+    INSERT INTO todo (id, is_completed, content, created_by_id, priority_id)
+    SELECT gen_random_uuid(), t % 3 = 0, 'todo number ' || t, u.id, p.ids[1 + t % array_length(p.ids, 1)]
+    FROM (SELECT array_agg(id) AS ids FROM priority) AS p,
+         "user" AS u,
+         generate_series(1, :todos_per_user) AS t
+    WHERE u.email LIKE :pattern
+    ''',
+    '''
+    INSERT INTO todo_category (todo_id, category_id, created_by_id)
+    SELECT t.id, (
+        SELECT c.id FROM category AS c
+        WHERE c.created_by_id = t.created_by_id
+        ORDER BY c.id
+        LIMIT 1
+    ), t.created_by_id
+    FROM todo AS t
+    JOIN "user" AS u ON u.id = t.created_by_id
+    WHERE u.email LIKE :pattern
+    ''',
+    '''
+    INSERT INTO webhooks (id, url, events, is_active, created_by_id)
+    SELECT gen_random_uuid(), 'http://localhost:9/hook-' || w,
+           CASE WHEN w % 2 = 0 THEN ARRAY['todo.created'] ELSE ARRAY['todo.updated', 'todo.deleted'] END,
+           true, u.id
+    FROM "user" AS u, generate_series(1, :webhooks_per_user) AS w
+    WHERE u.email LIKE :pattern
+    ''',
+    'ANALYZE "user"',
+    'ANALYZE category',
+    'ANALYZE todo',
+    'ANALYZE todo_category',
+    'ANALYZE webhooks',
+)
+
+
+async def seed(connection: AsyncConnection, args: argparse.Namespace) -> None:
+    priorities_count = (await connection.execute(text('SELECT count(*) FROM priority'))).scalar_one()
+    if not priorities_count:
+        raise SystemExit('no priorities found - initialize the database (app.core.init_db) first')
+    params = {
+        'pattern': BENCH_EMAIL_PATTERN,
+        'users': args.users,
+        'categories_per_user': args.categories_per_user,
+        'todos_per_user': args.todos_per_user,
+        'webhooks_per_user': args.webhooks_per_user,
+    }
+    for statement in SEED_STATEMENTS:
+        started_at = time.perf_counter()
+        await connection.execute(text(statement), params)
+        await connection.commit()
+        logger.info('%.1fs: %s', time.perf_counter() - started_at, ' '.join(statement.split())[:80])
+
+
+async def explain_service_call(
+    connection: AsyncConnection,
+    call: Callable[[AsyncSession], Awaitable[Any]]
+) -> list[tuple[str, list[str]]]:
+    statements: list[tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):  # type: ignore[no-untyped-def]
+        if not executemany and not statement.lstrip().upper().startswith(IGNORED_STATEMENTS_PREFIXES):
+            statements.append((statement, parameters))
+
+    # the commits of the DBService only release savepoints of the outer transaction
+    savepoint = await connection.begin_nested()
+    session = AsyncSession(bind=connection, join_transaction_mode='create_savepoint', expire_on_commit=False)
+    event.listen(connection.sync_engine, 'before_cursor_execute', capture)
+    try:
+        await call(session)
+    finally:
+        event.remove(connection.sync_engine, 'before_cursor_execute', capture)
+        await session.close()
+        await savepoint.rollback()
+
+    # replaying in order reproduces the state every statement originally ran against
+    plans: list[tuple[str, list[str]]] = []
+    savepoint = await connection.begin_nested()
+    try:
+        for statement, parameters in statements:
+            result = await connection.exec_driver_sql(f'EXPLAIN (ANALYZE, BUFFERS) {statement}', parameters)
+            plans.append((statement, [row[0] for row in result]))
+    finally:
+        await savepoint.rollback()
+    return plans
+
+
+def get_service_calls(
+    user_id: UUID,
+    todo_id: UUID,
+    categories_ids: list[UUID],
+    priority_id: UUID
+) -> dict[str, Callable[[AsyncSession], Awaitable[Any]]]:
+    todo_in = TodoInDB(
+        content='benchmark todo',
+        priority_id=priority_id,
+        categories_ids=categories_ids[:1],
+        created_by_id=user_id
+    )
+    updated_todo = TodoUpdateInDB(
+        id=todo_id,
+        content='benchmark todo',
+        priority_id=priority_id,
+        categories_ids=categories_ids[:1],
+        is_completed=True,
+        created_by_id=user_id
+    )
+    return {
+        'get_todos (first page)': lambda s: db_service.get_todos(s, created_by_id=user_id),
+        'get_todos (deep offset)': lambda s: db_service.get_todos(s, created_by_id=user_id, skip=2000),
+        'get_todos (cursor)': lambda s: db_service.get_todos(s, created_by_id=user_id, after=encode_cursor(todo_id)),
+        'search_todos': lambda s: db_service.search_todos(s, created_by_id=user_id, search_query='number 150'),
+        'get_categories': lambda s: db_service.get_categories(s, created_by_id=user_id),
+        'validate_todo_categories': lambda s: db_service._validate_todo_categories(
+            s, todo_categories_ids=categories_ids, created_by_id=user_id
+        ),
+        'add_category': lambda s: db_service.add_category(
+            s, category_in=CategoryInDB(name='benchmark category', created_by_id=user_id)
+        ),
+        'add_todo': lambda s: db_service.add_todo(s, todo_in=todo_in),
+        'update_todo': lambda s: db_service.update_todo(s, updated_todo=updated_todo),
+        'delete_todo': lambda s: db_service.delete_todo(s, id_to_delete=todo_id, created_by_id=user_id),
+        'notify_webhooks (lookup)': lambda s: get_active_webhooks(s, user_id, 'todo.created'),
+    }
+
+
+async def run(args: argparse.Namespace) -> None:
+    engine = create_async_engine(str(get_config().POSTGRES_URI))
+    try:
+        async with engine.connect() as connection:
+            if not args.skip_seed:
+                await seed(connection, args)
+
+            # a user from the middle of the dataset, with one of its todos from the middle of its list
+            user_id = (await connection.execute(
+                text('SELECT id FROM "user" WHERE email = :email'),
+                {'email': f'bench-{max(args.users // 2, 1)}@bench.local'}
+            )).scalar_one()
+            todo_id = (await connection.execute(
+                text('SELECT id FROM todo WHERE created_by_id = :user_id ORDER BY id OFFSET :offset LIMIT 1'),
+                {'user_id': user_id, 'offset': args.todos_per_user // 2}
+            )).scalar_one()
+            categories_ids = (await connection.execute(
+                text('SELECT id FROM category WHERE created_by_id = :user_id ORDER BY id LIMIT 2'),
+                {'user_id': user_id}
+            )).scalars().all()
+            priority_id = (await connection.execute(text('SELECT id FROM priority LIMIT 1'))).scalar_one()
+            await connection.commit()
+
+            report: list[str] = []
+            for name, call in get_service_calls(user_id, todo_id, list(categories_ids), priority_id).items():
+                plans = await explain_service_call(connection, call)
+                for statement, plan in plans:
+                    execution_time = next((line for line in plan if line.startswith('Execution Time')), '')
+                    seq_scans = sorted(set(re.findall(r'Seq Scan on (\w+)', '\n'.join(plan))))
+                    print(f'{name:<28} {execution_time:<28} seq scans: {", ".join(seq_scans) or "-"}')
+                    report.append(f'-- {name}\n{statement}\n\n' + '\n'.join(plan) + '\n')
+
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(report))
+            print(f'full plans were written to {args.output}')
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--todos-per-user', type=int, default=3000)
+    parser.add_argument('--categories-per-user', type=int, default=10)
+    parser.add_argument('--webhooks-per-user', type=int, default=2)
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the data of a previous run')
+    parser.add_argument('--output', default='explain_queries.txt')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
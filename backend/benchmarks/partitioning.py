@@ -0,0 +1,230 @@
+"""Compares todo / todo_category unpartitioned and hash partitioned by owner.
+
+Seeds the same skewed dataset - one big tenant and many small users - into two
+scratch schemas: one with the tables as they were before migration c5f2a8e7d3b9
+(unpartitioned), one with them hash partitioned by created_by_id, as they are
+now. Then, for each schema, measures:
+
+- the latency (median / p95) of the per-user queries of GET /todos - a page, a
+  page filtered by completion and a page filtered by category - for a small
+  user and for the big tenant
+- the maintenance time after a churn of the big tenant's todos (updates and
+  deletes): VACUUM ANALYZE and REINDEX of the whole table, and for the
+  partitioned schema of the big tenant's partition alone, which is what
+  autovacuum works on once the tables are partitioned
+
+The scratch schemas are dropped at the end unless --keep is given. Run from the
+backend directory, against any database the configured user can create schemas in:
+
+    uv run python -m benchmarks.partitioning --users 20000 --todos-per-user 100 --big-tenant-todos 1000000
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import get_config
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS = 16
+SCHEMAS = ('bench_unpartitioned', 'bench_partitioned')
+# the big tenant is user 0, the small users are 1..users. the ids are derived from the
+# numbers, so both schemas get the same ids - and the same partitions
+USER_ID = "md5('bench-user-' || {number})::uuid"
+TODO_ID = "md5('bench-todo-' || {user} || '-' || {todo})::uuid"
+
+
+def get_schema_statements(schema: str, partitioned: bool) -> list[str]:
+    todo_primary_key = 'id, created_by_id' if partitioned else 'id'
+    partition_by = ' PARTITION BY HASH (created_by_id)' if partitioned else ''
+    todo_category_foreign_key = (
+        'FOREIGN KEY (todo_id, created_by_id) REFERENCES {schema}.todo (id, created_by_id) ON DELETE CASCADE'
+        if partitioned else
+        'FOREIGN KEY (todo_id) REFERENCES {schema}.todo (id) ON DELETE CASCADE'
+    ).format(schema=schema)
+    statements = [
+        f'DROP SCHEMA IF EXISTS {schema} CASCADE',
+        f'CREATE SCHEMA {schema}',
+        f'''
+        CREATE TABLE {schema}.todo (
+            id uuid NOT NULL,
+            is_completed boolean NOT NULL,
+            content text NOT NULL,
+            created_by_id uuid NOT NULL,
+            priority_id integer NOT NULL,
+            version bigint NOT NULL DEFAULT 0,
+            PRIMARY KEY ({todo_primary_key})
+        ){partition_by}
+        ''',
+        f'''
+        CREATE TABLE {schema}.todo_category (
+            todo_id uuid NOT NULL,
+            category_id uuid NOT NULL,
+            created_by_id uuid NOT NULL,
+            PRIMARY KEY (todo_id, category_id, created_by_id),
+            {todo_category_foreign_key}
+        ){partition_by}
+        ''',
+    ]
+    if partitioned:
+        statements += [
+            f'CREATE TABLE {schema}.{table}_p{remainder} PARTITION OF {schema}.{table} '
+            f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+            for table in ('todo', 'todo_category')
+            for remainder in range(PARTITIONS)
+        ]
+    return statements + [
+        f'CREATE INDEX ix_todo_created_by_id_id ON {schema}.todo (created_by_id, id)',
+        f'CREATE INDEX ix_todo_created_by_id_is_completed_id ON {schema}.todo (created_by_id, is_completed, id)',
+        f'CREATE INDEX ix_todo_category_category_id ON {schema}.todo_category (category_id)',
+    ]
+
+
+def get_seed_statements(schema: str) -> list[str]:
+    # category ids are derived the same way - todo t of a user is in category t % 10
+    category_id = "md5('bench-category-' || {user} || '-' || {category})::uuid"
+    return [
+        f'''
+        INSERT INTO {schema}.todo (id, is_completed, content, created_by_id, priority_id)
+        SELECT {TODO_ID.format(user='u', todo='t')}, t % 3 = 0, 'todo number ' || t,
+               {USER_ID.format(number='u')}, t % 3
+        FROM generate_series(1, :users) AS u, generate_series(1, :todos_per_user) AS t
+        UNION ALL
+        SELECT {TODO_ID.format(user='0', todo='t')}, t % 3 = 0, 'todo number ' || t,
+               {USER_ID.format(number='0')}, t % 3
+        FROM generate_series(1, :big_tenant_todos) AS t
+        ''',
+        f'''
+        INSERT INTO {schema}.todo_category (todo_id, category_id, created_by_id)
+        SELECT {TODO_ID.format(user='u', todo='t')}, {category_id.format(user='u', category='t % 10')},
+               {USER_ID.format(number='u')}
+        FROM generate_series(1, :users) AS u, generate_series(1, :todos_per_user) AS t
+        UNION ALL
+        SELECT {TODO_ID.format(user='0', todo='t')}, {category_id.format(user='0', category='t % 10')},
+               {USER_ID.format(number='0')}
+        FROM generate_series(1, :big_tenant_todos) AS t
+        ''',
+        f'VACUUM ANALYZE {schema}.todo',
+        f'VACUUM ANALYZE {schema}.todo_category',
+    ]
+
+
+def get_queries(schema: str) -> dict[str, str]:
+    # the per-user reads of GET /todos, as the DBService sends them
+    return {
+        'page': f'''
+            SELECT id, is_completed, content, priority_id FROM {schema}.todo
+            WHERE created_by_id = :user_id ORDER BY id LIMIT 100
+        ''',
+        'page (completed)': f'''
+            SELECT id, is_completed, content, priority_id FROM {schema}.todo
+            WHERE created_by_id = :user_id AND is_completed ORDER BY id LIMIT 100
+        ''',
+        'page (category)': f'''
+            SELECT id, is_completed, content, priority_id FROM {schema}.todo
+            WHERE created_by_id = :user_id AND EXISTS (
+                SELECT 1 FROM {schema}.todo_category
+                WHERE todo_category.created_by_id = todo.created_by_id
+                  AND todo_category.todo_id = todo.id
+                  AND todo_category.category_id = md5('bench-category-' || :user_number || '-3')::uuid
+            )
+            ORDER BY id LIMIT 100
+        ''',
+    }
+
+
+async def timed(connection: AsyncConnection, statement: str, params: dict[str, Any]) -> float:
+    started_at = time.perf_counter()
+    await connection.execute(text(statement), params)
+    return time.perf_counter() - started_at
+
+
+async def measure_queries(connection: AsyncConnection, schema: str, repeat: int) -> None:
+    for user_name, user_number in (('small user', 1), ('big tenant', 0)):
+        user_id = (await connection.execute(
+            text(f'SELECT {USER_ID.format(number=":number")}'), {'number': str(user_number)}
+        )).scalar_one()
+        params = {'user_id': user_id, 'user_number': str(user_number)}
+        for name, query in get_queries(schema).items():
+            await timed(connection, query, params)  # warms up the cache
+            timings = sorted([await timed(connection, query, params) for _ in range(repeat)])
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+            print(
+                f'{schema:<20} {user_name:<11} {name:<17} '
+                f'median {statistics.median(timings) * 1000:8.2f}ms  p95 {p95 * 1000:8.2f}ms'
+            )
+
+
+async def measure_maintenance(connection: AsyncConnection, schema: str, partitioned: bool) -> None:
+    # churns the big tenant's todos, so vacuum has dead tuples to clean up
+    big_tenant_id = USER_ID.format(number='0')
+    await timed(connection, f'''
+        UPDATE {schema}.todo SET is_completed = NOT is_completed, version = version + 1
+        WHERE created_by_id = {big_tenant_id} AND (hashtext(id::text) % 5) = 0
+    ''', {})
+    await timed(connection, f'''
+        DELETE FROM {schema}.todo WHERE created_by_id = {big_tenant_id} AND (hashtext(id::text) % 20) = 1
+    ''', {})
+
+    timings = {}
+    if partitioned:
+        # the partition of the big tenant - the only one with dead tuples
+        partition = (await connection.execute(text(f'''
+            SELECT tableoid::regclass::text FROM {schema}.todo WHERE created_by_id = {big_tenant_id} LIMIT 1
+        '''))).scalar_one()
+        timings['VACUUM ANALYZE (big tenant partition)'] = await timed(connection, f'VACUUM ANALYZE {partition}', {})
+    timings['VACUUM ANALYZE (table)'] = await timed(connection, f'VACUUM ANALYZE {schema}.todo', {})
+    if partitioned:
+        timings['REINDEX (big tenant partition)'] = await timed(connection, f'REINDEX TABLE {partition}', {})
+    timings['REINDEX (table)'] = await timed(connection, f'REINDEX TABLE {schema}.todo', {})
+    for name, seconds in timings.items():
+        print(f'{schema:<20} {name:<40} {seconds:8.2f}s')
+
+
+async def run(args: argparse.Namespace) -> None:
+    # VACUUM can not run in a transaction
+    engine = create_async_engine(str(get_config().POSTGRES_URI), isolation_level='AUTOCOMMIT')
+    params = {
+        'users': args.users,
+        'todos_per_user': args.todos_per_user,
+        'big_tenant_todos': args.big_tenant_todos,
+    }
+    try:
+        async with engine.connect() as connection:
+            for schema in SCHEMAS:
+                partitioned = schema == 'bench_partitioned'
+                if not args.skip_seed:
+                    for statement in get_schema_statements(schema, partitioned) + get_seed_statements(schema):
+                        seconds = await timed(connection, statement, params)
+                        logger.info('%.1fs: %s', seconds, ' '.join(statement.split())[:80])
+                await measure_queries(connection, schema, args.repeat)
+            for schema in SCHEMAS:
+                await measure_maintenance(connection, schema, partitioned=schema == 'bench_partitioned')
+            if not args.keep:
+                for schema in SCHEMAS:
+                    await connection.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--todos-per-user', type=int, default=100)
+    parser.add_argument('--big-tenant-todos', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=200, help='runs of every query')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the schemas of a previous run (--keep)')
+    parser.add_argument('--keep', action='store_true', help='keep the scratch schemas')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Compares uuid4 and UUIDv7 (app.models.ids.uuid7) primary keys under inserts.
+
+Inserts the same number of rows - ids generated in Python, as the models do -
+into two scratch tables shaped like todo, one keyed by uuid4 and one by UUIDv7,
+in batches of --batch-size rows sent with COPY. For each table, reports:
+
+- the insert throughput (rows/s) of the first and of the last 10% of the
+  batches, when the primary key no longer fits the buffer cache
+- the size of the table and of its primary key index, and the average leaf
+  density of the index (pgstattuple's pgstatindex, when the extension exists)
+
+The scratch tables are dropped at the end unless --keep is given. Run from the
+backend directory:
+
+    uv run python -m benchmarks.uuid_keys --rows 10000000 --batch-size 10000
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from uuid import UUID, uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.config import get_config
+from app.models.ids import uuid7
+
+logger = logging.getLogger(__name__)
+
+TABLES: dict[str, Callable[[], UUID]] = {
+    'bench_uuid4_todo': uuid4,
+    'bench_uuid7_todo': uuid7,
+}
+
+
+async def create_table(connection: AsyncConnection, table: str) -> None:
+    await connection.execute(text(f'DROP TABLE IF EXISTS {table}'))
+    await connection.execute(text(f'''
+        CREATE TABLE {table} (
+            id uuid PRIMARY KEY,
+            is_completed boolean NOT NULL,
+            content text NOT NULL,
+            created_by_id uuid NOT NULL
+        )
+    '''))
+
+
+async def insert_rows(
+    connection: AsyncConnection,
+    table: str,
+    get_id: Callable[[], UUID],
+    args: argparse.Namespace
+) -> list[float]:
+    # the rows per second of every batch
+    asyncpg_connection = (await connection.get_raw_connection()).driver_connection
+    created_by_id = uuid4()
+    throughputs: list[float] = []
+    for batch_number in range(args.rows // args.batch_size):
+        records = [
+            (get_id(), row % 3 == 0, f'todo number {row}', created_by_id)
+            for row in range(batch_number * args.batch_size, (batch_number + 1) * args.batch_size)
+        ]
+        started_at = time.perf_counter()
+        await asyncpg_connection.copy_records_to_table(
+            table,
+            records=records,
+            columns=('id', 'is_completed', 'content', 'created_by_id')
+        )
+        throughputs.append(args.batch_size / (time.perf_counter() - started_at))
+        if batch_number % 100 == 0:
+            logger.info('%s: %d rows', table, (batch_number + 1) * args.batch_size)
+    return throughputs
+
+
+async def get_index_density(connection: AsyncConnection, table: str) -> str:
+    has_pgstattuple = (await connection.execute(
+        text("SELECT count(*) FROM pg_extension WHERE extname = 'pgstattuple'")
+    )).scalar_one()
+    if not has_pgstattuple:
+        return 'n/a (CREATE EXTENSION pgstattuple)'
+    density = (await connection.execute(
+        text(f"SELECT avg_leaf_density FROM pgstatindex('{table}_pkey')")
+    )).scalar_one()
+    return f'{density:.1f}%'
+
+
+async def run(args: argparse.Namespace) -> None:
+    # every COPY commits on its own, as the batches of a sustained write load
+    engine = create_async_engine(str(get_config().POSTGRES_URI), isolation_level='AUTOCOMMIT')
+    try:
+        async with engine.connect() as connection:
+            for table, get_id in TABLES.items():
+                await create_table(connection, table)
+                throughputs = await insert_rows(connection, table, get_id, args)
+                tenth = max(len(throughputs) // 10, 1)
+                sizes = (await connection.execute(text(
+                    f"SELECT pg_size_pretty(pg_table_size('{table}')), "
+                    f"pg_size_pretty(pg_relation_size('{table}_pkey'))"
+                ))).one()
+                print(
+                    f'{table:<18} first 10%: {sum(throughputs[:tenth]) / tenth:9.0f} rows/s  '
+                    f'last 10%: {sum(throughputs[-tenth:]) / tenth:9.0f} rows/s  '
+                    f'table: {sizes[0]:>8}  primary key: {sizes[1]:>8}  '
+                    f'leaf density: {await get_index_density(connection, table)}'
+                )
+            if not args.keep:
+                for table in TABLES:
+                    await connection.execute(text(f'DROP TABLE {table}'))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--keep', action='store_true', help='keep the scratch tables')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
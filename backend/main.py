@@ -12,15 +12,19 @@ from fastapi.responses import RedirectResponse
 from app.core.config import get_config
 from app.api import router 
 from app.core.init_db import init_app
+from app.users.access_tokens import access_token_revocation_listener
 from app.core.config import get_config
 from app.middleware.auth_debug import AuthDebugMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
 config = get_config()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_app()
+    await access_token_revocation_listener.start(str(config.POSTGRES_URI))
     yield
+    await access_token_revocation_listener.stop()
 
 app = FastAPI(title=config.PROJECT_NAME, version=config.PROJECT_VERSION, openapi_url=f'{config.API_V1_STR}/openapi.json', lifespan=lifespan)
 
@@ -42,6 +46,7 @@ app.add_middleware(
     expose_headers=["*"],
 )
 app.add_middleware(AuthDebugMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
 # Redirect to documentation page when accessing base URL
 @app.get("/")
 async def redirect_to_docs():
@@ -3,6 +3,10 @@
 import json
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dal import reference_data_cache
+from app.models.tables import Category
 
 API_V1_STR = "/api/v1"
 
@@ -72,14 +76,39 @@ class TestCategories:
                 }
             },
             id='create category'
+        ),
+        pytest.param(
+            {
+                'headers': 'user_token_headers',
+                'data': {'name': 'Personal'},
+                'status_code': 409,
+                'res_body': {'detail': 'category name already exists'}
+            },
+            id='duplicate category name'
+        ),
+        pytest.param(
+            {
+                'headers': 'user_token_headers',
+                'system_category': 'Inbox',
+                'data': {'name': 'Inbox'},
+                'status_code': 409,
+                'res_body': {'detail': 'category name already exists'}
+            },
+            id='system category name'
         )
     ])
     async def test_create_category(
         self,
         client: AsyncClient,
+        db_session: AsyncSession,
         user_token_headers: dict,
         test_data: dict
     ):
+        if 'system_category' in test_data:
+            # a category of all the users
+            db_session.add(Category(name=test_data['system_category'], created_by_id=None))
+            await db_session.commit()
+            reference_data_cache.invalidate()
         headers = user_token_headers if test_data['headers'] == 'user_token_headers' else None
         res = await client.post(
             f"{API_V1_STR}/categories",
@@ -94,3 +123,56 @@ class TestCategories:
             del response_data['created_at']
             del response_data['updated_at']
             assert response_data == test_data['res_body']
+        else:
+            assert res.json() == test_data['res_body']
+
+    async def test_get_categories_by_cursor(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict
+    ):
+        expected_ids = [c['id'] for c in get_tests_data()['users'][0]['categories']]
+        res = await client.get(f'{API_V1_STR}/categories', params={'limit': 1}, headers=user_token_headers)
+        assert res.status_code == 200
+        assert [c['id'] for c in res.json()] == expected_ids[:1]
+
+        next_cursor = res.headers['X-Next-Cursor']
+        res = await client.get(
+            f'{API_V1_STR}/categories',
+            params={'limit': 1, 'after': next_cursor},
+            headers=user_token_headers
+        )
+        assert res.status_code == 200
+        assert [c['id'] for c in res.json()] == expected_ids[1:2]
+
+    async def test_get_categories_by_invalid_cursor(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict
+    ):
+        res = await client.get(
+            f'{API_V1_STR}/categories',
+            params={'after': 'not-a-cursor'},
+            headers=user_token_headers
+        )
+        assert res.status_code == 400
+        assert res.json() == {'detail': 'cursor is not valid'}
+
+    async def test_get_categories_cached(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict
+    ):
+        # the second page is served from the response cache, with the same headers
+        first = await client.get(f'{API_V1_STR}/categories', params={'limit': 1}, headers=user_token_headers)
+        second = await client.get(f'{API_V1_STR}/categories', params={'limit': 1}, headers=user_token_headers)
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers['X-Next-Cursor'] == first.headers['X-Next-Cursor']
+
+        # a write of the user invalidates it
+        res = await client.post(f'{API_V1_STR}/categories', json={'name': 'Errands'}, headers=user_token_headers)
+        assert res.status_code == 201
+        res = await client.get(f'{API_V1_STR}/categories', headers=user_token_headers)
+        assert 'Errands' in [c['name'] for c in res.json()]
+        assert res.headers['ETag'] != first.headers['ETag']
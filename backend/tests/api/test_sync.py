@@ -0,0 +1,103 @@
+# tests for sync
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.dal import db_service
+
+API_V1_STR = "/api/v1"
+
+def get_tests_data():
+    # get from tests_data.json
+    with open('tests/tests_data.json', 'r') as f:
+        return json.load(f)
+
+@pytest.mark.asyncio
+class TestSync:
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'headers': None, 'params': {}, 'status_code': 401, 'res_body': {'detail': 'Not authenticated'}},
+            id='unauthorized'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'params': {'since': 'not-a-token'},
+             'status_code': 400, 'res_body': {'detail': 'sync token is not valid'}},
+            id='malformed token'
+        )
+    ])
+    async def test_sync_errors(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        headers = user_token_headers if test_data['headers'] == 'user_token_headers' else None
+        res = await client.get(f"{API_V1_STR}/sync", headers=headers, params=test_data['params'])
+        assert res.status_code == test_data['status_code']
+        assert res.json() == test_data['res_body']
+
+    async def test_sync_changes(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict
+    ):
+        # a full sync returns all the categories of the user
+        res = await client.get(f"{API_V1_STR}/sync", headers=user_token_headers)
+        assert res.status_code == 200
+        full = res.json()
+        assert [c['id'] for c in full['categories']] == [c['id'] for c in get_tests_data()['users'][0]['categories']]
+
+        # and nothing changed since it
+        res = await client.get(f"{API_V1_STR}/sync", headers=user_token_headers, params={'since': full['token']})
+        assert res.json() == {
+            'token': full['token'], 'full': False, 'todos': [], 'categories': [],
+            'deleted_todos_ids': [], 'deleted_categories_ids': []
+        }
+
+        # a deleted category is returned as deleted
+        category_id = full['categories'][0]['id']
+        res = await client.delete(f"{API_V1_STR}/categories/{category_id}", headers=user_token_headers)
+        assert res.status_code == 204
+        res = await client.get(f"{API_V1_STR}/sync", headers=user_token_headers, params={'since': full['token']})
+        assert res.json()['deleted_categories_ids'] == [category_id]
+        assert res.json()['token'] != full['token']
+
+    async def test_sync_after_purge(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict
+    ):
+        res = await client.get(f"{API_V1_STR}/sync", headers=user_token_headers)
+        token = res.json()['token']
+        personal_id, chess_id = [c['id'] for c in get_tests_data()['users'][0]['categories']]
+        res = await client.delete(f"{API_V1_STR}/categories/{chess_id}", headers=user_token_headers)
+        assert res.status_code == 204
+
+        # a full sync does not return the deleted rows
+        res = await client.get(f"{API_V1_STR}/sync", headers=user_token_headers)
+        assert res.json()['full'] is True
+        assert [c['id'] for c in res.json()['categories']] == [personal_id]
+        assert res.json()['deleted_categories_ids'] == []
+
+        # once the tombstone is purged, a sync from a token before it is a full sync
+        purged = await db_service.purge_sync_tombstones(
+            db_session,
+            deleted_before=datetime.now(timezone.utc) + timedelta(minutes=1)
+        )
+        assert purged == 1
+        res = await client.get(f"{API_V1_STR}/sync", headers=user_token_headers, params={'since': token})
+        assert res.json()['full'] is True
+        assert [c['id'] for c in res.json()['categories']] == [personal_id]
+        assert res.json()['deleted_categories_ids'] == []
+
+        # and a sync from the token it returned is not
+        res = await client.get(
+            f"{API_V1_STR}/sync",
+            headers=user_token_headers,
+            params={'since': res.json()['token']}
+        )
+        assert res.json()['full'] is False
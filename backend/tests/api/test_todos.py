@@ -1,9 +1,15 @@
 # tests for todos
 
+import asyncio
+import csv
+import io
 import json
 import pytest
 from httpx import AsyncClient
 
+from app.dal.constants import TODOS_IMPORT_BATCH_SIZE
+from app.utils.todo_files import TODOS_IMPORT_MAX_LINE_BYTES
+
 API_V1_STR = "/api/v1"
 
 def get_tests_data():
@@ -12,6 +18,34 @@ def get_tests_data():
         return json.load(f)
 
 
+HIGH_PRIORITY_ID = '123e4567-e89b-12d3-a456-426614174001'
+LOW_PRIORITY_ID = '123e4567-e89b-12d3-a456-426614174003'
+PERSONAL_ID, CHESS_ID = [c['id'] for c in get_tests_data()['users'][0]['categories']]
+# the todos the filters and sort orders are tested on - 'clock' is completed by the test
+FILTERED_TODOS = {
+    'sicilian': {'content': 'Learn the sicilian opening', 'priority_id': HIGH_PRIORITY_ID,
+                 'categories_ids': [PERSONAL_ID, CHESS_ID]},
+    'clock': {'content': 'Buy a chess clock', 'priority_id': '123e4567-e89b-12d3-a456-426614174002',
+              'categories_ids': [CHESS_ID]},
+    'mom': {'content': 'Call mom', 'priority_id': LOW_PRIORITY_ID, 'categories_ids': [PERSONAL_ID]},
+    'plants': {'content': 'Water the plants', 'priority_id': HIGH_PRIORITY_ID, 'categories_ids': []},
+}
+
+
+async def create_todo_of(client: AsyncClient, owner: str, user_token_headers: dict, other_user_token_headers: dict) -> str:
+    # the id of a todo of the user ('own'), of the other user ('other'), or of no todo ('missing')
+    if owner == 'missing':
+        return '123e4567-e89b-12d3-a456-426614174999'
+    headers, user_index = (user_token_headers, 0) if owner == 'own' else (other_user_token_headers, 1)
+    res = await client.post(
+        f"{API_V1_STR}/todos",
+        headers=headers,
+        json=get_tests_data()['users'][user_index]['todos'][0]
+    )
+    assert res.status_code == 201
+    return res.json()['id']
+
+
 @pytest.mark.asyncio
 class TestTodos:
     @pytest.mark.parametrize('test_data', [
@@ -94,3 +128,564 @@ class TestTodos:
             del expected_data['updated_at']
             assert response_data == expected_data
 
+
+    async def test_batch_todos(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict
+    ):
+        todo = get_tests_data()['users'][0]['todos'][0]
+        res = await client.post(
+            f"{API_V1_STR}/todos/batch",
+            headers=user_token_headers,
+            json={
+                'create': [
+                    todo,
+                    {**todo, 'categories_ids': todo['categories_ids'] * 2}
+                ],
+                'delete': ['123e4567-e89b-12d3-a456-426614174999']
+            }
+        )
+        assert res.status_code == 200
+        results = [(r['action'], r['index'], r['status_code'], r['detail']) for r in res.json()]
+        assert results == [
+            ('create', 0, 201, None),
+            ('create', 1, 400, 'categories are not valid'),
+            ('delete', 0, 404, 'todo does not exist')
+        ]
+
+    async def test_batch_todos_of_another_user(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict,
+        other_user_token_headers: dict
+    ):
+        own_todo_id = await create_todo_of(client, 'own', user_token_headers, other_user_token_headers)
+        other_todo_id = await create_todo_of(client, 'other', user_token_headers, other_user_token_headers)
+        res = await client.post(
+            f"{API_V1_STR}/todos/batch",
+            headers=user_token_headers,
+            json={'delete': [other_todo_id, own_todo_id, '123e4567-e89b-12d3-a456-426614174999']}
+        )
+        assert res.status_code == 200
+        results = [(r['action'], r['index'], r['status_code'], r['detail']) for r in res.json()]
+        assert results == [
+            ('delete', 0, 403, 'a user can not delete a todo that was not created by him'),
+            ('delete', 1, 204, None),
+            ('delete', 2, 404, 'todo does not exist')
+        ]
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'headers': None, 'format': 'ndjson', 'status_code': 401, 'content_type': 'application/json'},
+            id='unauthorized'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'ndjson', 'status_code': 200,
+             'content_type': 'application/x-ndjson'},
+            id='ndjson'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'csv', 'status_code': 200,
+             'content_type': 'text/csv; charset=utf-8'},
+            id='csv'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'xml', 'status_code': 422,
+             'content_type': 'application/json'},
+            id='unknown format'
+        )
+    ])
+    async def test_export_todos(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        headers = user_token_headers if test_data['headers'] == 'user_token_headers' else None
+        res = await client.get(f"{API_V1_STR}/todos/export", headers=headers, params={'format': test_data['format']})
+        assert res.status_code == test_data['status_code']
+        assert res.headers['content-type'] == test_data['content_type']
+        if test_data['format'] == 'csv' and res.status_code == 200:
+            assert res.text.splitlines()[0] == 'id,content,is_completed,priority,categories'
+
+    async def create_exported_todos(self, client: AsyncClient, user_token_headers: dict) -> list[dict]:
+        # two todos of the user, and how they are exported (ordered by id - in creation order)
+        personal_id, chess_id = [c['id'] for c in get_tests_data()['users'][0]['categories']]
+        todos = [
+            {'content': 'Learn the sicilian opening', 'priority_id': '123e4567-e89b-12d3-a456-426614174001',
+             'categories_ids': [personal_id, chess_id]},
+            {'content': 'Replay "the immortal game", slowly', 'priority_id': '123e4567-e89b-12d3-a456-426614174003',
+             'categories_ids': []}
+        ]
+        ids = []
+        for todo in todos:
+            res = await client.post(f"{API_V1_STR}/todos", headers=user_token_headers, json=todo)
+            assert res.status_code == 201
+            ids.append(res.json()['id'])
+        res = await client.put(
+            f"{API_V1_STR}/todos/{ids[1]}",
+            headers=user_token_headers,
+            json={**todos[1], 'is_completed': True}
+        )
+        assert res.status_code == 200
+        return [
+            {'id': ids[0], 'content': 'Learn the sicilian opening', 'is_completed': False, 'priority': 'High',
+             'categories': ['Chess', 'Personal']},
+            {'id': ids[1], 'content': 'Replay "the immortal game", slowly', 'is_completed': True, 'priority': 'Low',
+             'categories': []}
+        ]
+
+    async def test_export_todos_rows(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict
+    ):
+        expected_rows = await self.create_exported_todos(client, user_token_headers)
+
+        res = await client.get(f"{API_V1_STR}/todos/export", headers=user_token_headers, params={'format': 'ndjson'})
+        assert res.status_code == 200
+        assert [json.loads(line) for line in res.text.splitlines()] == expected_rows
+
+        res = await client.get(f"{API_V1_STR}/todos/export", headers=user_token_headers, params={'format': 'csv'})
+        assert res.status_code == 200
+        assert list(csv.DictReader(io.StringIO(res.text))) == [
+            {**row, 'is_completed': str(row['is_completed']).lower(), 'categories': ';'.join(row['categories'])}
+            for row in expected_rows
+        ]
+
+    @pytest.mark.parametrize('file_format', ['ndjson', 'csv'])
+    async def test_export_todos_round_trip(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict,
+        file_format: str
+    ):
+        # an exported file is imported back as new todos, the same but for their ids
+        expected_rows = await self.create_exported_todos(client, user_token_headers)
+        res = await client.get(f"{API_V1_STR}/todos/export", headers=user_token_headers, params={'format': file_format})
+        res = await client.post(
+            f"{API_V1_STR}/todos/import",
+            headers=user_token_headers,
+            params={'format': file_format},
+            content=res.content
+        )
+        assert res.json() == {'imported': 2, 'rejected': 0, 'rejected_rows': []}
+
+        res = await client.get(f"{API_V1_STR}/todos/export", headers=user_token_headers, params={'format': 'ndjson'})
+        rows = [json.loads(line) for line in res.text.splitlines()]
+        assert [{**row, 'id': None} for row in rows] == [{**row, 'id': None} for row in expected_rows * 2]
+        assert rows[:2] == expected_rows
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'headers': None, 'format': 'ndjson', 'content': '', 'status_code': 401},
+            id='unauthorized'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'csv', 'content': 'a,b\n1,2\n', 'status_code': 400,
+             'res_body': {'detail': 'file is not valid'}},
+            id='csv without header'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'ndjson',
+             'content': 'not json\n{"content": "Learn the sicilian opening", "priority": "not a priority"}\n',
+             'status_code': 200,
+             'res_body': {
+                 'imported': 0,
+                 'rejected': 2,
+                 'rejected_rows': [
+                     {'row': 1, 'detail': 'row is not valid json'},
+                     {'row': 2, 'detail': 'priority is not valid'}
+                 ]
+             }},
+            id='rejected rows'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'ndjson',
+             'content': b'{"content": "Learn the sicilian opening \xff", "priority": "High"}\n',
+             'status_code': 400, 'res_body': {'detail': 'file is not valid'}},
+            id='not utf-8'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'ndjson', 'content': 'x' * (TODOS_IMPORT_MAX_LINE_BYTES + 1),
+             'status_code': 400, 'res_body': {'detail': 'file is not valid'}},
+            id='line too long'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'format': 'ndjson',
+             'content': '{"content": "Learn the sicilian\\u0000opening", "priority": "High"}\n'
+                        '{"content": "Learn the sicilian opening", "priority": "High", "categories": ["Chess\\u0000"]}\n'
+                        '{"content": "Learn the sicilian opening", "priority": "High"}\n',
+             'status_code': 200,
+             'res_body': {
+                 'imported': 1,
+                 'rejected': 2,
+                 'rejected_rows': [
+                     {'row': 1, 'detail': 'content is not valid'},
+                     {'row': 2, 'detail': 'categories are not valid'}
+                 ]
+             }},
+            id='not storable rows'
+        )
+    ])
+    async def test_import_todos(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        headers = user_token_headers if test_data['headers'] == 'user_token_headers' else None
+        res = await client.post(
+            f"{API_V1_STR}/todos/import",
+            headers=headers,
+            params={'format': test_data['format']},
+            content=test_data['content']
+        )
+        assert res.status_code == test_data['status_code']
+        if 'res_body' in test_data:
+            assert res.json() == test_data['res_body']
+
+    async def test_import_todos_does_not_block_other_writes(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict
+    ):
+        # the user adds a todo while the body of an import is still being uploaded
+        rest_of_body_sent = asyncio.Event()
+
+        async def import_body():
+            yield b'{"content": "Learn the sicilian opening", "priority": "High", "categories": ["Chess"]}\n'
+            await rest_of_body_sent.wait()
+            yield b'{"content": "Learn the french defence", "priority": "High"}\n'
+
+        import_request = asyncio.create_task(client.post(
+            f"{API_V1_STR}/todos/import",
+            headers=user_token_headers,
+            params={'format': 'ndjson'},
+            content=import_body()
+        ))
+        res = await asyncio.wait_for(
+            client.post(f"{API_V1_STR}/todos", headers=user_token_headers, json=get_tests_data()['users'][0]['todos'][0]),
+            timeout=10
+        )
+        assert res.status_code == 201
+
+        rest_of_body_sent.set()
+        res = await import_request
+        assert res.status_code == 200
+        assert res.json() == {'imported': 2, 'rejected': 0, 'rejected_rows': []}
+        res = await client.get(f"{API_V1_STR}/todos/stats", headers=user_token_headers)
+        assert res.json()['total'] == {'open': 3, 'completed': 0}
+
+    async def test_import_todos_while_deleting_their_category(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict
+    ):
+        # the user deletes a category after a batch of todos linked to it was copied by an import -
+        # the import asks for the rest of its body once the batch is copied
+        first_batch_copied = asyncio.Event()
+        rest_of_body_sent = asyncio.Event()
+        row = b'{"content": "Learn the sicilian opening", "priority": "High", "categories": ["Chess"]}\n'
+
+        async def import_body():
+            yield row * TODOS_IMPORT_BATCH_SIZE
+            first_batch_copied.set()
+            await rest_of_body_sent.wait()
+            yield row
+
+        import_request = asyncio.create_task(client.post(
+            f"{API_V1_STR}/todos/import",
+            headers=user_token_headers,
+            params={'format': 'ndjson'},
+            content=import_body()
+        ))
+        await asyncio.wait_for(first_batch_copied.wait(), timeout=10)
+        res = await asyncio.wait_for(
+            client.delete(f"{API_V1_STR}/categories/{CHESS_ID}", headers=user_token_headers),
+            timeout=10
+        )
+        assert res.status_code == 409
+        assert res.json() == {'detail': 'category is in use, try again'}
+
+        rest_of_body_sent.set()
+        res = await asyncio.wait_for(import_request, timeout=30)
+        assert res.status_code == 200
+        assert res.json() == {'imported': TODOS_IMPORT_BATCH_SIZE + 1, 'rejected': 0, 'rejected_rows': []}
+        res = await client.delete(f"{API_V1_STR}/categories/{CHESS_ID}", headers=user_token_headers)
+        assert res.status_code == 204
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'headers': None, 'params': {'q': 'sicilian'}, 'status_code': 401},
+            id='unauthorized'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'params': {}, 'status_code': 422},
+            id='no query'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'params': {'q': 'sicilian', 'after': 'not a cursor'},
+             'status_code': 400, 'res_body': {'detail': 'cursor is not valid'}},
+            id='malformed cursor'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'params': {'q': 'sicilian opening'}, 'status_code': 200},
+            id='authorized'
+        )
+    ])
+    async def test_search_todos(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        headers = user_token_headers if test_data['headers'] == 'user_token_headers' else None
+        res = await client.get(f"{API_V1_STR}/todos/search", headers=headers, params=test_data['params'])
+        assert res.status_code == test_data['status_code']
+        if 'res_body' in test_data:
+            assert res.json() == test_data['res_body']
+        if res.status_code == 200:
+            assert all('sicilian' in todo['content'].lower() for todo in res.json())
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'params': {'is_completed': 'true'}, 'res_todos': ['clock']},
+            id='completed'
+        ),
+        pytest.param(
+            {'params': {'is_completed': 'false'}, 'res_todos': ['sicilian', 'mom', 'plants']},
+            id='not completed'
+        ),
+        pytest.param(
+            {'params': {'priority_id': HIGH_PRIORITY_ID}, 'res_todos': ['sicilian', 'plants']},
+            id='priority'
+        ),
+        pytest.param(
+            {'params': {'category_id': [CHESS_ID]}, 'res_todos': ['sicilian', 'clock']},
+            id='category'
+        ),
+        pytest.param(
+            {'params': {'category_id': [PERSONAL_ID, CHESS_ID]}, 'res_todos': ['sicilian', 'clock', 'mom']},
+            id='any categories'
+        ),
+        pytest.param(
+            {'params': {'category_id': [PERSONAL_ID, CHESS_ID], 'category_match': 'all'}, 'res_todos': ['sicilian']},
+            id='all categories'
+        ),
+        pytest.param(
+            {'params': {'category_id': [PERSONAL_ID, '123e4567-e89b-12d3-a456-426614174999'], 'category_match': 'all'},
+             'res_todos': []},
+            id='all categories with a missing one'
+        ),
+        pytest.param(
+            {'params': {'category_id': [PERSONAL_ID], 'is_completed': 'false', 'priority_id': LOW_PRIORITY_ID},
+             'res_todos': ['mom']},
+            id='combined filters'
+        ),
+        pytest.param(
+            {'params': {'sort': '-id'}, 'res_todos': ['plants', 'mom', 'clock', 'sicilian']},
+            id='newest first'
+        ),
+        pytest.param(
+            {'params': {'sort': 'content'}, 'res_todos': ['clock', 'mom', 'sicilian', 'plants']},
+            id='by content'
+        ),
+        pytest.param(
+            {'params': {'sort': '-content'}, 'res_todos': ['plants', 'sicilian', 'mom', 'clock']},
+            id='by content descending'
+        ),
+        pytest.param(
+            {'params': {'priority_id': HIGH_PRIORITY_ID, 'sort': '-content'}, 'res_todos': ['plants', 'sicilian']},
+            id='priority by content descending'
+        ),
+        pytest.param(
+            {'params': {'sort': 'priority'}, 'status_code': 422},
+            id='unknown sort'
+        )
+    ])
+    async def test_get_todos_filtered(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        # the todos are created in the order of FILTERED_TODOS, so that is their id order
+        ids = {}
+        for key, todo in FILTERED_TODOS.items():
+            res = await client.post(f"{API_V1_STR}/todos", headers=user_token_headers, json=todo)
+            assert res.status_code == 201
+            ids[key] = res.json()['id']
+        res = await client.put(
+            f"{API_V1_STR}/todos/{ids['clock']}",
+            headers=user_token_headers,
+            json={**FILTERED_TODOS['clock'], 'is_completed': True}
+        )
+        assert res.status_code == 200
+
+        res = await client.get(f"{API_V1_STR}/todos", headers=user_token_headers, params=test_data['params'])
+        assert res.status_code == test_data.get('status_code', 200)
+        if res.status_code == 200:
+            assert [todo['id'] for todo in res.json()] == [ids[key] for key in test_data['res_todos']]
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'headers': None, 'status_code': 401, 'res_body': {'detail': 'Not authenticated'}},
+            id='unauthorized'
+        ),
+        pytest.param(
+            {'headers': 'user_token_headers', 'status_code': 200,
+             'res_body': {'total': {'open': 0, 'completed': 0}, 'priorities': {}, 'categories': {}}},
+            id='authorized'
+        )
+    ])
+    async def test_get_todo_stats(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        headers = user_token_headers if test_data['headers'] == 'user_token_headers' else None
+        res = await client.get(f"{API_V1_STR}/todos/stats", headers=headers)
+        assert res.status_code == test_data['status_code']
+        assert res.json() == test_data['res_body']
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'if_none_match': None, 'status_code': 200},
+            id='no etag'
+        ),
+        pytest.param(
+            {'if_none_match': 'W/"0"', 'status_code': 304},
+            id='current etag'
+        ),
+        pytest.param(
+            {'if_none_match': '"7", W/"0"', 'status_code': 304},
+            id='current etag in a list'
+        ),
+        pytest.param(
+            {'if_none_match': 'W/"7"', 'status_code': 200},
+            id='stale etag'
+        )
+    ])
+    async def test_get_todos_conditional(
+        self,
+        client: AsyncClient,
+        user_token_headers: dict,
+        test_data: dict
+    ):
+        headers = dict(user_token_headers)
+        if test_data['if_none_match']:
+            headers['If-None-Match'] = test_data['if_none_match']
+        res = await client.get(f"{API_V1_STR}/todos", headers=headers)
+        assert res.status_code == test_data['status_code']
+        assert res.headers['ETag'] == 'W/"0"'
+        if res.status_code == 304:
+            assert res.content == b''
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'todo': 'own', 'status_code': 200},
+            id='own todo'
+        ),
+        pytest.param(
+            {'todo': 'other', 'status_code': 403,
+             'res_body': {'detail': 'a user can not update a todo that was not created by him'}},
+            id='another users todo'
+        ),
+        pytest.param(
+            {'todo': 'missing', 'status_code': 404, 'res_body': {'detail': 'todo does not exist'}},
+            id='missing todo'
+        )
+    ])
+    async def test_update_todo(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict,
+        other_user_token_headers: dict,
+        test_data: dict
+    ):
+        todo_id = await create_todo_of(client, test_data['todo'], user_token_headers, other_user_token_headers)
+        todo = get_tests_data()['users'][0]['todos'][0]
+        res = await client.put(
+            f"{API_V1_STR}/todos/{todo_id}",
+            headers=user_token_headers,
+            json={**todo, 'content': 'Learn the french defence', 'is_completed': True}
+        )
+        assert res.status_code == test_data['status_code']
+        if res.status_code == 200:
+            assert res.json()['id'] == todo_id
+            assert res.json()['content'] == 'Learn the french defence'
+            assert res.json()['is_completed'] is True
+        else:
+            assert res.json() == test_data['res_body']
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'todo': 'own', 'status_code': 204},
+            id='own todo'
+        ),
+        pytest.param(
+            {'todo': 'other', 'status_code': 403,
+             'res_body': {'detail': 'a user can not delete a todo that was not created by him'}},
+            id='another users todo'
+        ),
+        pytest.param(
+            {'todo': 'missing', 'status_code': 404, 'res_body': {'detail': 'todo does not exist'}},
+            id='missing todo'
+        )
+    ])
+    async def test_delete_todo(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict,
+        other_user_token_headers: dict,
+        test_data: dict
+    ):
+        todo_id = await create_todo_of(client, test_data['todo'], user_token_headers, other_user_token_headers)
+        res = await client.delete(f"{API_V1_STR}/todos/{todo_id}", headers=user_token_headers)
+        assert res.status_code == test_data['status_code']
+        if res.status_code == 204:
+            res = await client.get(f"{API_V1_STR}/todos", headers=user_token_headers)
+            assert todo_id not in [todo['id'] for todo in res.json()]
+        else:
+            assert res.json() == test_data['res_body']
+
+    async def test_update_todo_categories(
+        self,
+        client: AsyncClient,
+        db_session,
+        user_token_headers: dict
+    ):
+        # one category is added and another one removed - the links and the stats follow
+        personal_id, chess_id = [c['id'] for c in get_tests_data()['users'][0]['categories']]
+        todo = {**get_tests_data()['users'][0]['todos'][0], 'categories_ids': [personal_id]}
+        res = await client.post(f"{API_V1_STR}/todos", headers=user_token_headers, json=todo)
+        assert res.status_code == 201
+        todo_id = res.json()['id']
+        res = await client.get(f"{API_V1_STR}/todos/stats", headers=user_token_headers)
+        assert res.json()['categories'] == {personal_id: {'open': 1, 'completed': 0}}
+
+        res = await client.put(
+            f"{API_V1_STR}/todos/{todo_id}",
+            headers=user_token_headers,
+            json={**todo, 'categories_ids': [chess_id], 'is_completed': False}
+        )
+        assert res.status_code == 200
+        assert [c['id'] for c in res.json()['categories']] == [chess_id]
+
+        res = await client.get(f"{API_V1_STR}/todos/stats", headers=user_token_headers)
+        assert res.json() == {
+            'total': {'open': 1, 'completed': 0},
+            'priorities': {todo['priority_id']: {'open': 1, 'completed': 0}},
+            'categories': {chess_id: {'open': 1, 'completed': 0}}
+        }
@@ -82,14 +82,14 @@ async def db_session():
     async with async_session() as session:
         # Get test data
         test_data = get_tests_data()
-        user_data = test_data['users'][0]
-        
-        # Create test user
-        user = User(
-            id=user_data['id'],
-            email=user_data['email']
-        )
-        session.add(user)
+
+        # Create test users - the second one owns the todos the first one may not touch
+        for user_data in test_data['users']:
+            user = User(
+                id=user_data['id'],
+                email=user_data['email']
+            )
+            session.add(user)
         
         # Create priorities
         priorities = [
@@ -101,13 +101,14 @@ async def db_session():
             session.add(priority)
         
         # Create categories
-        for category in user_data['categories']:
-            cat = Category(
-                id=category['id'],
-                name=category['name'],
-                created_by_id=user_data['id']
-            )
-            session.add(cat)
+        for user_data in test_data['users']:
+            for category in user_data['categories']:
+                cat = Category(
+                    id=category['id'],
+                    name=category['name'],
+                    created_by_id=user_data['id']
+                )
+                session.add(cat)
         
         await session.commit()
         
@@ -130,4 +131,19 @@ async def user_token_headers() -> dict:
     access_token = await create_access_token(
         test_user
     )
-    return {"Authorization": f"Bearer {access_token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture(scope="session")
+async def other_user_token_headers() -> dict:
+    # the second user of tests_data.json
+    other_user = User(
+        id="123e4567-e89b-12d3-a456-426614174007",
+        email="other@test.com",
+        is_superuser=False
+    )
+
+    access_token = await create_access_token(
+        other_user
+    )
+    return {"Authorization": f"Bearer {access_token}"}
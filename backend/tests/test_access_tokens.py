@@ -0,0 +1,47 @@
+# tests for listening to the access tokens revoked by the other workers
+
+import asyncio
+import time
+
+from app.users.access_tokens import AccessTokenRevocationListener
+from app.users.token_cache import VerifiedTokenCache
+
+
+class Connection:
+    # a listening connection, as far as the listener discards it
+    def __init__(self) -> None:
+        self.invalidated = False
+
+    async def invalidate(self) -> None:
+        self.invalidated = True
+
+
+class TestAccessTokenRevocationListener:
+    def test_reconnects_after_the_connection_is_closed(self, monkeypatch):
+        cache = VerifiedTokenCache(max_entries=10)
+        listener = AccessTokenRevocationListener(cache, channel='access_token_revoked')
+        listener.RECONNECT_MIN_DELAY_SECONDS = 0
+        # listening fails twice before the database is back
+        listening_while_retrying = []
+
+        async def listen():
+            listening_while_retrying.append(listener.is_listening)
+            if len(listening_while_retrying) < 3:
+                raise OSError('connection refused')
+            listener._connection = Connection()
+        monkeypatch.setattr(listener, '_listen', listen)
+
+        async def run():
+            terminated_connection = Connection()
+            listener._connection = terminated_connection
+            cache.set('token', 'access token', expires_at=time.time() + 60)
+
+            listener._on_termination(None)
+            assert not listener.is_listening
+            assert cache.get('token') is None
+
+            await listener._reconnect_task
+            assert listening_while_retrying == [False, False, False]
+            assert listener.is_listening
+            assert terminated_connection.invalidated
+        asyncio.run(run())
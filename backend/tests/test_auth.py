@@ -0,0 +1,76 @@
+# tests for authenticating the requests of the API endpoints
+
+import asyncio
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from fastapi_users.jwt import generate_jwt
+from starlette.requests import Request
+
+from app.models.ids import uuid7
+from app.models.tables import User
+from app.users.auth import Principal, get_current_principal
+from app.users.security import get_jwt_strategy
+from app.users.token_cache import verified_token_cache
+
+
+def get_request() -> Request:
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': []})
+
+
+def write_token(claims: dict) -> str:
+    # a token signed like the tokens of the JWT strategy, with the given claims
+    strategy = get_jwt_strategy()
+    return generate_jwt(
+        {'aud': strategy.token_audience, **claims},
+        strategy.encode_key,
+        strategy.lifetime_seconds,
+        algorithm=strategy.algorithm
+    )
+
+
+class TestGetCurrentPrincipal:
+    def setup_method(self):
+        verified_token_cache.clear()
+
+    def test_returns_the_principal_of_the_token(self):
+        user = User(id=uuid7(), email='test@test.com', is_superuser=False)
+        token = asyncio.run(get_jwt_strategy().write_token(user))
+        request = get_request()
+        principal = asyncio.run(get_current_principal(request, token))
+        assert principal == Principal(user_id=user.id, email='test@test.com')
+        assert isinstance(principal.user_id, UUID)
+        assert request.state.principal == principal
+
+    @pytest.mark.parametrize('test_data', [
+        pytest.param(
+            {'token': write_token({'email': 'test@test.com'}), 'detail': 'Token validation failed: no user in token'},
+            id='no user_id'
+        ),
+        pytest.param(
+            {'token': write_token({'user_id': 'not a uuid', 'email': 'test@test.com'}),
+             'detail': 'Token validation failed: no user in token'},
+            id='malformed user_id'
+        ),
+        pytest.param(
+            {'token': 'not a token', 'detail': 'Token validation failed: Not enough segments'},
+            id='malformed token'
+        )
+    ])
+    def test_rejects_a_token_without_a_user(self, test_data: dict):
+        token = test_data['token']
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(get_current_principal(get_request(), token))
+        assert error.value.status_code == 401
+        assert error.value.detail == test_data['detail']
+        assert error.value.headers == {'WWW-Authenticate': 'Bearer'}
+        assert verified_token_cache.get(token) is None
+
+    def test_verifies_a_token_once(self):
+        user = User(id=uuid7(), email='test@test.com', is_superuser=False)
+        token = asyncio.run(get_jwt_strategy().write_token(user))
+        principal = asyncio.run(get_current_principal(get_request(), token))
+        hits = verified_token_cache.hits
+        assert asyncio.run(get_current_principal(get_request(), token)) is principal
+        assert verified_token_cache.hits == hits + 1
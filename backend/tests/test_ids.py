@@ -0,0 +1,21 @@
+# tests for the UUIDv7 ids of new rows
+
+import time
+
+from app.models.ids import uuid7, get_uuid7_timestamp
+
+
+class TestUUID7:
+    def test_is_a_version_7_uuid(self):
+        value = uuid7()
+        assert value.version == 7
+        assert value.variant == 'specified in RFC 4122'
+
+    def test_has_the_creation_time(self):
+        assert abs(get_uuid7_timestamp(uuid7()) - time.time()) < 1
+
+    def test_ids_of_a_process_are_increasing(self):
+        values = [uuid7() for _ in range(10000)]
+        assert values == sorted(values)
+        assert len(set(values)) == len(values)
+
@@ -0,0 +1,29 @@
+# tests for the access to the operational endpoints
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import SecretStr
+
+from app.api import internal
+from app.api.internal import verify_internal_token
+
+
+class TestVerifyInternalToken:
+    def test_not_found_without_an_internal_token(self, monkeypatch):
+        monkeypatch.setattr(internal.config, 'INTERNAL_API_TOKEN', None)
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(verify_internal_token('anything'))
+        assert error.value.status_code == 404
+
+    def test_rejects_a_missing_or_wrong_token(self, monkeypatch):
+        monkeypatch.setattr(internal.config, 'INTERNAL_API_TOKEN', SecretStr('internal'))
+        for token in (None, '', 'other'):
+            with pytest.raises(HTTPException) as error:
+                asyncio.run(verify_internal_token(token))
+            assert error.value.status_code == 403
+
+    def test_accepts_the_internal_token(self, monkeypatch):
+        monkeypatch.setattr(internal.config, 'INTERNAL_API_TOKEN', SecretStr('internal'))
+        assert asyncio.run(verify_internal_token('internal')) is None
@@ -0,0 +1,65 @@
+# tests for routing read-only sessions between the primary and the replicas
+
+import time
+from types import SimpleNamespace
+from uuid import UUID
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.db import ReadSessionRouter
+
+USER_ID = UUID('123e4567-e89b-12d3-a456-426614174010')
+OTHER_USER_ID = UUID('123e4567-e89b-12d3-a456-426614174011')
+
+
+def get_request(user_id: UUID = None, cookie: str = None) -> Request:
+    # a request of the principal of user_id (as get_current_principal leaves it), with the cookie
+    headers = [(b'cookie', cookie.encode())] if cookie else []
+    state = {'principal': SimpleNamespace(user_id=user_id)} if user_id else {}
+    return Request({'type': 'http', 'method': 'GET', 'path': '/', 'headers': headers, 'state': state})
+
+
+def mark_write(router: ReadSessionRouter, user_id: UUID) -> str:
+    # the cookie the client sends back after its write
+    response = Response()
+    router.mark_write(get_request(user_id), response)
+    set_cookie = response.headers.get('set-cookie')
+    return set_cookie.split(';')[0] if set_cookie else None
+
+
+class TestReadSessionRouter:
+    def test_without_replicas_reads_from_primary(self):
+        router = ReadSessionRouter(primary='primary', replicas=[], read_your_writes_seconds=5)
+        assert router.get_session_maker(get_request(USER_ID)) == 'primary'
+        assert mark_write(router, USER_ID) is None
+
+    def test_reads_round_robin_from_replicas(self):
+        router = ReadSessionRouter(primary='primary', replicas=['replica-1', 'replica-2'], read_your_writes_seconds=5)
+        session_makers = [router.get_session_maker(get_request(USER_ID)) for _ in range(3)]
+        assert session_makers == ['replica-1', 'replica-2', 'replica-1']
+
+    def test_reads_own_writes_from_primary(self):
+        router = ReadSessionRouter(primary='primary', replicas=['replica'], read_your_writes_seconds=5)
+        cookie = mark_write(router, USER_ID)
+        assert router.get_session_maker(get_request(USER_ID, cookie)) == 'primary'
+        assert router.get_session_maker(get_request(USER_ID)) == 'replica'
+        assert router.get_session_maker(get_request(OTHER_USER_ID, cookie)) == 'replica'
+        assert router.get_session_maker(get_request(cookie=cookie)) == 'replica'
+
+    def test_reads_own_writes_from_primary_on_another_worker(self):
+        # the write is served by one worker process, the read by another
+        writing_router = ReadSessionRouter(primary='primary', replicas=['replica'], read_your_writes_seconds=5)
+        reading_router = ReadSessionRouter(primary='primary', replicas=['replica'], read_your_writes_seconds=5)
+        cookie = mark_write(writing_router, USER_ID)
+        assert reading_router.get_session_maker(get_request(USER_ID, cookie)) == 'primary'
+
+    def test_reads_from_replicas_after_the_window(self):
+        router = ReadSessionRouter(primary='primary', replicas=['replica'], read_your_writes_seconds=5)
+        cookie = f'{ReadSessionRouter.READ_YOUR_WRITES_COOKIE}={USER_ID}:{time.time() - 10:.3f}'
+        assert router.get_session_maker(get_request(USER_ID, cookie)) == 'replica'
+
+    def test_ignores_malformed_markers(self):
+        router = ReadSessionRouter(primary='primary', replicas=['replica'], read_your_writes_seconds=5)
+        cookie = f'{ReadSessionRouter.READ_YOUR_WRITES_COOKIE}={USER_ID}:soon'
+        assert router.get_session_maker(get_request(USER_ID, cookie)) == 'replica'
@@ -0,0 +1,42 @@
+# tests for the cache of verified access tokens
+
+import time
+
+from app.users.token_cache import VerifiedTokenCache
+
+
+class TestVerifiedTokenCache:
+    def test_returns_the_verified_claims(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.set('token', {'user_id': 'a'}, expires_at=time.time() + 60)
+        assert cache.get('token') == {'user_id': 'a'}
+        assert cache.get('other token') is None
+
+    def test_expires_with_the_token(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.set('token', {'user_id': 'a'}, expires_at=time.time() - 1)
+        assert cache.get('token') is None
+        assert cache.stats()['entries'] == 0
+
+    def test_does_not_cache_tokens_without_expiry(self):
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.set('token', {'user_id': 'a'}, expires_at=None)
+        assert cache.get('token') is None
+
+    def test_evicts_the_least_recently_used(self):
+        cache = VerifiedTokenCache(max_entries=2)
+        expires_at = time.time() + 60
+        cache.set('a', {'user_id': 'a'}, expires_at=expires_at)
+        cache.set('b', {'user_id': 'b'}, expires_at=expires_at)
+        cache.get('a')
+        cache.set('c', {'user_id': 'c'}, expires_at=expires_at)
+        assert cache.get('a') is not None
+        assert cache.get('b') is None
+        assert cache.get('c') is not None
+
+    def test_deletes_a_token_by_its_digest(self):
+        # as the access tokens revoked by other workers are dropped
+        cache = VerifiedTokenCache(max_entries=10)
+        cache.set('token', {'user_id': 'a'}, expires_at=time.time() + 60)
+        cache.delete_digest(VerifiedTokenCache.get_digest('token'))
+        assert cache.get('token') is None